@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The generator modules live in src/ and import each other by module name
+src_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
@@ -0,0 +1,66 @@
+import argparse
+import json
+import sys
+
+from bench.corpus import profiles, scales
+from bench.load import load_test
+from bench.run import bench_search, compare, run
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python3 -m bench", description="Benchmark the site generator on synthetic sites")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_parser = sub.add_parser("run", help="generate synthetic sites and time each stage")
+    run_parser.add_argument("--profile", action="append", choices=sorted(profiles), help="profile to run (repeatable, default: all)")
+    run_parser.add_argument("--scale", choices=list(scales), default="small")
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--jobs", type=int, default=1, help="--jobs passed to the end-to-end build")
+    run_parser.add_argument("--output", "-o", help="write the JSON report here instead of stdout")
+    search_parser = sub.add_parser("search", help="time building and updating the search index")
+    search_parser.add_argument("--pages", type=int, default=100000)
+    search_parser.add_argument("--changed", type=float, default=0.01, help="fraction of pages edited before the incremental run")
+    search_parser.add_argument("--seed", type=int, default=0)
+    search_parser.add_argument("--output", "-o", help="write the JSON report here instead of stdout")
+    load_parser = sub.add_parser("load", help="compare requests per second of serve and python3 -m http.server")
+    load_parser.add_argument("--profile", choices=sorted(profiles), default="small_pages")
+    load_parser.add_argument("--scale", choices=list(scales), default="tiny")
+    load_parser.add_argument("--duration", type=float, default=5.0, help="seconds per server")
+    load_parser.add_argument("--concurrency", type=int, default=8, help="client threads")
+    load_parser.add_argument("--seed", type=int, default=0)
+    load_parser.add_argument("--output", "-o", help="write the JSON report here instead of stdout")
+    compare_parser = sub.add_parser("compare", help="compare two JSON reports")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown, 0.1 = 10%%")
+    args = parser.parse_args(argv)
+
+    if args.command in ("run", "search", "load"):
+        if args.command == "run":
+            report = run(args.profile, args.scale, args.repeat, args.seed, args.jobs)
+        elif args.command == "search":
+            report = bench_search(args.pages, args.changed, args.seed)
+        else:
+            report = load_test(args.profile, args.scale, args.duration, args.concurrency, args.seed)
+        text = json.dumps(report, indent=2)
+        if args.output:
+            with open(args.output, 'w') as file:
+                file.write(text + "\n")
+        else:
+            print(text)
+        return 0
+
+    with open(args.old, 'r') as file:
+        old = json.load(file)
+    with open(args.new, 'r') as file:
+        new = json.load(file)
+    failed = False
+    for profile, stage, before, after, change in compare(old, new):
+        marker = "REGRESSION" if change > args.threshold else ""
+        failed = failed or change > args.threshold
+        print(f"{profile:12} {stage:22} {before * 1000:10.2f} ms -> {after * 1000:10.2f} ms {change:+7.1%} {marker}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import os
+import random
+
+words = (
+    "the hobbit ring shire mordor elf dwarf wizard road river mountain forest "
+    "tower king sword song light shadow journey friend council fire star"
+).split()
+
+template = """<!DOCTYPE html>
+<html>
+<head>
+    <title> {{ Title }} </title>
+    <link href="/index.css" rel="stylesheet">
+</head>
+<body>
+    <article>
+        {{ Content }}
+    </article>
+</body>
+</html>"""
+
+# pages, paragraphs per page, links per paragraph, directory depth, static files, static file size
+profiles = {
+    "small_pages": {"pages": 2000, "paragraphs": 4, "links": 1, "depth": 2, "static": 20, "static_size": 4096},
+    "huge_pages": {"pages": 5, "paragraphs": 4000, "links": 1, "depth": 1, "static": 5, "static_size": 4096},
+    "link_heavy": {"pages": 200, "paragraphs": 20, "links": 40, "depth": 2, "static": 20, "static_size": 4096},
+    "deep_dirs": {"pages": 500, "paragraphs": 4, "links": 1, "depth": 40, "static": 20, "static_size": 4096},
+    "big_static": {"pages": 50, "paragraphs": 4, "links": 1, "depth": 2, "static": 2000, "static_size": 65536},
+}
+
+scales = {"tiny": 0.01, "small": 0.1, "medium": 1, "large": 10}
+
+
+def scaled(profile, scale):
+    # huge_pages grows page length, every other profile grows the page count
+    factor = scales[scale]
+    spec = dict(profiles[profile])
+    key = "paragraphs" if profile == "huge_pages" else "pages"
+    spec[key] = max(1, int(spec[key] * factor))
+    spec["static"] = max(1, int(spec["static"] * factor))
+    return spec
+
+
+def sentence(rng, links=0):
+    parts = [rng.choice(words) for _ in range(rng.randint(8, 16))]
+    parts[0] = parts[0].capitalize()
+    for _ in range(links):
+        idx = rng.randrange(len(parts))
+        parts[idx] = f"[{parts[idx]}](/{rng.choice(words)}/{rng.choice(words)})"
+    if rng.random() < 0.5:
+        idx = rng.randrange(len(parts))
+        parts[idx] = f"**{parts[idx]}**"
+    if rng.random() < 0.3:
+        idx = rng.randrange(len(parts))
+        parts[idx] = f"`{parts[idx]}`"
+    return " ".join(parts) + "."
+
+
+def block(rng, links):
+    kind = rng.random()
+    if kind < 0.55:
+        return sentence(rng, links)
+    if kind < 0.65:
+        return f"## {sentence(rng)}"
+    if kind < 0.75:
+        return "\n".join(f"* {sentence(rng, links and 1)}" for _ in range(rng.randint(2, 6)))
+    if kind < 0.85:
+        return "\n".join(f"{i}. {sentence(rng)}" for i in range(1, rng.randint(3, 8)))
+    if kind < 0.93:
+        return "\n".join(f"> {sentence(rng)}" for _ in range(rng.randint(1, 3)))
+    return "```\n" + "\n".join(sentence(rng) for _ in range(rng.randint(2, 5))) + "\n```"
+
+
+def page(rng, idx, spec):
+    blocks = [f"# Page {idx}: {sentence(rng)}"]
+    blocks += [block(rng, spec["links"]) for _ in range(spec["paragraphs"])]
+    return "\n\n".join(blocks) + "\n"
+
+
+def page_dir(rng, idx, depth):
+    if depth <= 1:
+        return f"section{idx % 10}"
+    levels = rng.randint(1, depth)
+    return os.path.join(*[f"d{(idx >> level) % 4}" for level in range(levels)])
+
+
+def generate_site(root, profile, scale="small", seed=0):
+    # Write a reproducible content/, static/ and template.html below root
+    rng = random.Random(f"{profile}:{scale}:{seed}")
+    spec = scaled(profile, scale)
+    content = os.path.join(root, "content")
+    static = os.path.join(root, "static")
+    os.makedirs(content, exist_ok=True)
+    with open(os.path.join(root, "template.html"), 'w') as file:
+        file.write(template)
+    with open(os.path.join(content, "index.md"), 'w') as file:
+        file.write(page(rng, 0, spec))
+    for idx in range(1, spec["pages"]):
+        dir_path = os.path.join(content, page_dir(rng, idx, spec["depth"]), f"page{idx}")
+        os.makedirs(dir_path, exist_ok=True)
+        with open(os.path.join(dir_path, "index.md"), 'w') as file:
+            file.write(page(rng, idx, spec))
+    os.makedirs(os.path.join(static, "images"), exist_ok=True)
+    with open(os.path.join(static, "index.css"), 'w') as file:
+        file.write("body { font-family: serif; }\n")
+    for idx in range(spec["static"]):
+        with open(os.path.join(static, "images", f"asset{idx}.bin"), 'wb') as file:
+            file.write(rng.randbytes(spec["static_size"]))
+    return spec
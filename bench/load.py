@@ -0,0 +1,124 @@
+import contextlib
+import http.client
+import io
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import bench
+from bench.corpus import generate_site
+from compress import is_sidecar
+import main as site_main
+
+servers = ("http.server", "serve")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(kind, root, port):
+    # Servers run in their own process so they do not share a GIL with the
+    # client threads
+    if kind == "http.server":
+        cmd = [sys.executable, "-m", "http.server", str(port), "--bind", "127.0.0.1", "--directory", "public"]
+    else:
+        cmd = [sys.executable, os.path.join(bench.src_path, "main.py"), "serve", "--no-build", "--port", str(port)]
+    process = subprocess.Popen(cmd, cwd=root, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError(f"{kind} did not start on port {port}")
+
+
+def site_urls(public_path):
+    urls = []
+    for dir_path, _, file_names in os.walk(public_path):
+        for name in file_names:
+            if is_sidecar(name):
+                continue
+            rel_path = os.path.relpath(os.path.join(dir_path, name), public_path).replace(os.sep, "/")
+            urls.append("/" + (rel_path[:-len("index.html")] if rel_path.endswith("index.html") else rel_path))
+    return sorted(urls)
+
+
+def client(port, urls, deadline, seed, latencies, errors):
+    # One connection per thread; http.client reconnects by itself when the
+    # server closes it after a response, as HTTP/1.0 servers do
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            conn.request("GET", rng.choice(urls), headers={"Accept-Encoding": "gzip"})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            conn.close()
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+
+
+def measure(port, urls, duration, concurrency, seed):
+    latencies = []
+    errors = []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=client, args=(port, urls, deadline, seed + i, latencies, errors))
+        for i in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_second": len(latencies) / duration,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else None,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else None,
+    }
+
+
+def load_test(profile="small_pages", scale="tiny", duration=5.0, concurrency=8, seed=0):
+    # Build a synthetic site with gzip sidecars, then hit every server with
+    # the same random mix of its files
+    report = {"profile": profile, "scale": scale, "duration": duration, "concurrency": concurrency, "servers": {}}
+    with tempfile.TemporaryDirectory() as root:
+        generate_site(root, profile, scale, seed)
+        cwd = os.getcwd()
+        os.chdir(root)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                site_main.main(["build", "--compress", "--no-cache"])
+        finally:
+            os.chdir(cwd)
+        urls = site_urls(os.path.join(root, "public"))
+        report["urls"] = len(urls)
+        for kind in servers:
+            port = free_port()
+            process = start_server(kind, root, port)
+            try:
+                report["servers"][kind] = measure(port, urls, duration, concurrency, seed)
+            finally:
+                process.terminate()
+                process.wait()
+    return report
@@ -0,0 +1,208 @@
+import contextlib
+import io
+import os
+import platform
+import random
+import re
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import bench
+from bench.corpus import generate_site, page, profiles, scaled, words
+from escape import escape_text
+from flatast import FlatTree
+from gencontent import generate_page, list_pages
+from inline_markdown import text_to_textnodes
+from markdown_blocks import block_to_block_type, block_type_code, markdown_to_blocks, markdown_to_html_node
+import main as site_main
+from routes import Route
+from search import new_search_state, update_search_state, write_search_index
+
+block_marker_pattern = re.compile(r"^(#{1,6} |[*-] |\d+\. |> ?)")
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return {"min": min(samples), "median": statistics.median(samples), "repeat": repeat}
+
+
+def load_pages(root):
+    pages = []
+    for from_path, template_path, to_path in list_pages(os.path.join(root, "content"), os.path.join(root, "public"), os.path.join(root, "template.html")):
+        with open(from_path, 'r') as file:
+            pages.append((from_path, template_path, to_path, file.read()))
+    return pages
+
+
+def inline_texts(blocks):
+    # The text each block hands to text_to_textnodes, without block markers
+    for b in blocks:
+        if block_to_block_type(b) == block_type_code:
+            continue
+        for line in b.split("\n"):
+            yield block_marker_pattern.sub("", line)
+
+
+def bench_profile(root, repeat, jobs):
+    pages = load_pages(root)
+    markdowns = [md for *_, md in pages]
+    blocks = [b for md in markdowns for b in markdown_to_blocks(md)]
+    texts = list(inline_texts(blocks))
+    nodes = [markdown_to_html_node(md) for md in markdowns]
+    trees = [FlatTree.from_node(node) for node in nodes]
+    results = {
+        "pages": len(pages),
+        "blocks": len(blocks),
+        "bytes_in": sum(len(md) for md in markdowns),
+    }
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    stages = {
+        "markdown_to_blocks": lambda: [markdown_to_blocks(md) for md in markdowns],
+        "block_to_block_type": lambda: [block_to_block_type(b) for b in blocks],
+        "text_to_textnodes": lambda: [text_to_textnodes(t) for t in texts],
+        "escape_text": lambda: [escape_text(t) for t in texts],
+        "markdown_to_html_node": lambda: [markdown_to_html_node(md) for md in markdowns],
+        "to_html": lambda: [node.to_html() for node in nodes],
+        "flat_to_html": lambda: [tree.to_html() for tree in trees],
+        "generate_page": lambda: [generate_page(f, t, d) for f, t, d, _ in pages],
+        "main": lambda: run_main(root, jobs),
+    }
+    with quiet:
+        for name, func in stages.items():
+            try:
+                results[name] = timed(func, repeat)
+            except Exception as e:
+                # Record the failure instead of hiding the whole profile
+                results[name] = {"error": f"{type(e).__name__}: {e}"}
+    del nodes, trees
+    results["node_memory"] = node_memory(markdowns)
+    return results
+
+
+def node_memory(markdowns):
+    # Bytes per node the slotted LeafNode/ParentNode trees and their FlatTree
+    # copies keep alive, traced with tracemalloc (values and text included);
+    # flat_array_bytes_per_node only counts the arrays, see FlatTree.nbytes
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        nodes = [markdown_to_html_node(md) for md in markdowns]
+        node_bytes = tracemalloc.get_traced_memory()[0] - start
+        start = tracemalloc.get_traced_memory()[0]
+        trees = [FlatTree.from_node(node) for node in nodes]
+        flat_bytes = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+    count = sum(len(tree) for tree in trees) or 1
+    return {
+        "nodes": count,
+        "node_bytes_per_node": node_bytes / count,
+        "flat_bytes_per_node": flat_bytes / count,
+        "flat_array_bytes_per_node": sum(tree.nbytes() for tree in trees) / count,
+    }
+
+
+def run_main(root, jobs):
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        # Without the block cache, so later repeats are not served from the
+        # cache warmed by the first one
+        site_main.main(["build", "--jobs", str(jobs), "--no-cache"])
+    finally:
+        os.chdir(cwd)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(bench.src_path),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(selected=None, scale="small", repeat=3, seed=0, jobs=1):
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": scale,
+        "seed": seed,
+        "jobs": jobs,
+        "profiles": {},
+    }
+    for profile in selected or profiles:
+        with tempfile.TemporaryDirectory() as root:
+            report["profiles"][profile] = {"spec": generate_site(root, profile, scale, seed)}
+            report["profiles"][profile].update(bench_profile(root, repeat, jobs))
+    return report
+
+
+def compare(old, new):
+    # Median change per stage present in both reports
+    regressions = []
+    for profile, stages in new["profiles"].items():
+        for stage, result in stages.items():
+            before = old["profiles"].get(profile, {}).get(stage)
+            if not isinstance(result, dict) or "median" not in result:
+                continue
+            if not isinstance(before, dict) or "median" not in before:
+                continue
+            change = result["median"] / before["median"] - 1 if before["median"] else 0
+            regressions.append((profile, stage, before["median"], result["median"], change))
+    return regressions
+
+
+def bench_search(pages=100000, changed=0.01, seed=0):
+    # Index construction from scratch, a rebuild without changes and one
+    # after rewriting a fraction of the pages, on small_pages style content
+    rng = random.Random(f"search:{seed}")
+    spec = scaled("small_pages", "medium")
+    report = {"revision": git_revision(), "python": platform.python_version(), "pages": pages, "changed": changed}
+    with tempfile.TemporaryDirectory() as root:
+        routes = []
+        for idx in range(pages):
+            dir_path = os.path.join(root, "content", f"d{idx % 100}")
+            os.makedirs(dir_path, exist_ok=True)
+            source = os.path.join(dir_path, f"page{idx}.md")
+            with open(source, 'w') as file:
+                file.write(page(rng, idx, spec))
+            routes.append(Route(source, None, None, f"/d{idx % 100}/page{idx}.html"))
+        search_path = os.path.join(root, "public", "search")
+        state = new_search_state()
+
+        def build():
+            start = time.perf_counter()
+            stats = update_search_state(state, routes)
+            tokenized = time.perf_counter()
+            outputs, written = write_search_index(state, search_path, stats["affected"])
+            end = time.perf_counter()
+            return {
+                "seconds": end - start,
+                "tokenize_seconds": tokenized - start,
+                "write_seconds": end - tokenized,
+                "indexed": stats["indexed"],
+                "shards_written": written,
+            }
+
+        report["full"] = build()
+        report["noop"] = build()
+        for route in rng.sample(routes, max(1, int(pages * changed))):
+            with open(route.source, 'a') as file:
+                file.write(f"\nappended {rng.choice(words)} paragraph\n")
+        report["incremental"] = build()
+        report["shards"] = len(os.listdir(search_path)) - 1
+        report["index_bytes"] = sum(os.path.getsize(os.path.join(search_path, name)) for name in os.listdir(search_path))
+    return report
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import posixpath
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from manifest import hash_file, load_json, save_json
+from output import write_if_changed
+from staticsync import copy_file
+
+# Static files that get a content hashed copy; pages, feeds, robots.txt and
+# favicon.ico keep only their well-known names
+fingerprint_extensions = {
+    ".css", ".js", ".mjs", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".avif", ".woff", ".woff2",
+}
+fingerprint_length = 8
+asset_manifest_name = "asset-manifest.json"
+reference_pattern = re.compile(r"""\b(href|src)=(["'])(/(?!/)[^"'?#]*)""")
+
+
+def fingerprinted_path(rel_path, digest):
+    # "css/index.css" -> "css/index.3f9a1c8b.css"
+    stem, ext = posixpath.splitext(rel_path)
+    return f"{stem}.{digest[:fingerprint_length]}{ext}"
+
+
+def hash_assets(paths, previous=None, workers=None):
+    # path -> {"size", "mtime", "hash"}; files whose size and mtime match the
+    # previous entry are not read again, the rest are hashed in parallel
+    previous = previous or {}
+    entries = {}
+    todo = []
+    for path in paths:
+        st = os.stat(path)
+        old = previous.get(path)
+        if old is not None and old["size"] == st.st_size and old["mtime"] == st.st_mtime_ns:
+            entries[path] = old
+        else:
+            entries[path] = {"size": st.st_size, "mtime": st.st_mtime_ns}
+            todo.append(path)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for path, digest in zip(todo, executor.map(hash_file, todo)):
+            entries[path]["hash"] = digest
+    return entries, len(todo)
+
+
+def fingerprint_static(static_entries, public_path, previous=None, hardlink=False, workers=None):
+    # static_entries come from sync_static. Every fingerprintable file gets a
+    # copy named after its content next to the original, which stays in place
+    # for references that are not rewritten (e.g. url() inside CSS).
+    sources = [
+        src for src, entry in static_entries.items()
+        if os.path.splitext(entry["dest"])[1].lower() in fingerprint_extensions
+    ]
+    hashes, hashed = hash_assets(sources, previous, workers)
+    urls = {}
+    outputs = []
+    copied = 0
+    for src in sources:
+        rel_path = os.path.relpath(static_entries[src]["dest"], public_path).replace(os.sep, "/")
+        target = fingerprinted_path(rel_path, hashes[src]["hash"])
+        dest = os.path.normpath(os.path.join(public_path, target))
+        # The name changes with the content, so an existing file of the same
+        # size already holds these bytes
+        if not os.path.isfile(dest) or os.path.getsize(dest) != hashes[src]["size"]:
+            copy_file(src, dest, hardlink)
+            copied += 1
+        urls["/" + rel_path] = "/" + target
+        outputs.append(dest)
+    stats = {"hashed": hashed, "copied": copied, "unchanged": len(sources) - copied}
+    return AssetManifest(urls), hashes, outputs, stats
+
+
+class AssetManifest:
+    # Site URL of a static file -> URL of its fingerprinted copy
+    def __init__(self, urls):
+        self.urls = urls
+        self.digest = hashlib.sha256(json.dumps(urls, sort_keys=True).encode()).hexdigest()
+        self._templates = {}
+
+    def url(self, url):
+        # Query strings and fragments are kept, relative and external URLs
+        # are returned as is
+        if not url.startswith("/") or url.startswith("//"):
+            return url
+        parts = urlsplit(url)
+        target = self.urls.get(parts.path)
+        if target is None:
+            return url
+        return target + url[len(parts.path):]
+
+    def rewrite_html(self, html):
+        # Root-relative href and src attributes in literal HTML
+        return reference_pattern.sub(
+            lambda m: f"{m.group(1)}={m.group(2)}{self.urls.get(m.group(3), m.group(3))}", html
+        )
+
+    def template(self, template):
+        # Templates are rewritten once per compiled template, not per page
+        cached = self._templates.get(id(template))
+        if cached is not None and cached[0] is template:
+            return cached[1]
+        rewritten = template.rewrite(self.rewrite_html)
+        self._templates[id(template)] = (template, rewritten)
+        return rewritten
+
+    def write(self, path):
+        return write_if_changed(path, [json.dumps(self.urls, indent=1, sort_keys=True) + "\n"])
+
+    def changed_urls(self, previous_urls):
+        return {url for url in self.urls.keys() | previous_urls.keys() if self.urls.get(url) != previous_urls.get(url)}
+
+
+active_assets = None
+
+
+def enable_assets(assets):
+    global active_assets
+    active_assets = assets
+    return assets
+
+
+def disable_assets():
+    global active_assets
+    active_assets = None
+
+
+def get_assets():
+    return active_assets
+
+
+def asset_url(url):
+    if active_assets is None:
+        return url
+    return active_assets.url(url)
+
+
+def load_asset_hashes(path):
+    return load_json(path) or {}
+
+
+def save_asset_hashes(hashes, path):
+    save_json(hashes, path, indent=1, sort_keys=True)
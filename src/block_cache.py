@@ -0,0 +1,133 @@
+import hashlib
+import os
+import sqlite3
+import time
+
+default_cache_path = "./.build/blocks.sqlite"
+default_max_bytes = 256 * 1024 * 1024
+
+
+class BlockCache:
+    # Rendered HTML fragments keyed by a hash of the block source. Backed by
+    # SQLite in WAL mode so worker processes can share one cache file; every
+    # process opens its own connection on first use.
+    def __init__(self, path=default_cache_path, max_bytes=default_max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn = None
+        self._pid = None
+        self._pending = {}
+        self._used = set()
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self):
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+        # A connection inherited through fork must not be reused
+        dir_path = os.path.dirname(self.path)
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        # The async pipeline renders on a worker thread; the connection is
+        # never used from two threads at once
+        self._conn = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._pid = os.getpid()
+        self._pending = {}
+        self._used = set()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS blocks "
+            "(key TEXT PRIMARY KEY, html TEXT NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)"
+        )
+        return self._conn
+
+    def key(self, version, text):
+        return hashlib.sha256(f"{version}\0{text}".encode()).hexdigest()
+
+    def get(self, key):
+        html = self._pending.get(key)
+        if html is None:
+            row = self._connect().execute("SELECT html FROM blocks WHERE key = ?", (key,)).fetchone()
+            html = row[0] if row else None
+        if html is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._used.add(key)
+        return html
+
+    def put(self, key, html):
+        self._connect()
+        self._pending[key] = html
+
+    def flush(self):
+        # Write new fragments and LRU timestamps in one transaction
+        if self._conn is None or self._pid != os.getpid() or not (self._pending or self._used):
+            return
+        now = time.time()
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO blocks (key, html, size, used) VALUES (?, ?, ?, ?)",
+                [(key, html, len(html), now) for key, html in self._pending.items()],
+            )
+            conn.executemany("UPDATE blocks SET used = ? WHERE key = ?", [(now, key) for key in self._used])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._pending = {}
+        self._used = set()
+
+    def evict(self):
+        # Drop least recently used fragments until the cache fits in max_bytes
+        self.flush()
+        conn = self._connect()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM blocks").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        removed = 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute("SELECT key, size FROM blocks ORDER BY used")
+            stale = []
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                stale.append((key,))
+                total -= size
+            conn.executemany("DELETE FROM blocks WHERE key = ?", stale)
+            removed = len(stale)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return removed
+
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self.flush()
+            self._conn.close()
+        self._conn = None
+
+
+active_cache = None
+
+
+def enable_block_cache(path=default_cache_path, max_bytes=default_max_bytes):
+    global active_cache
+    active_cache = BlockCache(path, max_bytes)
+    return active_cache
+
+
+def disable_block_cache():
+    global active_cache
+    if active_cache is not None:
+        active_cache.close()
+    active_cache = None
+
+
+def get_block_cache():
+    return active_cache
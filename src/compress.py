@@ -0,0 +1,126 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from output import write_atomic
+
+try:
+    # Optional: zstd sidecars are only written when zstandard is installed
+    import zstandard
+except ImportError:
+    zstandard = None
+
+compressible_extensions = {".html", ".css", ".js", ".svg"}
+sidecar_extensions = {"gzip": ".gz", "zstd": ".zst"}
+default_min_size = 1024
+
+
+def available_encodings():
+    encodings = ["gzip"]
+    if zstandard is not None:
+        encodings.append("zstd")
+    return encodings
+
+
+def compress_bytes(data, encoding):
+    if encoding == "gzip":
+        # mtime=0 keeps the output reproducible
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=19).compress(data)
+    raise ValueError(f"Unknown encoding: {encoding}")
+
+
+def with_sidecars(paths, encodings=None):
+    # Output paths plus every sidecar they may have
+    encodings = encodings or available_encodings()
+    paths = list(paths)
+    return paths + [path + sidecar_extensions[encoding] for path in paths for encoding in encodings]
+
+
+def is_sidecar(path):
+    # Only e.g. page.html.gz, so archives like data.tar.gz are left alone
+    base, ext = os.path.splitext(path)
+    return ext in sidecar_extensions.values() and os.path.splitext(base)[1] in compressible_extensions
+
+
+def sidecar_is_current(sidecar_path, src_stat):
+    # Sidecars carry the mtime of the file they were compressed from
+    try:
+        return os.stat(sidecar_path).st_mtime_ns == src_stat.st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def compress_outputs(public_path, min_size=default_min_size, workers=None, encodings=None):
+    # Write .gz/.zst next to text outputs of at least min_size bytes; sidecars
+    # that are still current are skipped and orphaned ones removed
+    encodings = encodings or available_encodings()
+    tasks = []
+    unchanged = 0
+    removed = 0
+    for dir_path, _, file_names in os.walk(public_path):
+        names = set(file_names)
+        for name in sorted(file_names):
+            path = os.path.join(dir_path, name)
+            if is_sidecar(name):
+                src_path, _ = os.path.splitext(path)
+                if not _wants_sidecar(src_path, min_size) or os.path.splitext(name)[0] not in names:
+                    os.remove(path)
+                    removed += 1
+                continue
+            if not _wants_sidecar(path, min_size):
+                continue
+            st = os.stat(path)
+            for encoding in encodings:
+                sidecar_path = path + sidecar_extensions[encoding]
+                if sidecar_is_current(sidecar_path, st):
+                    unchanged += 1
+                else:
+                    tasks.append((path, sidecar_path, encoding))
+    # zlib and zstandard release the GIL, so threads compress in parallel
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda task: compress_file(*task), tasks))
+    return {"compressed": len(tasks), "unchanged": unchanged, "removed": removed}
+
+
+def compress_files(paths, min_size=default_min_size, workers=None, encodings=None):
+    # compress_outputs for just paths, e.g. the outputs of one watch rebuild;
+    # sidecars of paths that are gone or too small now are removed
+    encodings = encodings or available_encodings()
+    tasks = []
+    unchanged = 0
+    removed = 0
+    for path in paths:
+        wanted = _wants_sidecar(path, min_size)
+        st = os.stat(path) if wanted else None
+        for encoding in encodings:
+            sidecar_path = path + sidecar_extensions[encoding]
+            if not wanted:
+                if os.path.isfile(sidecar_path):
+                    os.remove(sidecar_path)
+                    removed += 1
+            elif sidecar_is_current(sidecar_path, st):
+                unchanged += 1
+            else:
+                tasks.append((path, sidecar_path, encoding))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda task: compress_file(*task), tasks))
+    return {"compressed": len(tasks), "unchanged": unchanged, "removed": removed}
+
+
+def _wants_sidecar(path, min_size):
+    if os.path.splitext(path)[1] not in compressible_extensions:
+        return False
+    try:
+        return os.path.getsize(path) >= min_size
+    except FileNotFoundError:
+        return False
+
+
+def compress_file(src_path, sidecar_path, encoding):
+    with open(src_path, 'rb') as file:
+        data = file.read()
+        st = os.fstat(file.fileno())
+    write_atomic(sidecar_path, [compress_bytes(data, encoding)])
+    os.utime(sidecar_path, ns=(st.st_atime_ns, st.st_mtime_ns))
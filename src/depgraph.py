@@ -0,0 +1,72 @@
+import os
+from urllib.parse import urlsplit
+
+
+def resolve_references(urls, dest_path, public_path):
+    # Outputs the URLs a page renders (see generate_pages) point at, as
+    # normalized paths below public_path; external URLs and same-page anchors
+    # are skipped
+    refs = set()
+    for url in urls:
+        target = resolve_reference(url, dest_path, public_path)
+        if target is not None:
+            refs.add(target)
+    return sorted(refs)
+
+
+def resolve_reference(url, dest_path, public_path):
+    parts = urlsplit(url.strip())
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    if parts.path.startswith("/"):
+        target = os.path.join(public_path, parts.path.lstrip("/"))
+    else:
+        target = os.path.join(os.path.dirname(dest_path), parts.path)
+    if parts.path.endswith("/") or not os.path.splitext(parts.path)[1]:
+        # Directory URLs are served from their index page
+        target = os.path.join(target, "index.html")
+    return os.path.normpath(target)
+
+
+def changed_outputs(previous_entries, entries):
+    # Normalized dest paths that appeared, disappeared or changed between two
+    # sets of manifest entries (static files or pages)
+    previous = {os.path.normpath(e["dest"]): e for e in previous_entries.values()}
+    current = {os.path.normpath(e["dest"]): e for e in entries.values()}
+    changed = previous.keys() ^ current.keys()
+    for dest in previous.keys() & current.keys():
+        old, new = previous[dest], current[dest]
+        if (old.get("hash"), old.get("size"), old.get("mtime")) != (new.get("hash"), new.get("size"), new.get("mtime")):
+            changed.add(dest)
+    return changed
+
+
+def dependents(manifest, path):
+    # Pages that would rebuild if path (a page, template, partial or static
+    # file, or an output below public) were edited; editing a page does not
+    # affect the pages linking to it. Templates list the fingerprinted
+    # assets they link to under "assets".
+    return affected_pages(manifest, [path])
+
+
+def affected_pages(manifest, paths):
+    # dependents of several paths in one pass over the pages
+    paths = {os.path.normpath(path) for path in paths}
+    outputs = set(paths)
+    for src, entry in manifest["static"].items():
+        if os.path.normpath(src) in paths:
+            outputs.add(os.path.normpath(entry["dest"]))
+    templates = {
+        template_path for template_path, entry in manifest["templates"].items()
+        if any(os.path.normpath(f) in paths for f in entry.get("files", ()))
+        or outputs.intersection(entry.get("assets", ()))
+    }
+    affected = set()
+    for src, entry in manifest["pages"].items():
+        if (
+            os.path.normpath(src) in paths
+            or entry.get("template") in templates
+            or outputs.intersection(entry.get("refs", ()))
+        ):
+            affected.add(src)
+    return sorted(affected)
@@ -0,0 +1,152 @@
+import os
+import stat
+import threading
+import time
+import traceback
+
+from fileserver import StaticRequestHandler, make_server as make_file_server
+
+livereload_path = "/__livereload"
+racy_window_ns = 2 * 10**9
+livereload_script = (
+    "<script>new EventSource(\"" + livereload_path + "\")"
+    ".onmessage = function () { location.reload(); };</script>"
+)
+
+
+def snapshot(paths, listings=None):
+    # Map every file below paths to (mtime, size); paths may be files or
+    # directories. With listings (directory -> (mtime, entries), kept between
+    # calls), a directory is only listed again once its mtime changes, so a
+    # poll costs one stat per file and directory.
+    state = {}
+    seen = {}
+    recent = time.time_ns() - racy_window_ns
+    stack = [(path, None) for path in paths]
+    while stack:
+        path, is_dir = stack.pop()
+        try:
+            st = os.stat(path)
+            if is_dir is None:
+                is_dir = stat.S_ISDIR(st.st_mode)
+            if not is_dir:
+                state[path] = (st.st_mtime_ns, st.st_size)
+                continue
+            cached = listings.get(path) if listings is not None else None
+            # A listing taken in the same clock tick as a change may miss it
+            if cached is not None and cached[0] == st.st_mtime_ns and st.st_mtime_ns < recent:
+                entries = cached[1]
+            else:
+                with os.scandir(path) as dir_entries:
+                    entries = tuple((entry.path, entry.is_dir(follow_symlinks=False)) for entry in dir_entries)
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        seen[path] = (st.st_mtime_ns, entries)
+        stack.extend(entries)
+    if listings is not None:
+        listings.clear()
+        listings.update(seen)
+    return state
+
+
+def changed_paths(before, after):
+    changed = {p for p in before.keys() - after.keys()}
+    changed |= {p for p, st in after.items() if before.get(p) != st}
+    return sorted(changed)
+
+
+def watch(get_paths, on_change, interval=0.1, stop_event=None):
+    # Poll for changes so watching works without extra dependencies. A poll
+    # stats every file and directory, about 0.2 s for 20k pages in their own
+    # directories; with the interval and a one page rebuild, an edit there is
+    # served 0.3 to 0.7 s after it is saved.
+    listings = {}
+    state = snapshot(get_paths(), listings)
+    while stop_event is None or not stop_event.is_set():
+        time.sleep(interval)
+        current = snapshot(get_paths(), listings)
+        changed = changed_paths(state, current)
+        if not changed:
+            continue
+        try:
+            on_change(changed)
+        except Exception:
+            traceback.print_exc()
+        # Pick up anything written while rebuilding, e.g. new partials
+        state = snapshot(get_paths(), listings)
+
+
+class ReloadBroker:
+    def __init__(self):
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, version, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+class DevRequestHandler(StaticRequestHandler):
+    broker = None
+
+    def do_GET(self):
+        if self.broker is not None and self.path == livereload_path:
+            self.send_events()
+            return
+        if self.broker is not None:
+            path = self.translate_path(self.path)
+            if os.path.isdir(path):
+                path = os.path.join(path, "index.html")
+            if path.endswith(".html") and os.path.isfile(path):
+                self.send_html(path)
+                return
+        super().do_GET()
+
+    def send_html(self, path):
+        # Inject the reload script on the fly so ./public stays untouched
+        with open(path, 'rb') as file:
+            body = file.read()
+        idx = body.rfind(b"</body>")
+        script = livereload_script.encode()
+        body = body[:idx] + script + body[idx:] if idx != -1 else body + script
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        # The stream has no length, it ends when the connection does
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        version = self.broker.version
+        try:
+            while True:
+                new_version = self.broker.wait(version, 15)
+                if new_version == version:
+                    self.wfile.write(b": keepalive\n\n")
+                else:
+                    version = new_version
+                    self.wfile.write(b"data: reload\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        if self.path != livereload_path:
+            super().log_message(format, *args)
+
+
+def make_server(directory, port, broker=None, host="", cache=None):
+    return make_file_server(directory, port, host, DevRequestHandler, cache, broker=broker)
@@ -0,0 +1,37 @@
+import re
+
+# A "&" that already starts a character reference (&amp;, &#38;, &#x26;) is
+# kept, so entities written in markdown and pre-escaped URLs survive
+text_pattern = re.compile(r"&(?!#?\w+;)|[<>]")
+attribute_pattern = re.compile(r"&(?!#?\w+;)|[<>\"]")
+replacements = {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"}
+
+
+class Markup(str):
+    # Trusted HTML that is rendered as is, e.g. an already escaped fragment
+    __slots__ = ()
+
+
+def _replace(match):
+    return replacements[match.group()]
+
+
+def escape_text(value):
+    # Most text has nothing to escape; three substring checks are much
+    # cheaper than any regex or translate pass
+    if "&" not in value and "<" not in value and ">" not in value:
+        return value
+    if type(value) is Markup:
+        return value
+    return text_pattern.sub(_replace, value)
+
+
+def escape_attribute(value):
+    # Attribute values are always double quoted
+    if not isinstance(value, str):
+        value = str(value)
+    if "&" not in value and "<" not in value and ">" not in value and '"' not in value:
+        return value
+    if type(value) is Markup:
+        return value
+    return attribute_pattern.sub(_replace, value)
@@ -0,0 +1,281 @@
+import email.utils
+import functools
+import hashlib
+import io
+import json
+import os
+import stat
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from assets import asset_manifest_name
+from compress import compressible_extensions, sidecar_extensions, sidecar_is_current
+from manifest import hash_file
+
+default_cache_bytes = 64 * 1024 * 1024
+default_max_file_bytes = 1024 * 1024
+immutable_cache_control = "public, max-age=31536000, immutable"
+revalidate_cache_control = "no-cache"
+
+
+def make_etag(digest):
+    return f'"{digest[:20]}"'
+
+
+class FileCache:
+    # Bodies of small, recently served files in LRU order, plus the ETag (a
+    # content hash) of every file served. Entries carry the size and mtime
+    # they were read at and are dropped as soon as the file on disk differs,
+    # so a rebuild is picked up by the next request.
+    def __init__(self, max_bytes=default_cache_bytes, max_file_bytes=default_max_file_bytes):
+        self.max_bytes = max_bytes
+        self.max_file_bytes = min(max_file_bytes, max_bytes)
+        self.bodies = OrderedDict()
+        self.etags = {}
+        self.parsed = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def lookup(self, path, st):
+        # (etag, body); body is None for files too large to keep in memory
+        key = (st.st_size, st.st_mtime_ns)
+        with self.lock:
+            cached = self.bodies.get(path)
+            if cached is not None and cached[0] == key:
+                self.bodies.move_to_end(path)
+                self.hits += 1
+                return cached[1], cached[2]
+            self.misses += 1
+            known = self.etags.get(path)
+        if st.st_size > self.max_file_bytes:
+            if known is not None and known[0] == key:
+                return known[1], None
+            etag = make_etag(hash_file(path))
+            with self.lock:
+                self.etags[path] = (key, etag)
+            return etag, None
+        with open(path, 'rb') as file:
+            body = file.read()
+        etag = make_etag(hashlib.sha256(body).hexdigest())
+        if len(body) == st.st_size:
+            # Otherwise the file changed while it was read; serve it uncached
+            self._store(path, key, etag, body)
+        return etag, body
+
+    def _store(self, path, key, etag, body):
+        with self.lock:
+            old = self.bodies.pop(path, None)
+            if old is not None:
+                self.size -= len(old[2])
+            self.bodies[path] = (key, etag, body)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, (_, _, evicted) = self.bodies.popitem(last=False)
+                self.size -= len(evicted)
+
+    def load_json(self, path, convert=None):
+        # Parsed (and converted) JSON file, re-read only when it changes;
+        # None if missing or invalid
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        etag, body = self.lookup(path, st)
+        cached = self.parsed.get(path)
+        if cached is not None and cached[0] == etag:
+            return cached[1]
+        if body is None:
+            with open(path, 'rb') as file:
+                body = file.read()
+        try:
+            data = json.loads(body)
+            if convert is not None:
+                data = convert(data)
+        except (ValueError, TypeError, AttributeError):
+            data = None
+        self.parsed[path] = (etag, data)
+        return data
+
+
+def accepted_encodings(header):
+    # Codings from an Accept-Encoding header, minus those with q=0
+    accepted = set()
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if coding == "*":
+            accepted.update(sidecar_extensions)
+        elif coding:
+            accepted.add(coding)
+    return accepted
+
+
+def parse_range(header, size):
+    # (start, end) of a single bytes range; None means the header is ignored
+    # (other units, several ranges, bad syntax) and False that it cannot be
+    # satisfied
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep or not (first or last) or (first and not first.isdigit()) or (last and not last.isdigit()):
+        return None
+    if not first:
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            return False
+        return max(0, size - suffix), size
+    start = int(first)
+    end = int(last) + 1 if last else size
+    if last and end <= start:
+        return None
+    if start >= size:
+        return False
+    return start, min(end, size)
+
+
+class LimitedReader:
+    # The first length bytes of an open file, for partial responses
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+class StaticRequestHandler(SimpleHTTPRequestHandler):
+    # Keep-alive, ETag/Last-Modified revalidation, single byte ranges and
+    # precompressed sidecars; small files are served from file_cache
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle a kept-alive
+    # connection would stall on the client's delayed ACK
+    disable_nagle_algorithm = True
+    file_cache = None
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        url_path = urlsplit(self.path).path
+        if os.path.isdir(path):
+            if not url_path.endswith("/"):
+                # Redirects to the directory URL
+                return super().send_head()
+            path = os.path.join(path, "index.html")
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        if st is None or not stat.S_ISREG(st.st_mode) or path.endswith("/"):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+        etag, body = self.file_cache.lookup(path, st)
+        headers = {
+            "Content-Type": self.guess_type(path),
+            "Last-Modified": self.date_time_string(st.st_mtime),
+            "Cache-Control": self.cache_control(url_path),
+        }
+        if os.path.splitext(path)[1] in compressible_extensions:
+            headers["Vary"] = "Accept-Encoding"
+        # Ranges always refer to the uncompressed bytes
+        sidecar = None if "Range" in self.headers else self.find_sidecar(path, st)
+        modified = st
+        if sidecar is not None:
+            path, encoding = sidecar
+            st = os.stat(path)
+            _, body = self.file_cache.lookup(path, st)
+            headers["Content-Encoding"] = encoding
+            etag = f'{etag[:-1]}-{encoding}"'
+        headers["ETag"] = etag
+        if self.not_modified(etag, modified):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            for name in ("ETag", "Last-Modified", "Cache-Control", "Vary"):
+                if name in headers:
+                    self.send_header(name, headers[name])
+            self.end_headers()
+            return None
+        status = HTTPStatus.OK
+        start, end = 0, st.st_size
+        if sidecar is None and "Range" in self.headers and self.headers.get("If-Range", etag) in (etag, headers["Last-Modified"]):
+            byte_range = parse_range(self.headers["Range"], st.st_size)
+            if byte_range is False:
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{st.st_size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return None
+            if byte_range is not None:
+                status = HTTPStatus.PARTIAL_CONTENT
+                start, end = byte_range
+                headers["Content-Range"] = f"bytes {start}-{end - 1}/{st.st_size}"
+        headers["Accept-Ranges"] = "bytes"
+        headers["Content-Length"] = str(end - start)
+        if body is not None:
+            source = io.BytesIO(body if (start, end) == (0, len(body)) else body[start:end])
+        else:
+            file = open(path, 'rb')
+            file.seek(start)
+            source = LimitedReader(file, end - start)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        return source
+
+    def find_sidecar(self, path, st):
+        # A precompressed .zst/.gz next to path, if the client accepts it and
+        # the sidecar is as new as the file
+        accepted = accepted_encodings(self.headers.get("Accept-Encoding", ""))
+        for encoding in ("zstd", "gzip"):
+            sidecar_path = path + sidecar_extensions[encoding]
+            if encoding in accepted and sidecar_is_current(sidecar_path, st):
+                return sidecar_path, encoding
+        return None
+
+    def not_modified(self, etag, st):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in tags or etag in tags
+        since = self.headers.get("If-Modified-Since")
+        if since is None:
+            return False
+        try:
+            return int(st.st_mtime) <= email.utils.parsedate_to_datetime(since).timestamp()
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return False
+
+    def cache_control(self, url_path):
+        # Fingerprinted assets never change under their name, everything
+        # else is revalidated with its ETag
+        path = os.path.join(self.directory, asset_manifest_name)
+        fingerprinted = self.file_cache.load_json(path, lambda urls: set(urls.values()))
+        if fingerprinted is not None and url_path in fingerprinted:
+            return immutable_cache_control
+        return revalidate_cache_control
+
+
+def make_server(directory, port, host="", handler=StaticRequestHandler, cache=None, **attrs):
+    attrs["file_cache"] = cache if cache is not None else FileCache()
+    handler = type("Handler", (handler,), attrs)
+    server = ThreadingHTTPServer((host, port), functools.partial(handler, directory=directory))
+    server.daemon_threads = True
+    return server
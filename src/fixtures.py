@@ -0,0 +1,22 @@
+import os
+
+
+def write(path, text=""):
+    # Test helper: create path, and any missing parent directories, holding
+    # text; bytes are written as they are
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb' if isinstance(text, bytes) else 'w') as file:
+        file.write(text)
+    return path
+
+
+def read_tree(root):
+    # Test helper: relative path -> content of every file below root, read
+    # without newline translation so outputs compare byte for byte
+    tree = {}
+    for dir_path, _, files in os.walk(root):
+        for f in files:
+            path = os.path.join(dir_path, f)
+            with open(path, 'r', newline="") as file:
+                tree[os.path.relpath(path, root)] = file.read()
+    return tree
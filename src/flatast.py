@@ -0,0 +1,150 @@
+from array import array
+
+from escape import Markup, escape_text
+from htmlnode import ParentNode, props_to_html
+
+
+class FlatTree:
+    # Nodes are stored breadth-first in parallel arrays so the children of a
+    # node always occupy one contiguous index range. Leaf values live in a
+    # single text buffer and are addressed by offsets.
+    def __init__(self):
+        self.tag_names = [None]
+        self.tag_ids = {None: 0}
+        self.tags = array('H')
+        self.value_start = array('q')
+        self.value_end = array('q')
+        self.first_child = array('q')
+        self.child_count = array('q')
+        self.props = {}
+        # Leaves whose value was Markup, i.e. already escaped
+        self.trusted = set()
+        self.text = ""
+
+    @classmethod
+    def from_node(cls, root):
+        tree = cls()
+        nodes = [root]
+        texts = []
+        offset = 0
+        idx = 0
+        while idx < len(nodes):
+            node = nodes[idx]
+            tree.tags.append(tree._tag_id(node.tag))
+            if node.props:
+                tree.props[idx] = dict(node.props)
+            if isinstance(node, ParentNode):
+                if node.tag is None:
+                    raise ValueError("HTML has no tag")
+                if not node.children:
+                    raise ValueError("Parent has no children")
+                tree.value_start.append(-1)
+                tree.value_end.append(-1)
+                tree.first_child.append(len(nodes))
+                tree.child_count.append(len(node.children))
+                nodes.extend(node.children)
+            else:
+                if node.value is None:
+                    raise ValueError("Invalid HTML: no value")
+                texts.append(node.value)
+                if isinstance(node.value, Markup):
+                    tree.trusted.add(idx)
+                tree.value_start.append(offset)
+                offset += len(node.value)
+                tree.value_end.append(offset)
+                tree.first_child.append(0)
+                tree.child_count.append(0)
+            # Drop the object as soon as it has been copied into the arrays
+            nodes[idx] = None
+            idx += 1
+        tree.text = "".join(texts)
+        return tree
+
+    def _tag_id(self, tag):
+        tag_id = self.tag_ids.get(tag)
+        if tag_id is None:
+            tag_id = len(self.tag_names)
+            self.tag_ids[tag] = tag_id
+            self.tag_names.append(tag)
+        return tag_id
+
+    def __len__(self):
+        return len(self.tags)
+
+    def node(self, idx=0):
+        return FlatNode(self, idx)
+
+    def to_html(self, idx=0):
+        return "".join(self.iter_html(idx))
+
+    def iter_html(self, idx=0):
+        tag_names = self.tag_names
+        stack = [(idx, False)]
+        while stack:
+            i, closing = stack.pop()
+            tag = tag_names[self.tags[i]]
+            if closing:
+                yield f"</{tag}>"
+                continue
+            start = self.value_start[i]
+            if start >= 0:
+                value = self.text[start:self.value_end[i]]
+                if i not in self.trusted:
+                    value = escape_text(value)
+                if tag is None:
+                    yield value
+                else:
+                    yield f"<{tag}{props_to_html(self.props.get(i))}>{value}</{tag}>"
+                continue
+            yield f"<{tag}{props_to_html(self.props.get(i))}>"
+            stack.append((i, True))
+            first = self.first_child[i]
+            stack.extend((c, False) for c in range(first + self.child_count[i] - 1, first - 1, -1))
+
+    def nbytes(self):
+        arrays = (self.tags, self.value_start, self.value_end, self.first_child, self.child_count)
+        return sum(a.itemsize * len(a) for a in arrays)
+
+
+class FlatNode:
+    # Read-only view with the same attributes as LeafNode/ParentNode
+    __slots__ = ("tree", "index")
+
+    def __init__(self, tree, index):
+        self.tree = tree
+        self.index = index
+
+    @property
+    def tag(self):
+        return self.tree.tag_names[self.tree.tags[self.index]]
+
+    @property
+    def value(self):
+        start = self.tree.value_start[self.index]
+        if start < 0:
+            return None
+        value = self.tree.text[start:self.tree.value_end[self.index]]
+        return Markup(value) if self.index in self.tree.trusted else value
+
+    @property
+    def children(self):
+        if self.tree.value_start[self.index] >= 0:
+            return None
+        first = self.tree.first_child[self.index]
+        return [FlatNode(self.tree, c) for c in range(first, first + self.tree.child_count[self.index])]
+
+    @property
+    def props(self):
+        return self.tree.props.get(self.index)
+
+    def props_to_html(self):
+        return props_to_html(self.props)
+
+    def to_html(self):
+        return self.tree.to_html(self.index)
+
+    def iter_html(self):
+        return self.tree.iter_html(self.index)
+
+    def __repr__(self):
+        return f"FlatNode({self.tag}, {self.value}, {self.props})"
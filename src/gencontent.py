@@ -1,38 +1,316 @@
+import functools
 import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
 
-from markdown_blocks import markdown_to_html_node
+from assets import AssetManifest, enable_assets, get_assets
+from block_cache import enable_block_cache, get_block_cache
+from depgraph import resolve_references
+from escape import escape_text
+from htmlnode import ParentNode
+from markdown_blocks import (
+    block_to_node,
+    blocks_to_html,
+    classify_lines,
+    iter_file_blocks,
+    iter_markdown_blocks,
+)
+from manifest import file_entry, files_entry, is_stale
+from output import count_writes, write_if_changed
+from pipeline import generate_pages_async
+from profiling import BuildProfile, profile_phase
+from routes import Route, RouteIndex, route_for
+from template import directory_template, get_template
+from walker import walk_tree
+
+# Files below the content directory that are rendered as pages
+page_patterns = ("*.md",)
 
 
 def extract_title(markdown):
-    lines = markdown.split("\n")
-    for line in lines:
-        if line[:2] == "# ":
-            return line[2:]
+    title = find_title(markdown)
+    if title is None:
+        raise Exception("No h1 header found")
+    return title
+
+def find_title(text):
+    # First line starting with "# ", found without splitting the text into lines
+    if text[:2] == "# ":
+        start = 2
+    else:
+        idx = text.find("\n# ")
+        if idx == -1:
+            return None
+        start = idx + 3
+    end = text.find("\n", start)
+    return text[start:] if end == -1 else text[start:end]
+
+def extract_file_title(path):
+    # Reads only up to the title line, which is usually the first one
+    with open(path, 'r') as file:
+        for line in file:
+            if line[:2] == "# ":
+                return line[2:].rstrip("\n")
     raise Exception("No h1 header found")
 
-def generate_page(from_path, template_path, dest_path):
+def page_template(template_path):
+    # With fingerprinted assets, links in the template point at them
+    template = get_template(template_path)
+    assets = get_assets()
+    return template if assets is None else assets.template(template)
+
+def generate_page(from_path, template_path, dest_path, profile=None, links=None):
     print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    with open(from_path, 'r') as file:
-        md_file = file.read()
-    with open(template_path, 'r') as file:
-        template_file = file.read()
-        
-    content = markdown_to_html_node(md_file).to_html()
-    title = extract_title(md_file)
-    template_file = template_file.replace("{{ Title }}", title).replace("{{ Content }}", content)
-    
-    dest_dir_path = os.path.dirname(dest_path)
-    if dest_dir_path != "":
-        os.makedirs(dest_dir_path, exist_ok=True)
-    with open(dest_path, 'w+') as output_file_handler:
-        output_file_handler.write(template_file)
-        
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
-    for path in os.listdir(dir_path_content):
-        from_path = os.path.join(dir_path_content, path)
-        to_path = os.path.join(dest_dir_path, path)
-        if os.path.isfile(from_path):
-            to_path = to_path.replace(".md", ".html")
-            generate_page(from_path, template_path, to_path)
+    return render_page(from_path, template_path, dest_path, profile, links)
+
+def render_page(from_path, template_path, dest_path, profile=None, links=None):
+    # Returns False when dest_path already held the same page; links, if
+    # given, is extended with the URLs the page's links and images point at
+    if profile is not None:
+        return render_page_profiled(from_path, template_path, dest_path, profile, links)
+    template = page_template(template_path)
+    title = escape_text(extract_file_title(from_path))
+    blocks = iter_file_blocks(from_path)
+    cache = get_block_cache()
+    content = blocks_to_html(blocks, cache, links)
+    # Stream the page into the file instead of holding it in memory
+    written = write_if_changed(dest_path, template.stream({"Title": title, "Content": content}))
+    if cache is not None:
+        cache.flush()
+    return written
+
+def render_markdown(markdown, template_path, links=None):
+    # In-memory counterpart of render_page used by the async pipeline
+    template = page_template(template_path)
+    title = escape_text(extract_title(markdown))
+    cache = get_block_cache()
+    html = template.render({"Title": title, "Content": blocks_to_html(iter_markdown_blocks(markdown), cache, links)})
+    if cache is not None:
+        cache.flush()
+    return html
+
+def render_markdown_links(markdown, template_path):
+    # (html, urls); the pipeline's renderer when links are collected
+    links = []
+    return render_markdown(markdown, template_path, links), links
+
+def render_page_profiled(from_path, template_path, dest_path, profile, links=None):
+    # Same steps as render_page, timed one phase at a time. The block cache
+    # is left out on purpose: every block is parsed and rendered, so the
+    # phases show what rendering costs rather than what the cache saved.
+    start = time.perf_counter()
+    with profile.phase("read"):
+        with open(from_path, 'r') as file:
+            md_file = file.read()
+    template = page_template(template_path)
+    with profile.phase("block_split"):
+        blocks = list(iter_markdown_blocks(md_file, classify=False))
+    children_nodes = []
+    for block in blocks:
+        with profile.phase("block_classify"):
+            block_type = classify_lines(block.lines)
+        with profile.phase("inline_parse"):
+            children_nodes.append(block_to_node(block, block_type, links))
+    content = ParentNode("div", children_nodes)
+    title = escape_text(extract_title(md_file))
+    with profile.phase("html_render"):
+        html = content.to_html()
+    with profile.phase("template_write"):
+        written = write_if_changed(dest_path, template.stream({"Title": title, "Content": html}))
+    profile.add_page(from_path, time.perf_counter() - start, len(md_file.encode()), os.path.getsize(dest_path))
+    return written
+
+def list_pages(dir_path_content, dest_dir_path, template_path, include=None, exclude=None, pretty_urls=False):
+    # Lazily yields (from_path, template_path, to_path); hidden and temp files
+    # are skipped and include defaults to page_patterns
+    for route in iter_routes(dir_path_content, dest_dir_path, template_path, include, exclude, pretty_urls):
+        yield route.page()
+
+def iter_routes(dir_path_content, dest_dir_path, template_path, include=None, exclude=None, pretty_urls=False):
+    pages = walk_tree(
+        dir_path_content,
+        dest_dir_path,
+        include or page_patterns,
+        exclude,
+        enter=lambda src_dir, dest_dir, parent_template: directory_template(src_dir, parent_template),
+        context=directory_template(dir_path_content, template_path),
+    )
+    for from_path, _, _, page_template_path in pages:
+        output, url = route_for(os.path.relpath(from_path, dir_path_content), pretty_urls)
+        yield Route(from_path, page_template_path, os.path.join(dest_dir_path, output), url)
+
+def build_route_index(dir_path_content, dest_dir_path, template_path, include=None, exclude=None, pretty_urls=False):
+    # Raises ValueError when two pages map to the same output
+    routes = RouteIndex(dest_dir_path)
+    for route in iter_routes(dir_path_content, dest_dir_path, template_path, include, exclude, pretty_urls):
+        routes.add(route)
+    return routes
+
+def generate_pages_recursive(
+    dir_path_content, template_path, dest_dir_path, jobs=1, profile=None, pipeline=False, include=None, exclude=None
+):
+    pages = list_pages(dir_path_content, dest_dir_path, template_path, include, exclude)
+    if profile is not None:
+        with profile_phase(profile, "walk"):
+            pages = list(pages)
+    return generate_pages(pages, jobs, profile, pipeline)
+
+def generate_pages(pages, jobs=1, profile=None, pipeline=False, links=None):
+    # Returns {"written": n, "unchanged": n} page counts; links, if given, maps
+    # each rendered page source to the URLs of its links and images afterwards
+    if pipeline:
+        return generate_pages_pipelined(pages, jobs, links)
+    if jobs == 1:
+        return count_writes(generate_page(*page, profile, page_links(links, page[0])) for page in pages)
+    pages = list(pages)
+    if len(pages) < 2:
+        # Not worth starting a process pool, e.g. for a single watch rebuild
+        return generate_pages(pages, 1, profile, links=links)
+    return generate_pages_parallel(pages, jobs, profile, links)
+
+def page_links(links, from_path):
+    if links is None:
+        return None
+    links[from_path] = []
+    return links[from_path]
+
+def generate_pages_parallel(pages, jobs, profile=None, links=None, mp_context=None):
+    # Render pages on a process pool, logging results in submission order
+    if not pages:
+        return count_writes([])
+    # Compile templates before forking so workers inherit the cache
+    for template_path in {page[1] for page in pages}:
+        page_template(template_path)
+    jobs = min(jobs, len(pages))
+    chunksize = max(1, len(pages) // (jobs * 4))
+    failed = []
+    written = []
+    with ProcessPoolExecutor(
+        max_workers=jobs, mp_context=mp_context, initializer=init_worker, initargs=worker_state()
+    ) as executor:
+        task = functools.partial(_generate_page_task, profiled=profile is not None, collect=links is not None)
+        results = executor.map(task, pages, chunksize=chunksize)
+        for (from_path, template_path, to_path), (error, page_profile, page_written, urls) in zip(pages, results):
+            if page_profile is not None:
+                profile.merge(page_profile)
+            if error is None:
+                print(f"Generating page from {from_path} to {to_path} using {template_path}")
+                written.append(page_written)
+                if links is not None:
+                    links[from_path] = urls
+            else:
+                print(f"Failed to generate page from {from_path}:\n{error}")
+                failed.append(from_path)
+    if failed:
+        raise Exception(f"{len(failed)} page(s) failed to generate: {', '.join(failed)}")
+    return count_writes(written)
+
+def generate_pages_pipelined(pages, jobs=1, links=None, mp_context=None):
+    if jobs > 1:
+        pages = list(pages)
+        # Compile templates before forking so workers inherit the cache
+        for template_path in {page[1] for page in pages}:
+            page_template(template_path)
+    render = render_markdown if links is None else render_markdown_links
+    pool_options = {"mp_context": mp_context, "initializer": init_worker, "initargs": worker_state()}
+    return generate_pages_async(pages, render, jobs, links=links, pool_options=pool_options)
+
+def worker_state():
+    # Arguments for init_worker: the parent's asset urls and block cache
+    # (path, max_bytes)
+    assets = get_assets()
+    cache = get_block_cache()
+    return (
+        assets.urls if assets is not None else None,
+        (cache.path, cache.max_bytes) if cache is not None else None,
+    )
+
+def init_worker(asset_urls, cache_settings):
+    # Pool initializer. Workers started with spawn instead of fork do not
+    # inherit the parent's globals, so they are set up again here.
+    if asset_urls is not None:
+        enable_assets(AssetManifest(asset_urls))
+    if cache_settings is not None:
+        enable_block_cache(*cache_settings)
+
+def _generate_page_task(page, profiled=False, collect=False):
+    profile = BuildProfile(slowest=None) if profiled else None
+    urls = [] if collect else None
+    try:
+        written = render_page(*page, profile, urls)
+    except Exception:
+        return traceback.format_exc(), None, False, None
+    return None, profile.to_dict() if profile else None, written, urls
+
+def generate_pages_incremental(
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    manifest,
+    jobs=1,
+    profile=None,
+    pipeline=False,
+    changed_static=(),
+    include=None,
+    exclude=None,
+    routes=None,
+):
+    # Only regenerate pages whose markdown or template (with partials and
+    # layouts) changed, or that reference a changed static file or a page
+    # that was added or removed
+    pages = {}
+    templates = {}
+    stale = []
+    with profile_phase(profile, "walk"):
+        if routes is None:
+            routes = build_route_index(dir_path_content, dest_dir_path, template_path, include, exclude)
+        _find_stale_pages(routes.pages(), manifest, pages, templates, stale)
+        _find_stale_references(manifest, pages, stale, changed_static)
+    # References of the pages rendered now come from their rendered links
+    links = {}
+    stats = generate_pages(stale, jobs, profile, pipeline, links)
+    for from_path, urls in links.items():
+        pages[from_path]["refs"] = resolve_references(urls, pages[from_path]["dest"], dest_dir_path)
+    stats["unchanged"] += len(pages) - len(stale)
+    stats["rendered"] = [page[0] for page in stale]
+    manifest["templates"] = templates
+    manifest["pages"] = pages
+    return stats
+
+def _find_stale_pages(page_list, manifest, pages, templates, stale):
+    changed_templates = set()
+    for from_path, page_template_path, to_path in page_list:
+        if page_template_path not in templates:
+            previous_template = manifest["templates"].get(page_template_path)
+            dependencies = get_template(page_template_path).dependencies
+            templates[page_template_path] = files_entry(dependencies, previous_template)
+            if previous_template is None or previous_template["hash"] != templates[page_template_path]["hash"]:
+                changed_templates.add(page_template_path)
+        previous = manifest["pages"].get(from_path)
+        entry = file_entry(from_path, previous)
+        entry["dest"] = to_path
+        entry["template"] = page_template_path
+        if (
+            page_template_path in changed_templates
+            or is_stale(entry, previous, to_path)
+            or previous.get("template") != page_template_path
+        ):
+            # refs are filled in once the page is rendered
+            stale.append((from_path, page_template_path, to_path))
         else:
-            generate_pages_recursive(from_path, template_path, to_path)
\ No newline at end of file
+            entry["refs"] = previous["refs"]
+        pages[from_path] = entry
+
+def _find_stale_references(manifest, pages, stale, changed_static):
+    # Editing a page only changes its own output, but adding or removing one
+    # affects every page linking to it
+    changed = {os.path.normpath(e["dest"]) for e in manifest["pages"].values()}
+    changed ^= {os.path.normpath(e["dest"]) for e in pages.values()}
+    changed |= set(changed_static)
+    if not changed:
+        return
+    stale_paths = {page[0] for page in stale}
+    for from_path, entry in pages.items():
+        if from_path not in stale_paths and changed.intersection(entry["refs"]):
+            stale.append((from_path, entry["template"], entry["dest"]))
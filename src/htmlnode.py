@@ -1,4 +1,16 @@
+from escape import escape_attribute, escape_text
+
+
+def props_to_html(props):
+    if props:
+        html_list = [f' {key}="{escape_attribute(val)}"' for key, val in props.items()]
+        return "".join(html_list)
+    return ""
+
+
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -8,43 +20,62 @@ class HTMLNode:
     def to_html(self):
         raise NotImplementedError("to_html not implemented")
 
+    def iter_html(self):
+        # Yield the rendered HTML in chunks instead of building one string
+        yield self.to_html()
+
+    def render_to(self, write):
+        for chunk in self.iter_html():
+            write(chunk)
+
     def props_to_html(self):
-        if self.props:
-            html_list = [f' {key}="{val}"' for key, val in self.props.items()]
-            return "".join(html_list)
-        return ""
+        return props_to_html(self.props)
 
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, children: {self.children}, {self.props})"
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
-        super().__init__(tag, value, None, props)
+        # Assign directly rather than through super() to keep node creation cheap
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
 
     def to_html(self):
         if self.value is None:
             raise ValueError("Invalid HTML: no value")
         if self.tag is None:
-            return self.value
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>" 
+            return escape_text(self.value)
+        return f"<{self.tag}{self.props_to_html()}>{escape_text(self.value)}</{self.tag}>"
 
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
     
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag=None, children=None, props=None):
-        super().__init__(tag, None, children, props)
+        self.tag = tag
+        self.value = None
+        self.children = children
+        self.props = props
         
     def to_html(self):
+        return "".join(self.iter_html())
+
+    def iter_html(self):
         if self.tag is None:
             raise ValueError("HTML has no tag")
         if not self.children:
             raise ValueError("Parent has no children")
-        res = ""
+        yield f"<{self.tag}{self.props_to_html()}>"
         for c in self.children:
-            res += c.to_html()
-        return f"<{self.tag}>{res}</{self.tag}>"
+            yield from c.iter_html()
+        yield f"</{self.tag}>"
     
     def __repr__(self):
         return f"ParentNode({self.tag}, {self.children}, {self.props})"
@@ -1,6 +1,10 @@
 from textnode import TextNode, TextType
 import re
 
+image_pattern = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+link_pattern = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+special_pattern = re.compile(r"`|\*+|!\[|\[")
+
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     res_list = []
     for node in old_nodes: 
@@ -18,58 +22,107 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
     return res_list
 
 def extract_markdown_images(text):
-    matches = re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    matches = image_pattern.findall(text)
     return matches
 
 def extract_markdown_links(text):
-    matches = re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    matches = link_pattern.findall(text)
     return matches
 
 def split_nodes_image(old_nodes):
-    res_list = []
-    for node in old_nodes:
-        if node.text_type != TextType.TEXT:
-            res_list += [node]
-            continue
-        link_list = extract_markdown_images(node.text)
-        base_text = node.text
-        for alt, link in link_list:
-            sections = base_text.split(f"![{alt}]({link})", 1)
-            if len(sections) != 2:
-                raise ValueError("Invalid markdown, image section not closed")
-            if sections[0] != "":
-                res_list += [TextNode(sections[0], TextType.TEXT)]
-            res_list += [TextNode(alt, TextType.IMAGE, link)]
-            base_text = "".join(sections[1:])
-        if base_text != "":
-            res_list += [TextNode(base_text, TextType.TEXT)]
-    return res_list
+    return _split_nodes_pattern(old_nodes, image_pattern, TextType.IMAGE)
     
 def split_nodes_link(old_nodes):
+    return _split_nodes_pattern(old_nodes, link_pattern, TextType.LINK)
+
+def _split_nodes_pattern(old_nodes, pattern, text_type):
+    # Slice around match offsets instead of re-searching the remaining text
     res_list = []
     for node in old_nodes:
         if node.text_type != TextType.TEXT:
             res_list += [node]
             continue
-        link_list = extract_markdown_links(node.text)
-        base_text = node.text
-        for alt, link in link_list:
-            sections = base_text.split(f"[{alt}]({link})", 1)
-            if len(sections) != 2:
-                raise ValueError("Invalid markdown, image section not closed")
-            if sections[0] != "":
-                res_list += [TextNode(sections[0], TextType.TEXT)]
-            res_list += [TextNode(alt, TextType.LINK, link)]
-            base_text = "".join(sections[1:])
-        if base_text != "":
-            res_list += [TextNode(base_text, TextType.TEXT)]
+        pos = 0
+        for match in pattern.finditer(node.text):
+            if match.start() > pos:
+                res_list += [TextNode(node.text[pos:match.start()], TextType.TEXT)]
+            res_list += [TextNode(match.group(1), text_type, match.group(2))]
+            pos = match.end()
+        if pos < len(node.text):
+            res_list += [TextNode(node.text[pos:], TextType.TEXT)]
     return res_list
 
 def text_to_textnodes(text):
-    base_node = TextNode(text, TextType.TEXT)
-    res = split_nodes_delimiter([base_node], "**", TextType.BOLD)
-    res = split_nodes_delimiter(res, "*", TextType.ITALIC)
-    res = split_nodes_delimiter(res, "`", TextType.CODE)
-    res = split_nodes_link(res)
-    res = split_nodes_image(res)
-    return res
\ No newline at end of file
+    # Single left-to-right scan. Code spans, links and images are matched in
+    # place, emphasis is paired through a delimiter stack. Every character is
+    # visited a bounded number of times, so the scan is linear in len(text).
+    nodes = []
+    stack = []
+    start = 0
+    pos = 0
+    while True:
+        special = special_pattern.search(text, pos)
+        if special is None:
+            break
+        i = special.start()
+        char = text[i]
+        if char == "`":
+            end = text.find("`", i + 1)
+            if end == -1:
+                raise Exception("Invalid Markdown syntax")
+            _flush_text(nodes, text, start, i)
+            nodes.append(TextNode(text[i + 1:end], TextType.CODE))
+            pos = start = end + 1
+        elif char == "*":
+            end = special.end()
+            _flush_text(nodes, text, start, i)
+            _close_or_open_emphasis(nodes, stack, end - i)
+            pos = start = end
+        else:
+            pattern = image_pattern if char == "!" else link_pattern
+            match = pattern.match(text, i)
+            if match is None:
+                pos = i + 1
+                continue
+            _flush_text(nodes, text, start, i)
+            if char == "!":
+                nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+            else:
+                label = text_to_textnodes(match.group(1))
+                nodes.append(_span_node(label, TextType.LINK, match.group(2)))
+            pos = start = match.end()
+    if stack:
+        raise Exception("Invalid Markdown syntax")
+    _flush_text(nodes, text, start, len(text))
+    return nodes
+
+def _flush_text(nodes, text, start, end):
+    if end > start:
+        nodes.append(TextNode(text[start:end], TextType.TEXT))
+
+def _close_or_open_emphasis(nodes, stack, run):
+    # stack holds (delimiter length, index of the first content node)
+    while run > 0:
+        open_lengths = [length for length, _ in stack]
+        top = open_lengths[-1] if open_lengths else None
+        if (top == 2 and run >= 2) or (top == 1 and (run == 1 or 2 in open_lengths)):
+            length, idx = stack.pop()
+            content = nodes[idx:]
+            del nodes[idx:]
+            text_type = TextType.BOLD if length == 2 else TextType.ITALIC
+            nodes.append(_span_node(content, text_type))
+            run -= length
+            continue
+        length = 2 if run >= 2 else 1
+        if length in open_lengths:
+            raise Exception("Invalid Markdown syntax")
+        stack.append((length, len(nodes)))
+        run -= length
+
+def _span_node(content, text_type, url=None):
+    if not content:
+        return TextNode("", text_type, url)
+    if len(content) == 1 and content[0].text_type == TextType.TEXT:
+        return TextNode(content[0].text, text_type, url)
+    text = "".join(node.text for node in content)
+    return TextNode(text, text_type, url, children=content)
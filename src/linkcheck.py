@@ -0,0 +1,49 @@
+import os
+
+
+def check_links(page_refs, targets, previous_broken=None, recheck=None):
+    # page_refs maps each page source to the outputs its links and images
+    # point at (see depgraph.resolve_references); targets holds every output the
+    # build produces. With previous_broken, only pages in recheck are looked
+    # at again, the others keep their earlier result.
+    broken = {}
+    for src, refs in page_refs.items():
+        if previous_broken is not None and recheck is not None and src not in recheck:
+            if src in previous_broken:
+                broken[src] = previous_broken[src]
+            continue
+        missing = [ref for ref in refs if ref not in targets]
+        if missing:
+            broken[src] = missing
+    return broken
+
+
+def find_orphans(page_outputs, page_refs, roots=()):
+    # Pages no other page links to; roots such as the home page never count
+    roots = {os.path.normpath(root) for root in roots}
+    inbound = set()
+    for src, refs in page_refs.items():
+        own = os.path.normpath(page_outputs[src])
+        inbound.update(ref for ref in refs if ref != own)
+    return sorted(
+        src for src, dest in page_outputs.items()
+        if os.path.normpath(dest) not in inbound and os.path.normpath(dest) not in roots
+    )
+
+
+def output_url(path, public_path):
+    rel_path = os.path.relpath(path, public_path).replace(os.sep, "/")
+    if rel_path == "index.html" or rel_path.endswith("/index.html"):
+        rel_path = rel_path[:-len("index.html")]
+    return "/" + rel_path
+
+
+def print_link_report(broken, orphans, public_path):
+    count = sum(len(refs) for refs in broken.values())
+    print(f"Links: {count} broken, {len(orphans)} orphan page(s)")
+    for src in sorted(broken):
+        for ref in broken[src]:
+            print(f"  Broken link in {src}: {output_url(ref, public_path)}")
+    for src in orphans:
+        print(f"  Orphan page: {src}")
+    return count
@@ -1,50 +1,731 @@
+import argparse
 import os
 import shutil
-from gencontent import generate_pages_recursive
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from assets import (
+    asset_manifest_name,
+    enable_assets,
+    fingerprint_static,
+    get_assets,
+    load_asset_hashes,
+    save_asset_hashes,
+)
+from block_cache import disable_block_cache, enable_block_cache
+from compress import available_encodings, compress_files, compress_outputs, with_sidecars
+from depgraph import affected_pages, changed_outputs, dependents, resolve_references
+from devserver import ReloadBroker, make_server, watch
+from fileserver import FileCache
+from gencontent import build_route_index, generate_pages, generate_pages_incremental, page_patterns
+from linkcheck import check_links, find_orphans, print_link_report
+from manifest import (
+    file_entry,
+    files_entry,
+    load_manifest,
+    new_manifest,
+    remove_stale_outputs,
+    save_manifest,
+)
+from profiling import BuildProfile, profile_phase, profiled_run
+from search import load_search_state, save_search_state, update_search_state, write_search_index
+from shard import merge_shards, parse_shard, select_shard, write_shard_manifest
+from staticsync import sync_static
+from template import directory_template_name, get_template
+from walker import is_walked
 
 dir_path_static = "./static"
 dir_path_public = "./public"
 dir_path_content = "./content"
 template_path = "./template.html"
+manifest_path = "./.build/manifest.json"
+block_cache_path = "./.build/blocks.sqlite"
+search_state_path = "./.build/search.json"
+asset_hashes_path = "./.build/assets.json"
+default_compress_min_size = 1024
 
-def main():
-    copy_contents()
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "serve":
+        serve(args)
+        return
+    if args.command == "deps":
+        print_dependents(args.paths)
+        return
+    if args.command == "merge":
+        merge(args.paths, args.output or dir_path_public)
+        return
+    build(args)
+
+def build(args):
+    profile = BuildProfile(args.profile_slowest) if args.profile else None
+    with profiled_run(args.profile_cprofile, args.profile_tracemalloc), block_cache(args):
+        if args.incremental:
+            build_incremental(
+                args.jobs,
+                args.checksum,
+                args.hardlink,
+                profile,
+                args.pipeline,
+                args.compress,
+                include=args.include,
+                exclude=args.exclude,
+                pretty_urls=args.pretty_urls,
+                check=args.check_links,
+                search=args.search,
+                fingerprint=args.fingerprint,
+            )
+        elif args.shard:
+            build_shard(
+                *args.shard,
+                args.output,
+                args.jobs,
+                args.checksum,
+                args.hardlink,
+                profile,
+                args.pipeline,
+                args.clean,
+                args.compress,
+                include=args.include,
+                exclude=args.exclude,
+                pretty_urls=args.pretty_urls,
+            )
+        else:
+            build_full(
+                args.jobs,
+                args.checksum,
+                args.hardlink,
+                profile,
+                args.pipeline,
+                args.clean,
+                args.compress,
+                include=args.include,
+                exclude=args.exclude,
+                pretty_urls=args.pretty_urls,
+                check=args.check_links,
+                search=args.search,
+                fingerprint=args.fingerprint,
+            )
+    if profile is not None:
+        profile.write(args.profile)
+        print(f"Build profile written to {args.profile}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static site into ./public")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=["build", "serve", "deps", "merge"],
+        default="build",
+        help=(
+            "build the site (default), build it and serve ./public, list the pages depending on PATHS, "
+            "or merge the shard directories PATHS into ./public"
+        ),
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        metavar="PATHS",
+        help="with deps: files to look up in the dependency graph of the last incremental build; "
+        "with merge: output directories of every shard",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="keep ./public and only rebuild outputs whose inputs changed",
+    )
+    parser.add_argument(
+        "--clean",
+        action="store_true",
+        help="delete ./public before a full build instead of updating it in place",
+    )
+    parser.add_argument(
+        "--shard",
+        type=shard_arg,
+        metavar="I/N",
+        help="render only shard I of N (1-based) into its own directory, see merge",
+    )
+    parser.add_argument(
+        "--output",
+        metavar="DIR",
+        help="directory written by --shard (default ./public-shard-I-of-N) or by merge (default ./public)",
+    )
+    parser.add_argument(
+        "--include",
+        action="append",
+        metavar="GLOB",
+        help="render only content files matching GLOB, relative to ./content (default *.md, repeatable)",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        metavar="GLOB",
+        help="skip content and static files or directories matching GLOB relative to their root (repeatable)",
+    )
+    parser.add_argument(
+        "--pretty-urls",
+        action="store_true",
+        help="render page.md as page/index.html so it is served at /page/",
+    )
+    parser.add_argument(
+        "--check-links",
+        action="store_true",
+        help="report broken internal links and images and orphan pages, failing the build on broken links",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="also copy CSS, JS, images and fonts to content hashed names and point pages and templates at them",
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help="write a full-text search index of every page to ./public/search",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="number of worker processes used to render pages (0 = one per CPU core)",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="overlap reading, rendering and writing pages in an asyncio pipeline",
+    )
+    parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="compare static files by content hash when size matches but mtime differs",
+    )
+    parser.add_argument(
+        "--hardlink",
+        action="store_true",
+        help="hardlink static files into ./public instead of copying them",
+    )
+    parser.add_argument(
+        "--compress",
+        nargs="?",
+        type=int,
+        const=default_compress_min_size,
+        metavar="MIN_BYTES",
+        help="write .gz (and .zst with zstandard installed) sidecars for HTML, CSS, JS and SVG outputs "
+        f"of at least MIN_BYTES (default {default_compress_min_size})",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="with serve: rebuild on changes and reload open browsers",
+    )
+    parser.add_argument("--port", type=int, default=8888, help="port used by serve")
+    parser.add_argument(
+        "--no-build",
+        action="store_true",
+        help="with serve: serve ./public as it is instead of building it first",
+    )
+    parser.add_argument(
+        "--memory-cache",
+        type=int,
+        default=64,
+        metavar="MB",
+        help="with serve: keep up to MB megabytes of recently served small files in memory",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="render every block instead of reusing HTML cached by earlier builds",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=256,
+        metavar="MB",
+        help="evict least recently used blocks once the render cache exceeds MB megabytes",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="./.build/profile.json",
+        metavar="PATH",
+        help="write per-phase timings and the slowest pages as JSON (default ./.build/profile.json); "
+        "profiled pages render every block without the block cache",
+    )
+    parser.add_argument(
+        "--profile-slowest",
+        type=int,
+        default=10,
+        metavar="N",
+        help="number of slowest pages kept in the profile report",
+    )
+    parser.add_argument(
+        "--profile-cprofile",
+        metavar="PATH",
+        help="also dump cProfile stats of the main process to PATH",
+    )
+    parser.add_argument(
+        "--profile-tracemalloc",
+        metavar="PATH",
+        help="also write the top tracemalloc allocation sites as JSON to PATH",
+    )
+    args = parser.parse_args(argv)
+    if args.paths and args.command not in ("deps", "merge"):
+        parser.error("PATHS are only used by the deps and merge commands")
+    if args.command == "merge" and not args.paths:
+        parser.error("merge needs the output directory of every shard")
+    if args.shard and (args.incremental or args.command != "build" or args.check_links or args.search or args.fingerprint):
+        parser.error("--shard only works with a full build without --check-links, --search or --fingerprint")
+    if args.output and not (args.shard or args.command == "merge"):
+        parser.error("--output is only used with --shard or merge")
+    if args.shard and not args.output:
+        args.output = f"./public-shard-{args.shard[0]}-of-{args.shard[1]}"
+    if args.jobs < 0:
+        parser.error("--jobs must be 0 or a positive number")
+    if args.jobs == 0:
+        args.jobs = os.cpu_count() or 1
+    if args.pipeline and args.profile:
+        parser.error("--pipeline cannot be combined with --profile")
+    if args.compress is not None and args.compress < 0:
+        parser.error("--compress must be 0 or a positive number")
+    if args.cache_size < 0:
+        parser.error("--cache-size must be 0 or a positive number")
+    if args.memory_cache < 0:
+        parser.error("--memory-cache must be 0 or a positive number")
+    if args.no_build and (args.command != "serve" or args.watch):
+        parser.error("--no-build only works with serve without --watch")
+    return args
+
+def shard_arg(text):
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+@contextmanager
+def block_cache(args):
+    # The cache lives for one build or serve session and is trimmed at the end
+    if args.no_cache:
+        yield None
+        return
+    cache = enable_block_cache(block_cache_path, args.cache_size * 1024 * 1024)
+    try:
+        yield cache
+        cache.evict()
+    finally:
+        disable_block_cache()
+
+def build_full(
+    jobs=1,
+    checksum=False,
+    hardlink=False,
+    profile=None,
+    pipeline=False,
+    clean=False,
+    compress=None,
+    include=None,
+    exclude=None,
+    pretty_urls=False,
+    check=False,
+    search=False,
+    fingerprint=False,
+):
+    # Render every page but only touch outputs whose bytes changed, so
+    # ./public keeps its mtimes and deploys only see real changes
+    static_entries = copy_contents(checksum, hardlink, profile, clean, exclude=exclude)
+    assets, asset_outputs = fingerprint_assets(static_entries, dir_path_public, hardlink, profile) if fingerprint else (None, [])
+    enable_assets(assets)
+    print("Generating page...")
+    with profile_phase(profile, "walk"):
+        routes = build_route_index(dir_path_content, dir_path_public, template_path, include, exclude, pretty_urls)
+        routes.check_static(static_entries)
+        pages = routes.pages()
+    links = {} if check else None
+    stats = generate_pages(pages, jobs, profile, pipeline, links)
+    expected = [e["dest"] for e in static_entries.values()]
+    expected += [to_path for _, _, to_path in pages]
+    expected += asset_outputs
+    if search:
+        expected += build_search_index(routes, profile)
+    stats["removed"] = remove_outputs(expected, dir_path_public, compress is not None)
+    print_page_stats(stats)
+    compress_public(dir_path_public, compress, profile)
+    if check:
+        page_refs = {route.source: resolve_references(links[route.source], route.output, dir_path_public) for route in routes}
+        _, count = check_site_links(routes, static_entries, page_refs)
+        if count:
+            raise Exception(f"{count} broken link(s)")
+
+def build_shard(
+    index,
+    count,
+    shard_path,
+    jobs=1,
+    checksum=False,
+    hardlink=False,
+    profile=None,
+    pipeline=False,
+    clean=False,
+    compress=None,
+    include=None,
+    exclude=None,
+    pretty_urls=False,
+):
+    # Render one deterministic slice of the pages into shard_path; shard 1
+    # also carries the static files. merge combines the shard directories.
+    print(f"Building shard {index}/{count} into {shard_path}")
+    static_entries = copy_contents(checksum, hardlink, profile, clean, shard_path, index == 1, exclude)
     print("Generating page...")
-    generate_pages_recursive(
+    with profile_phase(profile, "walk"):
+        routes = build_route_index(dir_path_content, shard_path, template_path, include, exclude, pretty_urls)
+        if index == 1:
+            routes.check_static(static_entries)
+        pages = select_shard(routes.pages(), dir_path_content, index, count)
+    stats = generate_pages(pages, jobs, profile, pipeline)
+    expected = [e["dest"] for e in static_entries.values()]
+    expected += [to_path for _, _, to_path in pages]
+    stats["removed"] = remove_outputs(expected, shard_path, compress is not None)
+    print_page_stats(stats)
+    compress_public(shard_path, compress, profile)
+    write_shard_manifest(shard_path, index, count, pages)
+
+def merge(shard_paths, public_path):
+    print(f"Merging {len(shard_paths)} shard(s) into {public_path}...")
+    stats = merge_shards(shard_paths, public_path)
+    print(f"Outputs: {stats['copied']} copied, {stats['unchanged']} unchanged, {stats['removed']} removed")
+
+def build_incremental(
+    jobs=1,
+    checksum=False,
+    hardlink=False,
+    profile=None,
+    pipeline=False,
+    compress=None,
+    include=None,
+    exclude=None,
+    pretty_urls=False,
+    check=False,
+    search=False,
+    fingerprint=False,
+):
+    # compress is the minimum output size for sidecars, None skips them
+    manifest = load_manifest(manifest_path)
+    if not os.path.isdir(dir_path_public):
+        manifest = new_manifest()
+        os.mkdir(dir_path_public)
+    print("Syncing static files to public directory...")
+    previous_static = manifest["static"]
+    with profile_phase(profile, "static_copy"):
+        manifest["static"], stats = sync_static(
+            dir_path_static, dir_path_public, previous_static, checksum, hardlink, exclude=exclude
+        )
+    print_sync_stats(stats)
+    assets, asset_outputs = fingerprint_assets(manifest["static"], dir_path_public, hardlink, profile) if fingerprint else (None, [])
+    enable_assets(assets)
+    changed_static = changed_outputs(previous_static, manifest["static"])
+    # Pages and templates referencing an asset whose fingerprint changed (or
+    # that was turned on or off) render differently now
+    previous_urls = manifest.get("assets", {})
+    changed_urls = assets.changed_urls(previous_urls) if assets is not None else set(previous_urls)
+    if changed_urls:
+        changed_static |= {os.path.normpath(os.path.join(dir_path_public, url.lstrip("/"))) for url in changed_urls}
+        invalidate_templates(manifest, changed_urls)
+    manifest["assets"] = assets.urls if assets is not None else {}
+    print("Generating page...")
+    routes = build_route_index(dir_path_content, dir_path_public, template_path, include, exclude, pretty_urls)
+    routes.check_static(manifest["static"])
+    stats = generate_pages_incremental(
         dir_path_content,
         template_path,
         dir_path_public,
+        manifest,
+        jobs,
+        profile,
+        pipeline,
+        changed_static,
+        routes=routes,
     )
+    if assets is not None:
+        record_template_assets(manifest, assets, manifest["templates"])
+    expected = [e["dest"] for e in manifest["static"].values()]
+    expected += [e["dest"] for e in manifest["pages"].values()]
+    expected += asset_outputs
+    if search:
+        expected += build_search_index(routes, profile)
+    stats["removed"] = remove_outputs(expected, dir_path_public, compress is not None)
+    print_page_stats(stats)
+    compress_public(dir_path_public, compress, profile)
+    count = 0
+    # Results are only reused when the previous build checked links too
+    previous = manifest.pop("links", {}).get("broken")
+    if check:
+        # Only pages rendered in this build can have gained or lost a broken
+        # link, see generate_pages_incremental
+        page_refs = {src: entry["refs"] for src, entry in manifest["pages"].items()}
+        broken, count = check_site_links(routes, manifest["static"], page_refs, previous, set(stats["rendered"]))
+        manifest["links"] = {"broken": broken}
+    save_manifest(manifest, manifest_path)
+    if count:
+        raise Exception(f"{count} broken link(s)")
+    return manifest, routes
+
+def rebuild_changed(manifest, routes, changed, args):
+    # Watch rebuilds keep the manifest and routes of the last build in memory
+    # and only render the pages depending on the changed paths, without
+    # walking content or public. Paths a build would not walk, e.g. editor
+    # swap files, are ignored. Returns None when pages or directory templates
+    # were added or removed, or with --fingerprint when a static file changed;
+    # build_incremental takes care of those.
+    template_files = {}
+    for template, entry in manifest["templates"].items():
+        for path in entry["files"]:
+            template_files.setdefault(os.path.normpath(path), set()).add(template)
+    paths = set()
+    templates = set()
+    static_changed = False
+    for path in changed:
+        normalized = os.path.normpath(path)
+        if normalized in template_files:
+            templates |= template_files[normalized]
+        elif is_below(normalized, dir_path_static):
+            static_changed = static_changed or is_walked(relative_path(normalized, dir_path_static), exclude=args.exclude)
+            continue
+        elif os.path.basename(normalized) == directory_template_name:
+            return None
+        elif is_below(normalized, dir_path_content) and not is_walked(
+            relative_path(normalized, dir_path_content), args.include or page_patterns, args.exclude
+        ):
+            continue
+        elif routes.source(path) is None or not os.path.isfile(path):
+            return None
+        paths.add(normalized)
+    if not (paths or templates or static_changed):
+        return {"written": 0, "unchanged": 0, "removed": 0}
+    outputs = []
+    if static_changed:
+        if args.fingerprint:
+            return None
+        previous_static = manifest["static"]
+        manifest["static"], stats = sync_static(
+            dir_path_static, dir_path_public, previous_static, args.checksum, args.hardlink, exclude=args.exclude
+        )
+        print_sync_stats(stats)
+        routes.check_static(manifest["static"])
+        changed_static = changed_outputs(previous_static, manifest["static"])
+        paths |= changed_static
+        outputs += changed_static
+    pages = [routes.source(src).page() for src in affected_pages(manifest, paths)]
+    links = {}
+    stats = generate_pages(pages, args.jobs, pipeline=args.pipeline, links=links)
+    # Only recorded once every page using them is rendered
+    for template in templates:
+        manifest["templates"][template] = files_entry(get_template(template).dependencies, manifest["templates"][template])
+    assets = get_assets()
+    if assets is not None:
+        record_template_assets(manifest, assets, templates)
+    for from_path, page_template_path, to_path in pages:
+        entry = file_entry(from_path, manifest["pages"].get(from_path))
+        entry.update(dest=to_path, template=page_template_path)
+        entry["refs"] = resolve_references(links[from_path], to_path, dir_path_public)
+        manifest["pages"][from_path] = entry
+        outputs.append(to_path)
+    if args.search:
+        build_search_index(routes)
+    stats["removed"] = 0
+    print_page_stats(stats)
+    if args.compress is not None:
+        compress_files(outputs, args.compress)
+    return stats
+
+def is_below(path, dir_path):
+    return os.path.commonpath([os.path.abspath(path), os.path.abspath(dir_path)]) == os.path.abspath(dir_path)
+
+def relative_path(path, dir_path):
+    # "/"-separated, as walker matches include and exclude globs
+    return os.path.relpath(path, dir_path).replace(os.sep, "/")
+
+def check_site_links(routes, static_entries, page_refs, previous=None, recheck=None):
+    targets = set(routes.by_output)
+    targets.update(os.path.normpath(entry["dest"]) for entry in static_entries.values())
+    broken = check_links(page_refs, targets, previous, recheck)
+    page_outputs = {route.source: route.output for route in routes}
+    orphans = find_orphans(page_outputs, page_refs, [os.path.join(routes.public_path, "index.html")])
+    return broken, print_link_report(broken, orphans, routes.public_path)
+
+def fingerprint_assets(static_entries, public_path, hardlink=False, profile=None):
+    print("Fingerprinting static assets...")
+    with profile_phase(profile, "static_copy"):
+        assets, hashes, outputs, stats = fingerprint_static(
+            static_entries, public_path, load_asset_hashes(asset_hashes_path), hardlink
+        )
+        save_asset_hashes(hashes, asset_hashes_path)
+        manifest_file = os.path.join(public_path, asset_manifest_name)
+        assets.write(manifest_file)
+    print(f"Assets: {stats['hashed']} hashed, {stats['copied']} copied, {stats['unchanged']} unchanged")
+    return assets, outputs + [manifest_file]
+
+def invalidate_templates(manifest, changed_urls):
+    # Forget the hash of every template linking to a changed asset so all
+    # pages using it are rendered again
+    for path in list(manifest["templates"]):
+        try:
+            segments = get_template(path).segments
+        except Exception:
+            continue
+        if any(url in segment for segment in segments for url in changed_urls):
+            del manifest["templates"][path]
+
+def record_template_assets(manifest, assets, template_paths):
+    # The static outputs a template links to, for dependents: once
+    # fingerprinted, editing such a file changes every page using the template
+    for path in template_paths:
+        segments = get_template(path).segments
+        manifest["templates"][path]["assets"] = sorted(
+            os.path.normpath(os.path.join(dir_path_public, url.lstrip("/")))
+            for url in assets.urls
+            if any(url in segment for segment in segments)
+        )
+
+def build_search_index(routes, profile=None):
+    # Pages unchanged since the last indexed build are not tokenized again
+    print("Indexing pages for search...")
+    with profile_phase(profile, "search"):
+        state = load_search_state(search_state_path)
+        stats = update_search_state(state, routes)
+        outputs, written = write_search_index(state, os.path.join(routes.public_path, "search"), stats["affected"])
+        save_search_state(state, search_state_path)
+    print(f"Search index: {stats['indexed']} page(s) indexed, {stats['unchanged']} unchanged, {written} file(s) written")
+    return outputs
 
-def copy_contents():
+def remove_outputs(expected, public_path=dir_path_public, keep_sidecars=False):
+    # Sidecars of remaining outputs are kept for compress_public to check
+    if keep_sidecars:
+        expected = with_sidecars(expected)
+    removed = remove_stale_outputs(public_path, expected)
+    for path in removed:
+        print(f"Removed: {path}")
+    return len(removed)
+
+def print_dependents(paths):
+    manifest = load_manifest(manifest_path)
+    for path in paths:
+        pages = dependents(manifest, path)
+        print(f"{path}: {len(pages)} page(s) would rebuild")
+        for page in pages:
+            print(f"  {page}")
+
+def compress_public(public_path, min_size, profile=None):
+    if min_size is None:
+        return
+    print(f"Compressing outputs ({', '.join(available_encodings())})...")
+    with profile_phase(profile, "compress"):
+        stats = compress_outputs(public_path, min_size)
+    print(f"Sidecars: {stats['compressed']} compressed, {stats['unchanged']} unchanged, {stats['removed']} removed")
+
+def serve(args):
+    with block_cache(args):
+        serve_site(args)
+
+def serve_site(args):
+    def build_site():
+        return build_incremental(
+            args.jobs,
+            args.checksum,
+            args.hardlink,
+            pipeline=args.pipeline,
+            compress=args.compress,
+            include=args.include,
+            exclude=args.exclude,
+            pretty_urls=args.pretty_urls,
+            search=args.search,
+            fingerprint=args.fingerprint,
+        )
+
+    if not args.no_build:
+        manifest, routes = build_site()
+    broker = ReloadBroker() if args.watch else None
+    server = make_server(dir_path_public, args.port, broker, cache=FileCache(args.memory_cache * 1024 * 1024))
+    print(f"Serving {dir_path_public} at http://localhost:{args.port}/")
+    if not args.watch:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def rebuild(changed):
+        nonlocal manifest, routes
+        start = time.perf_counter()
+        try:
+            stats = rebuild_changed(manifest, routes, changed, args) if manifest is not None else None
+            if stats is not None and not any(stats.values()):
+                # Only ignored files changed
+                return
+            rebuilt = stats is not None
+        except Exception:
+            # The manifest in memory may be half updated; the older one on
+            # disk only makes the full build below render more pages
+            traceback.print_exc()
+            manifest = None
+            rebuilt = False
+        if not rebuilt:
+            if manifest is not None:
+                save_manifest(manifest, manifest_path)
+            manifest = None
+            manifest, routes = build_site()
+        broker.notify()
+        print(f"Rebuilt after {len(changed)} change(s) in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    print(f"Watching {dir_path_content}, {dir_path_static} and {template_path} for changes...")
+    try:
+        watch(watched_paths, rebuild)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        # Watch rebuilds only update the manifest in memory
+        if manifest is not None:
+            save_manifest(manifest, manifest_path)
+
+def watched_paths():
+    try:
+        templates = get_template(template_path).dependencies
+    except Exception:
+        templates = [template_path]
+    return [dir_path_content, dir_path_static] + templates
+
+def copy_contents(
+    checksum=False, hardlink=False, profile=None, clean=True, public_path=dir_path_public, include_static=True, exclude=None
+):
     static_path = "./static"
-    public_path = "./public"
-    # Clear directory
-    print("Deleting public directory...")
-    clear_public_directory(public_path)
+    if clean:
+        # Clear directory
+        print("Deleting public directory...")
+        clear_public_directory(public_path)
+    else:
+        os.makedirs(public_path, exist_ok=True)
+    if not include_static:
+        return {}
     # Copy files from static to public
     print("Copying static files to public directory...")
-    copy_files(static_path, public_path)
-    
+    with profile_phase(profile, "static_copy"):
+        entries, stats = sync_static(static_path, public_path, checksum=checksum, hardlink=hardlink, exclude=exclude)
+    print_sync_stats(stats)
+    return entries
+
 def clear_public_directory(public_path):
     # Clear public directory
     if os.path.exists(public_path):
         shutil.rmtree(public_path)
     os.mkdir(public_path)
-        
-def copy_files(path, destination):
-    # Copy files from static
-    for f in os.listdir(path):
-        file_path = os.path.join(path, f)
-        file_destination = os.path.join(destination, f)
-        if os.path.isfile(file_path):
-            print(f"From: {file_path}, To: {destination}/{f}")
-            if not os.path.isdir(destination):
-                os.mkdir(destination)
-            shutil.copy(file_path, file_destination)
-        else:
-            copy_files(file_path, file_destination)
-    
+
+def print_sync_stats(stats):
+    print(f"Static files: {stats['copied']} copied, {stats['unchanged']} unchanged, {stats['removed']} removed")
+
+def print_page_stats(stats):
+    print(f"Pages: {stats['written']} written, {stats['unchanged']} unchanged, {stats['removed']} removed")
+
 if __name__ == "__main__":
     main()
-    
\ No newline at end of file
+
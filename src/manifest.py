@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+
+manifest_version = 3
+
+
+def new_manifest():
+    return {"version": manifest_version, "templates": {}, "pages": {}, "static": {}}
+
+
+def load_manifest(path):
+    # Missing or outdated manifests force a clean build
+    manifest = load_json(path)
+    if manifest is None or manifest.get("version") != manifest_version:
+        return new_manifest()
+    return manifest
+
+
+def save_manifest(manifest, path):
+    save_json(manifest, path, indent=1, sort_keys=True)
+
+
+def load_json(path):
+    # Build state kept between runs; None when missing or unreadable
+    if not os.path.isfile(path):
+        return None
+    with open(path, 'r') as file:
+        try:
+            return json.load(file)
+        except json.JSONDecodeError:
+            return None
+
+
+def save_json(data, path, **options):
+    # Written next to path and renamed over it, so an interrupted build never
+    # leaves half a file; options go to json.dump
+    dir_path = os.path.dirname(path)
+    if dir_path != "":
+        os.makedirs(dir_path, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as file:
+        json.dump(data, file, **options)
+    os.replace(tmp_path, path)
+
+
+def hash_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def file_entry(path, previous=None):
+    # Reuse the previous hash when size and mtime are unchanged
+    st = os.stat(path)
+    if previous and previous.get("size") == st.st_size and previous.get("mtime") == st.st_mtime_ns:
+        return {"hash": previous["hash"], "size": st.st_size, "mtime": st.st_mtime_ns}
+    return {"hash": hash_file(path), "size": st.st_size, "mtime": st.st_mtime_ns}
+
+
+def files_entry(paths, previous=None):
+    # One combined hash for a group of files, e.g. a template and its partials
+    previous_files = previous.get("files", {}) if previous else {}
+    files = {p: file_entry(p, previous_files.get(p)) for p in paths}
+    h = hashlib.sha256()
+    for p in paths:
+        h.update(f"{p}:{files[p]['hash']}\n".encode())
+    return {"hash": h.hexdigest(), "files": files}
+
+
+def is_stale(entry, previous, dest_path):
+    if previous is None or previous.get("hash") != entry["hash"]:
+        return True
+    if previous.get("dest") != dest_path:
+        return True
+    return not os.path.isfile(dest_path)
+
+
+def remove_stale_outputs(dest_dir_path, expected):
+    # Delete outputs whose sources are gone, then drop empty directories
+    removed = []
+    expected = {os.path.normpath(p) for p in expected}
+    for root, dirs, files in os.walk(dest_dir_path, topdown=False):
+        for f in files:
+            path = os.path.join(root, f)
+            if os.path.normpath(path) not in expected:
+                os.remove(path)
+                removed.append(path)
+        if root != dest_dir_path and not os.listdir(root):
+            os.rmdir(root)
+    return removed
@@ -1,8 +1,11 @@
+import io
+import json
 import re
 
+from assets import get_assets
 from htmlnode import ParentNode
 from inline_markdown import text_to_textnodes
-from textnode import text_node_to_html_node
+from textnode import TextType, text_node_to_html_node
 
 block_type_paragraph = "paragraph"
 block_type_heading = "heading"
@@ -11,105 +14,284 @@ block_type_quote = "quote"
 block_type_olist = "ordered_list"
 block_type_ulist = "unordered_list"
 
+heading_pattern = re.compile(r"(?:\#{1,6}) (?!#)")
+
+# Part of every block cache key; bump it whenever rendered HTML changes
+renderer_version = "2"
+
+# First character of a block -> [(block_type, detect)] for registered block types
+custom_block_types = {}
+
+
+class Block:
+    __slots__ = ("lines", "block_type", "start", "end")
+
+    def __init__(self, lines, block_type, start, end):
+        # lines are the stripped block split on "\n"; start/end are character
+        # offsets of the stripped block in the source
+        self.lines = lines
+        self.block_type = block_type
+        self.start = start
+        self.end = end
+
+    @property
+    def text(self):
+        return "\n".join(self.lines)
+
+    def __repr__(self):
+        return f"Block({self.block_type}, {self.start}:{self.end}, {self.lines})"
+
+
 def markdown_to_blocks(markdown):
-    blocks = markdown.split("\n\n")
-    blocks = [x.strip() for x in blocks if len(x.strip()) > 0]
-    return blocks
+    return [block.text for block in iter_markdown_blocks(markdown)]
+
+def iter_markdown_blocks(markdown, classify=True):
+    return scan_blocks(io.StringIO(markdown), classify)
+
+def iter_file_blocks(path, classify=True):
+    # Read the file a line at a time; text mode turns \r\n and \r into \n
+    # exactly like reading the whole file did
+    with open(path, 'r') as file:
+        yield from scan_blocks(file, classify)
+
+def scan_blocks(lines, classify=True):
+    # Segment lines into blocks separated by empty lines and classify each
+    # block from the lines already collected, so nothing is split twice.
+    # Blank lines inside a ``` fence do not end the block.
+    pending = []
+    sizes = []
+    block_start = 0
+    offset = 0
+    in_fence = False
+    for line in lines:
+        stripped = line.rstrip("\r\n")
+        if not pending:
+            block_start = offset
+            in_fence = stripped.lstrip().startswith("```") and not stripped.rstrip()[3:].endswith("```")
+        elif in_fence and stripped.rstrip().endswith("```"):
+            in_fence = False
+        offset += len(line)
+        if stripped or in_fence:
+            pending.append(stripped)
+            sizes.append(len(line))
+            continue
+        if not pending:
+            continue
+        block = _finish_block(pending, sizes, block_start, classify)
+        pending = []
+        sizes = []
+        if block is not None:
+            yield block
+    if pending:
+        block = _finish_block(pending, sizes, block_start, classify)
+        if block is not None:
+            yield block
+
+def _finish_block(lines, sizes, start, classify):
+    # Trim exactly like str.strip() on the joined block. lines come without
+    # their line endings, sizes are the raw line lengths, so start and end
+    # stay offsets into the source even for \r\n line endings.
+    first = 0
+    while first < len(lines) and not lines[first].strip():
+        start += sizes[first]
+        first += 1
+    if first == len(lines):
+        return None
+    last = len(lines) - 1
+    while not lines[last].strip():
+        last -= 1
+    end = start + sum(sizes[first:last]) + len(lines[last].rstrip())
+    lines = lines[first:last + 1]
+    head = lines[0].lstrip()
+    start += len(lines[0]) - len(head)
+    lines[0] = head
+    lines[-1] = lines[-1].rstrip()
+    block_type = classify_lines(lines) if classify else None
+    return Block(lines, block_type, start, end)
 
 def block_to_block_type(text):
-    if re.findall(r"^(?:\#{1,6}) (?!#)", text):
-        return block_type_heading
-    if text[:3] == "```" and text[-3:] == "```" and len(text) >= 6: 
-        return block_type_code
-    split_text = text.split("\n")
-    if text[0] == ">":
-        for line in split_text:
-            if not line[0] == ">":
+    return classify_lines(text.split("\n"))
+
+def classify_lines(lines):
+    # The first line picks the only candidate type, later lines just confirm it
+    first = lines[0]
+    if custom_block_types:
+        for block_type, detect in custom_block_types.get(first[:1], ()):
+            if detect(lines):
+                return block_type
+    if first[:1] == "#":
+        if heading_pattern.match(first):
+            return block_type_heading
+        return block_type_paragraph
+    if first[:3] == "```":
+        if lines[-1][-3:] == "```" and (len(lines) > 1 or len(first) >= 6):
+            return block_type_code
+        return block_type_paragraph
+    if first[:1] == ">":
+        for line in lines:
+            if line[:1] != ">":
                 return block_type_paragraph
         return block_type_quote
-    if text[:2] == "* " or text[:2] == "- ":
-        for line in split_text:
+    if first[:2] == "* " or first[:2] == "- ":
+        for line in lines:
             if line[:2] != "* " and line[:2] != "- ":
                 return block_type_paragraph
         return block_type_ulist
-    if text[:3] == "1. ":
+    if first[:3] == "1. ":
         counter = 1
-        for line in split_text:
-            if line[:3] != f"{counter}. ":
+        for line in lines:
+            dot = line.find(". ")
+            if dot < 1 or line[:dot] != str(counter):
                 return block_type_paragraph
             counter += 1
-        return block_type_olist    
+        return block_type_olist
     return block_type_paragraph
 
+def register_block_type(block_type, first_chars, detect, build):
+    # detect(lines) -> bool is only called for blocks starting with one of
+    # first_chars; build(lines, links) -> HTMLNode renders the block and
+    # passes links (None or a list of URLs) on to text_to_children
+    global renderer_version
+    for char in first_chars:
+        custom_block_types.setdefault(char, []).append((block_type, detect))
+    block_builders[block_type] = build
+    renderer_version += f"+{block_type}"
+
 def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
     children_nodes = []
-    for block in blocks:
+    for block in iter_markdown_blocks(markdown):
         html_node = block_to_node(block)
         children_nodes.append(html_node)
     return ParentNode("div", children_nodes)
 
-def block_to_node(block):
-    block_type = block_to_block_type(block)
-    if block_type == block_type_paragraph:
-        return make_paragraph_block(block)
-    if block_type == block_type_heading:
-        return make_heading_block(block)
-    if block_type == block_type_code:
-        return make_code_block(block)
-    if block_type == block_type_quote:
-        return make_quote_block(block)
-    if block_type == block_type_ulist:
-        return make_list_block(block, "ul")
-    if block_type == block_type_olist:
-        return make_list_block(block, "ol")
-    raise ValueError("Invalid block type")
-            
-def make_paragraph_block(block):
-    lines = block.split("\n")
+def blocks_to_html(blocks, cache=None, links=None):
+    # Render the <div> wrapper around each block as it arrives; with a cache,
+    # unchanged blocks are spliced in from a previous build. links, if given,
+    # is extended with the URL of every link and image rendered.
+    yield "<div>"
+    for block in blocks:
+        if cache is None:
+            yield from block_to_node(block, links=links).iter_html()
+            continue
+        text = block.text
+        key = cache.key(block_version(text), text)
+        html = cache.get(key)
+        # The URLs of a block are cached next to its HTML
+        links_key = cache.key(f"{renderer_version}+links", text) if links is not None and may_link(block) else None
+        urls = None
+        if html is not None and links_key is not None:
+            urls = cache.get(links_key)
+            if urls is None:
+                html = None
+        if html is None:
+            block_links = [] if links_key is not None else None
+            html = block_to_node(block, links=block_links).to_html()
+            cache.put(key, html)
+            if links_key is not None:
+                cache.put(links_key, json.dumps(block_links))
+                links.extend(block_links)
+        elif urls is not None:
+            links.extend(json.loads(urls))
+        yield html
+    yield "</div>"
+
+def markdown_links(markdown):
+    # URLs of the links and images markdown renders to
+    links = []
+    for block in iter_markdown_blocks(markdown):
+        if may_link(block):
+            block_to_node(block, links=links)
+    return links
+
+def may_link(block):
+    # Links in code blocks are not followed, see make_code_block
+    return "](" in block.text and (block.block_type or classify_lines(block.lines)) != block_type_code
+
+def block_version(text):
+    # Rendered images point at fingerprinted assets, so blocks containing one
+    # are cached per asset manifest
+    assets = get_assets()
+    if assets is not None and "![" in text:
+        return f"{renderer_version}+{assets.digest}"
+    return renderer_version
+
+def block_to_node(block, block_type=None, links=None):
+    # links, if given, is extended with the URL of every LINK and IMAGE text
+    # node the block renders
+    if isinstance(block, str):
+        lines = block.split("\n")
+    else:
+        lines = block.lines
+        block_type = block_type or block.block_type
+    if block_type is None:
+        block_type = classify_lines(lines)
+    build = block_builders.get(block_type)
+    if build is None:
+        raise ValueError("Invalid block type")
+    return build(lines, links)
+
+def make_paragraph_block(lines, links=None):
     paragraph = " ".join(lines)
-    children_nodes = text_to_children(paragraph)
+    children_nodes = text_to_children(paragraph, links)
     return ParentNode("p", children_nodes)
 
-def make_heading_block(block):
-    h_count = len(block.split(" ")[0])
-    children_nodes = text_to_children(block[h_count+1:])
+def make_heading_block(lines, links=None):
+    h_count = len(lines[0]) - len(lines[0].lstrip("#"))
+    children_nodes = text_to_children("\n".join(lines)[h_count+1:], links)
     return ParentNode(f"h{h_count}", children_nodes)
 
-def make_code_block(block):
-    cleaned_block = block[3:-3]
+def make_code_block(lines, links=None):
+    # links are not collected: code is an example rather than a reference,
+    # like the text of code spans
+    cleaned_block = "\n".join(lines)[3:-3]
     children_nodes = text_to_children(cleaned_block)
     code_block = ParentNode("code", children_nodes)
     return ParentNode("pre", [code_block])
 
-def make_quote_block(block):
-    lines = block.split("\n")
+def make_quote_block(lines, links=None):
     quotes = []
     for line in lines:
         quotes.append(line[1:].strip())
-    nodes = text_to_children(" ".join(quotes))
+    nodes = text_to_children(" ".join(quotes), links)
     return ParentNode("blockquote", nodes)
 
-def make_list_block(block, type):
+def make_list_block(lines, type, links=None):
     if type != "ul" and type != "ol":
         raise ValueError("Invalid list type")
-    lines = block.split("\n")
     items = []
     for line in lines:
         if type == "ul":
-            children_nodes = text_to_children(line[2:])
+            children_nodes = text_to_children(line[2:], links)
         else:
-            children_nodes = text_to_children(line[3:])
-            
+            children_nodes = text_to_children(line[line.find(". ") + 2:], links)
+
         items.append(ParentNode("li", children_nodes))
-    
+
     return ParentNode(type, items)
 
-def text_to_children(text):
+def text_to_children(text, links=None):
     # Transform inner text into TextNode
     text_nodes = text_to_textnodes(text)
+    if links is not None:
+        collect_urls(text_nodes, links)
     nodes = []
     # Loop through text_nodes and return LeafNodes list
     for tn in text_nodes:
         nodes.append(text_node_to_html_node(tn))
-    return nodes
\ No newline at end of file
+    return nodes
+
+def collect_urls(text_nodes, urls):
+    for node in text_nodes:
+        if node.text_type in (TextType.LINK, TextType.IMAGE):
+            urls.append(node.url)
+        if node.children:
+            collect_urls(node.children, urls)
+
+block_builders = {
+    block_type_paragraph: make_paragraph_block,
+    block_type_heading: make_heading_block,
+    block_type_code: make_code_block,
+    block_type_quote: make_quote_block,
+    block_type_ulist: lambda lines, links=None: make_list_block(lines, "ul", links),
+    block_type_olist: lambda lines, links=None: make_list_block(lines, "ol", links),
+}
@@ -0,0 +1,68 @@
+import itertools
+import os
+import tempfile
+
+# Read once while the process is still single threaded; mkstemp creates
+# files with mode 0600, outputs get the usual umask-based permissions
+_umask = os.umask(0)
+os.umask(_umask)
+
+
+def write_if_changed(dest_path, chunks):
+    # Compare the rendered chunks with the existing file as they arrive and
+    # only replace it when the bytes differ, so unchanged outputs keep their
+    # mtime. Returns True when the file was written.
+    # Only the length of the matching prefix is kept; on a mismatch it is
+    # copied back from the existing file, so memory stays flat either way.
+    chunks = (chunk.encode() for chunk in chunks)
+    matched = 0
+    try:
+        existing = open(dest_path, 'rb')
+    except FileNotFoundError:
+        write_atomic(dest_path, chunks)
+        return True
+    with existing:
+        for data in chunks:
+            if existing.read(len(data)) != data:
+                write_atomic(dest_path, itertools.chain(_read_prefix(existing, matched), [data], chunks))
+                return True
+            matched += len(data)
+        if existing.read(1) == b"":
+            return False
+        write_atomic(dest_path, _read_prefix(existing, matched))
+    return True
+
+
+def _read_prefix(file, length, block_size=1 << 16):
+    file.seek(0)
+    while length > 0:
+        data = file.read(min(block_size, length))
+        if not data:
+            break
+        length -= len(data)
+        yield data
+
+
+def write_atomic(dest_path, chunks):
+    # Write to a temporary file next to dest_path and rename it into place,
+    # so readers never see a partially written output
+    dest_dir_path = os.path.dirname(dest_path)
+    if dest_dir_path != "":
+        os.makedirs(dest_dir_path, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dest_dir_path or ".", prefix=f".{os.path.basename(dest_path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.writelines(chunks)
+        os.chmod(tmp_path, 0o666 & ~_umask)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def count_writes(results):
+    # results are write_if_changed return values
+    stats = {"written": 0, "unchanged": 0}
+    for written in results:
+        stats["written" if written else "unchanged"] += 1
+    return stats
@@ -0,0 +1,93 @@
+import asyncio
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from output import count_writes, write_if_changed
+
+
+def generate_pages_async(pages, render, jobs=1, io_workers=8, queue_size=32, links=None, pool_options=None):
+    # render(source, template_path) -> html runs in a process pool when jobs > 1
+    # and on a worker thread otherwise; with links, it returns (html, urls) and
+    # links maps sources to the urls. pool_options are passed on to the
+    # ProcessPoolExecutor.
+    return asyncio.run(run_pipeline(pages, render, jobs, io_workers, queue_size, links, pool_options))
+
+
+async def run_pipeline(pages, render, jobs=1, io_workers=8, queue_size=32, links=None, pool_options=None):
+    # Reads, renders and writes overlap; the bounded queues hold back the
+    # readers when rendering or writing falls behind, which caps memory use.
+    loop = asyncio.get_running_loop()
+    read_queue = asyncio.Queue(queue_size)
+    write_queue = asyncio.Queue(queue_size)
+    renderers = max(1, jobs)
+    failed = []
+    written = []
+
+    def fail(page):
+        print(f"Failed to generate page from {page[0]}:\n{traceback.format_exc()}")
+        failed.append(page[0])
+
+    async def reader(page_iter):
+        for page in page_iter:
+            try:
+                source = await loop.run_in_executor(io_pool, read_source, page[0])
+            except Exception:
+                fail(page)
+                continue
+            await read_queue.put((page, source))
+
+    async def read_stage():
+        # A fixed set of readers shares one iterator, so pages are only taken
+        # from it as fast as the read queue drains
+        page_iter = iter(pages)
+        await asyncio.gather(*(reader(page_iter) for _ in range(io_workers)))
+        for _ in range(renderers):
+            await read_queue.put(None)
+
+    async def render_stage():
+        while (item := await read_queue.get()) is not None:
+            page, source = item
+            try:
+                html = await loop.run_in_executor(render_pool, render, source, page[1])
+            except Exception:
+                fail(page)
+                continue
+            if links is not None:
+                html, links[page[0]] = html
+            await write_queue.put((page, html))
+
+    async def write_stage():
+        while (item := await write_queue.get()) is not None:
+            page, html = item
+            try:
+                written.append(await loop.run_in_executor(io_pool, write_if_changed, page[2], [html]))
+            except Exception:
+                fail(page)
+                continue
+            print(f"Generating page from {page[0]} to {page[2]} using {page[1]}")
+
+    io_pool = ThreadPoolExecutor(max_workers=io_workers)
+    # A single render thread keeps the event loop free for reads and writes
+    if jobs > 1:
+        render_pool = ProcessPoolExecutor(max_workers=jobs, **(pool_options or {}))
+    else:
+        render_pool = ThreadPoolExecutor(max_workers=1)
+    try:
+        writers = [asyncio.create_task(write_stage()) for _ in range(io_workers)]
+        await asyncio.gather(read_stage(), *(render_stage() for _ in range(renderers)))
+        for _ in writers:
+            await write_queue.put(None)
+        await asyncio.gather(*writers)
+    finally:
+        io_pool.shutdown()
+        render_pool.shutdown()
+    if failed:
+        raise Exception(f"{len(failed)} page(s) failed to generate: {', '.join(failed)}")
+    return count_writes(written)
+
+
+def read_source(path):
+    # Text mode, like iter_file_blocks, so \r\n sources render the same
+    with open(path, 'r') as file:
+        return file.read()
+
@@ -0,0 +1,141 @@
+import cProfile
+import heapq
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+phase_order = [
+    "static_copy",
+    "walk",
+    "read",
+    "block_split",
+    "block_classify",
+    "inline_parse",
+    "html_render",
+    "template_write",
+    "search",
+    "compress",
+]
+
+
+class BuildProfile:
+    def __init__(self, slowest=10):
+        self.slowest = slowest
+        # name -> [seconds, calls, net allocated blocks]
+        self.phases = {}
+        self.pages = []
+        self.page_count = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        # Allocation counts are the net change in live interpreter memory blocks
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, sys.getallocatedblocks() - blocks)
+
+    def add(self, name, seconds, blocks, calls=1):
+        phase = self.phases.setdefault(name, [0.0, 0, 0])
+        phase[0] += seconds
+        phase[1] += calls
+        phase[2] += blocks
+
+    def add_page(self, from_path, seconds, bytes_in, bytes_out):
+        self.page_count += 1
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+        page = (seconds, from_path, bytes_in, bytes_out)
+        # slowest=None keeps every page, e.g. in worker processes
+        if self.slowest is None or len(self.pages) < self.slowest:
+            heapq.heappush(self.pages, page)
+        elif self.slowest:
+            heapq.heappushpop(self.pages, page)
+
+    def to_dict(self):
+        return {"phases": self.phases, "pages": self.pages}
+
+    def merge(self, data):
+        # Fold in a profile collected with slowest=None by a worker process
+        for name, (seconds, calls, blocks) in data["phases"].items():
+            self.add(name, seconds, blocks, calls)
+        for seconds, from_path, bytes_in, bytes_out in data["pages"]:
+            self.add_page(from_path, seconds, bytes_in, bytes_out)
+
+    def report(self):
+        names = [n for n in phase_order if n in self.phases]
+        names += sorted(n for n in self.phases if n not in phase_order)
+        return {
+            "wall_seconds": time.perf_counter() - self.started,
+            "pages": self.page_count,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "phases": {
+                name: {
+                    "seconds": self.phases[name][0],
+                    "calls": self.phases[name][1],
+                    "net_allocated_blocks": self.phases[name][2],
+                }
+                for name in names
+            },
+            "slowest_pages": [
+                {"path": path, "seconds": seconds, "bytes_in": bytes_in, "bytes_out": bytes_out}
+                for seconds, path, bytes_in, bytes_out in sorted(self.pages, reverse=True)
+            ],
+        }
+
+    def write(self, path):
+        _write_json(self.report(), path)
+
+
+def profile_phase(profile, name):
+    if profile is None:
+        return nullcontext()
+    return profile.phase(name)
+
+
+def _write_json(data, path):
+    dir_path = os.path.dirname(path)
+    if dir_path != "":
+        os.makedirs(dir_path, exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump(data, file, indent=2)
+        file.write("\n")
+
+
+@contextmanager
+def profiled_run(cprofile_path=None, tracemalloc_path=None, top=50):
+    # Optional interpreter-level dumps around a whole build
+    profiler = cProfile.Profile() if cprofile_path else None
+    if tracemalloc_path:
+        tracemalloc.start()
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(cprofile_path)
+        if tracemalloc_path:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            _write_json(
+                {
+                    "current_bytes": current,
+                    "peak_bytes": peak,
+                    "top": [
+                        {"location": str(stat.traceback), "bytes": stat.size, "count": stat.count}
+                        for stat in snapshot.statistics("lineno")[:top]
+                    ],
+                },
+                tracemalloc_path,
+            )
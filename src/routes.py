@@ -0,0 +1,93 @@
+import os
+import posixpath
+from urllib.parse import urlsplit
+
+index_name = "index"
+
+
+class Route:
+    __slots__ = ("source", "template", "output", "url")
+
+    def __init__(self, source, template, output, url):
+        # output is the file below public, url the site path it is served at
+        self.source = source
+        self.template = template
+        self.output = output
+        self.url = url
+
+    def page(self):
+        return self.source, self.template, self.output
+
+    def __repr__(self):
+        return f"Route({self.url} -> {self.output} from {self.source})"
+
+
+def route_for(rel_path, pretty_urls=False):
+    # Map a content-relative source path ("blog/post.md") to the output path
+    # relative to public and its URL. Only the last extension is replaced;
+    # index pages and, with pretty_urls, every page become directory URLs.
+    rel_path = rel_path.replace(os.sep, "/")
+    dir_name, file_name = posixpath.split(rel_path)
+    stem = posixpath.splitext(file_name)[0]
+    if stem == index_name:
+        output = posixpath.join(dir_name, "index.html")
+        url = "/" + (dir_name + "/" if dir_name else "")
+    elif pretty_urls:
+        output = posixpath.join(dir_name, stem, "index.html")
+        url = "/" + posixpath.join(dir_name, stem) + "/"
+    else:
+        output = posixpath.join(dir_name, stem + ".html")
+        url = "/" + output
+    return output, url
+
+
+class RouteIndex:
+    # Every route of one build, looked up by source, output path or URL
+    def __init__(self, public_path):
+        self.public_path = public_path
+        self.by_source = {}
+        self.by_output = {}
+        self.by_url = {}
+
+    def __len__(self):
+        return len(self.by_source)
+
+    def __iter__(self):
+        return iter(self.by_source.values())
+
+    def add(self, route):
+        key = os.path.normpath(route.output)
+        existing = self.by_output.get(key)
+        if existing is not None:
+            raise ValueError(f"Route collision: {existing.source} and {route.source} both map to {route.url}")
+        self.by_source[route.source] = route
+        self.by_output[key] = route
+        self.by_url[route.url] = route
+        return route
+
+    def check_static(self, static_entries):
+        # Static files may not shadow (or be shadowed by) a page
+        for src, entry in static_entries.items():
+            route = self.by_output.get(os.path.normpath(entry["dest"]))
+            if route is not None:
+                raise ValueError(f"Route collision: {src} and {route.source} both map to {route.url}")
+
+    def pages(self):
+        return [route.page() for route in self.by_source.values()]
+
+    def source(self, from_path):
+        return self.by_source.get(from_path)
+
+    def output(self, path):
+        return self.by_output.get(os.path.normpath(path))
+
+    def url(self, url):
+        # Query strings and fragments are ignored; /a, /a/ and /a/index.html
+        # all find the index page of a
+        path = urlsplit(url).path or "/"
+        route = self.by_url.get(path)
+        if route is None and not path.endswith("/"):
+            route = self.by_url.get(path + "/")
+        if route is None and path.endswith("/index.html"):
+            route = self.by_url.get(path[:-len("index.html")])
+        return route
@@ -0,0 +1,182 @@
+import json
+import os
+import re
+
+from gencontent import find_title
+from inline_markdown import text_to_textnodes
+from manifest import file_entry, load_json, save_json
+from markdown_blocks import (
+    block_type_code,
+    block_type_heading,
+    block_type_olist,
+    block_type_quote,
+    block_type_ulist,
+    iter_markdown_blocks,
+)
+from output import write_if_changed
+
+search_version = 1
+term_pattern = re.compile(r"\w+")
+default_prefix_length = 2
+
+
+def new_search_state(prefix_length=default_prefix_length):
+    return {"version": search_version, "prefix": prefix_length, "docs": {}}
+
+
+def load_search_state(path, prefix_length=default_prefix_length):
+    # Tokenized pages of the previous build; anything unreadable or indexed
+    # with another format or prefix length starts over
+    state = load_json(path)
+    if state is None or state.get("version") != search_version or state.get("prefix") != prefix_length:
+        return new_search_state(prefix_length)
+    return state
+
+
+def save_search_state(state, path):
+    save_json(state, path, separators=(",", ":"))
+
+
+def block_texts(markdown):
+    # The text of every block as the renderer sees it: block markers are
+    # dropped the way make_*_block drops them, inline markup is resolved by
+    # text_to_textnodes. Code blocks are indexed verbatim.
+    for block in iter_markdown_blocks(markdown):
+        lines = block.lines
+        if block.block_type == block_type_code:
+            yield "\n".join(lines)[3:-3]
+            continue
+        if block.block_type == block_type_heading:
+            text = lines[0].lstrip("#") + " " + " ".join(lines[1:])
+        elif block.block_type == block_type_quote:
+            text = " ".join(line[1:].strip() for line in lines)
+        elif block.block_type == block_type_ulist:
+            text = " ".join(line[2:] for line in lines)
+        elif block.block_type == block_type_olist:
+            text = " ".join(line[line.find(". ") + 2:] for line in lines)
+        else:
+            text = " ".join(lines)
+        try:
+            nodes = text_to_textnodes(text)
+        except Exception:
+            # The page fails to render anyway, keep its raw words searchable
+            yield text
+            continue
+        for node in nodes:
+            yield node.text
+
+
+def page_terms(markdown):
+    # term -> positions of the term among all words of the page
+    terms = {}
+    position = 0
+    for text in block_texts(markdown):
+        for term in term_pattern.findall(text.lower()):
+            positions = terms.get(term)
+            if positions is None:
+                terms[term] = [position]
+            else:
+                positions.append(position)
+            position += 1
+    return terms
+
+
+def index_page(markdown):
+    title = find_title(markdown)
+    return {"title": title.strip() if title is not None else "", "terms": page_terms(markdown)}
+
+
+def update_search_state(state, routes):
+    # Re-tokenize only pages whose source changed since the last build.
+    # Document ids are stable so shards without changed terms keep their
+    # bytes; ids of removed pages are handed to new ones.
+    previous = state["docs"]
+    docs = {}
+    affected = set()
+    indexed = 0
+    prefix_length = state["prefix"]
+    for route in routes:
+        old = previous.get(route.source)
+        entry = file_entry(route.source, old)
+        if old is not None and old["hash"] == entry["hash"]:
+            # URLs and titles only live in meta.json, which is always compared
+            docs[route.source] = dict(old, size=entry["size"], mtime=entry["mtime"], url=route.url)
+            continue
+        with open(route.source, 'r') as file:
+            doc = index_page(file.read())
+        doc.update(entry, url=route.url, id=old["id"] if old is not None else None)
+        docs[route.source] = doc
+        indexed += 1
+        affected.update(term[:prefix_length] for term in doc["terms"])
+        if old is not None:
+            affected.update(term[:prefix_length] for term in old["terms"])
+    for src, old in previous.items():
+        if src not in docs:
+            affected.update(term[:prefix_length] for term in old["terms"])
+    used = {doc["id"] for doc in docs.values() if doc["id"] is not None}
+    free = (i for i in range(len(docs) + 1) if i not in used)
+    for src in sorted(docs):
+        if docs[src]["id"] is None:
+            docs[src]["id"] = next(free)
+    state["docs"] = docs
+    return {"indexed": indexed, "unchanged": len(docs) - indexed, "affected": affected}
+
+
+def shard_name(prefix):
+    # Prefixes are word characters; anything outside ASCII is hex encoded so
+    # shard file names stay portable
+    if prefix.isascii():
+        return prefix
+    return "x" + prefix.encode().hex()
+
+
+def build_postings(docs, prefix_length, prefixes=None):
+    # prefix -> term -> [[doc id, first position, delta, ...], ...] ordered by
+    # doc id; prefixes limits the result to the shards that need rewriting
+    shards = {}
+    for doc in sorted(docs.values(), key=lambda doc: doc["id"]):
+        for term, positions in doc["terms"].items():
+            prefix = term[:prefix_length]
+            if prefixes is not None and prefix not in prefixes:
+                continue
+            deltas = [doc["id"], positions[0]]
+            deltas += [b - a for a, b in zip(positions, positions[1:])]
+            shards.setdefault(prefix, {}).setdefault(term, []).append(deltas)
+    return shards
+
+
+def all_prefixes(docs, prefix_length):
+    return {term[:prefix_length] for doc in docs.values() for term in doc["terms"]}
+
+
+def dump_compact(data):
+    return json.dumps(data, separators=(",", ":"), sort_keys=True, ensure_ascii=False)
+
+
+def write_search_index(state, search_path, affected=None):
+    # search_path/meta.json lists the documents and maps each term prefix to
+    # its shard; a browser fetches meta.json once and a shard per new prefix.
+    # Only shards in affected (all when None) are rebuilt and compared.
+    docs = state["docs"]
+    prefix_length = state["prefix"]
+    prefixes = all_prefixes(docs, prefix_length)
+    shard_files = {prefix: f"terms-{shard_name(prefix)}.json" for prefix in prefixes}
+    if affected is None:
+        affected = prefixes
+    else:
+        affected = {p for p in affected if p in prefixes}
+        affected.update(p for p, name in shard_files.items() if not os.path.isfile(os.path.join(search_path, name)))
+    documents = [None] * (max((doc["id"] for doc in docs.values()), default=-1) + 1)
+    for doc in docs.values():
+        documents[doc["id"]] = [doc["url"], doc["title"]]
+    meta = {"version": search_version, "prefix": prefix_length, "docs": documents, "shards": shard_files}
+    os.makedirs(search_path, exist_ok=True)
+    written = 0
+    if write_if_changed(os.path.join(search_path, "meta.json"), [dump_compact(meta)]):
+        written += 1
+    for prefix, terms in build_postings(docs, prefix_length, affected).items():
+        if write_if_changed(os.path.join(search_path, shard_files[prefix]), [dump_compact(terms)]):
+            written += 1
+    outputs = [os.path.join(search_path, "meta.json")]
+    outputs += [os.path.join(search_path, name) for name in shard_files.values()]
+    return outputs, written
@@ -0,0 +1,112 @@
+import hashlib
+import heapq
+import json
+import os
+
+from manifest import hash_file, remove_stale_outputs
+from output import write_atomic
+
+shard_manifest_name = ".shard.json"
+
+
+def parse_shard(text):
+    # "i/N" with 1 <= i <= N
+    index, sep, count = text.partition("/")
+    if not sep or not index.isdigit() or not count.isdigit():
+        raise ValueError(f"Invalid shard {text!r}, expected i/N")
+    index, count = int(index), int(count)
+    if not 1 <= index <= count:
+        raise ValueError(f"Invalid shard {text!r}, i must be between 1 and N")
+    return index, count
+
+
+def shard_key(from_path, dir_path_content):
+    # Stable across machines and checkout locations
+    rel_path = os.path.relpath(from_path, dir_path_content).replace(os.sep, "/")
+    return hashlib.sha256(rel_path.encode()).hexdigest()
+
+
+def assign_shards(pages, dir_path_content, count):
+    # Largest pages first onto the least loaded shard, ties broken by the
+    # path hash, so every shard computes the same disjoint partition
+    weighted = sorted(
+        (-os.path.getsize(page[0]), shard_key(page[0], dir_path_content), page) for page in pages
+    )
+    shards = [[] for _ in range(count)]
+    loads = [(0, idx) for idx in range(count)]
+    for size, _, page in weighted:
+        load, idx = heapq.heappop(loads)
+        shards[idx].append(page)
+        heapq.heappush(loads, (load - size, idx))
+    return shards
+
+
+def select_shard(pages, dir_path_content, index, count):
+    return assign_shards(pages, dir_path_content, count)[index - 1]
+
+
+def write_shard_manifest(shard_path, index, count, pages):
+    # Records which sources this shard rendered and a hash of every output
+    outputs = {}
+    for dir_path, _, file_names in os.walk(shard_path):
+        for name in file_names:
+            path = os.path.join(dir_path, name)
+            rel_path = os.path.relpath(path, shard_path).replace(os.sep, "/")
+            if rel_path != shard_manifest_name:
+                outputs[rel_path] = hash_file(path)
+    data = {
+        "shard": [index, count],
+        "pages": {
+            os.path.normpath(from_path): os.path.relpath(to_path, shard_path).replace(os.sep, "/")
+            for from_path, _, to_path in pages
+        },
+        "outputs": outputs,
+    }
+    write_atomic(os.path.join(shard_path, shard_manifest_name), [json.dumps(data, indent=1, sort_keys=True).encode()])
+    return data
+
+
+def load_shard_manifest(shard_path):
+    path = os.path.join(shard_path, shard_manifest_name)
+    if not os.path.isfile(path):
+        raise ValueError(f"{shard_path} has no {shard_manifest_name}, was it built with --shard?")
+    with open(path, 'r') as file:
+        return json.load(file)
+
+
+def merge_shards(shard_paths, public_path):
+    # Combine shard outputs into public_path; any output or source claimed by
+    # two shards with different content is a conflict and nothing is written
+    manifests = [load_shard_manifest(path) for path in shard_paths]
+    counts = {data["shard"][1] for data in manifests}
+    indexes = sorted(data["shard"][0] for data in manifests)
+    if len(counts) != 1 or indexes != list(range(1, counts.pop() + 1)):
+        raise ValueError(f"Expected every shard exactly once, got {', '.join(f'{i}/{n}' for i, n in (d['shard'] for d in manifests))}")
+    conflicts = []
+    sources = {}
+    outputs = {}
+    for shard_path, data in zip(shard_paths, manifests):
+        for from_path in data["pages"]:
+            if from_path in sources:
+                conflicts.append(f"{from_path} rendered by {sources[from_path]} and {shard_path}")
+            sources[from_path] = shard_path
+        for rel_path, digest in data["outputs"].items():
+            previous = outputs.get(rel_path)
+            if previous is not None and previous[1] != digest:
+                conflicts.append(f"{rel_path} differs between {previous[0]} and {shard_path}")
+            outputs.setdefault(rel_path, (shard_path, digest))
+    if conflicts:
+        raise ValueError("Shard merge conflicts:\n" + "\n".join(conflicts))
+    stats = {"copied": 0, "unchanged": 0, "removed": 0}
+    for rel_path, (shard_path, digest) in sorted(outputs.items()):
+        dest_path = os.path.join(public_path, rel_path)
+        if os.path.isfile(dest_path) and hash_file(dest_path) == digest:
+            stats["unchanged"] += 1
+            continue
+        with open(os.path.join(shard_path, rel_path), 'rb') as file:
+            write_atomic(dest_path, iter(lambda: file.read(1 << 16), b""))
+        stats["copied"] += 1
+    os.makedirs(public_path, exist_ok=True)
+    expected = [os.path.join(public_path, rel_path) for rel_path in outputs]
+    stats["removed"] = len(remove_stale_outputs(public_path, expected))
+    return stats
@@ -0,0 +1,114 @@
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from manifest import hash_file
+from walker import walk_tree
+
+# ioctl request number for FICLONE on Linux (copy-on-write reflink)
+ficlone = 0x40049409
+
+
+def sync_static(
+    static_path, public_path, previous_entries=None, checksum=False, hardlink=False, workers=None, exclude=None
+):
+    # Mirror static_path into public_path, copying only files that differ and
+    # removing files that were synced before but no longer exist in static.
+    # Hidden files such as .well-known/ are copied, editor temp files are not.
+    previous_entries = previous_entries or {}
+    entries = {}
+    tasks = []
+    unchanged = 0
+    os.makedirs(public_path, exist_ok=True)
+    files = walk_tree(
+        static_path,
+        public_path,
+        exclude=exclude,
+        skip_hidden=False,
+        enter=lambda src_dir, dest_dir, _: os.makedirs(dest_dir, exist_ok=True),
+    )
+    for file_path, file_destination, dir_entry, _ in files:
+        file_destination = os.path.normpath(file_destination)
+        st = dir_entry.stat()
+        entries[file_path] = {"size": st.st_size, "mtime": st.st_mtime_ns, "dest": file_destination}
+        if is_unchanged(file_path, st, file_destination, checksum):
+            unchanged += 1
+        else:
+            tasks.append((file_path, file_destination))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda task: copy_file(*task, hardlink=hardlink), tasks))
+    current = {entry["dest"] for entry in entries.values()}
+    removed = 0
+    for entry in previous_entries.values():
+        if os.path.normpath(entry["dest"]) not in current and os.path.isfile(entry["dest"]):
+            os.remove(entry["dest"])
+            removed += 1
+    return entries, {"copied": len(tasks), "unchanged": unchanged, "removed": removed}
+
+
+def is_unchanged(src_path, src_stat, dest_path, checksum=False):
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    if dest_stat.st_size != src_stat.st_size:
+        return False
+    if dest_stat.st_mtime_ns == src_stat.st_mtime_ns:
+        return True
+    if checksum and hash_file(src_path) == hash_file(dest_path):
+        # Same bytes, so only bring the mtime in line for the next fast check
+        os.utime(dest_path, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+        return True
+    return False
+
+
+def copy_file(src_path, dest_path, hardlink=False):
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+    if hardlink:
+        try:
+            os.link(src_path, dest_path)
+            return "hardlink"
+        except OSError:
+            pass
+    with open(src_path, 'rb') as src, open(dest_path, 'wb') as dest:
+        if _reflink(src, dest):
+            method = "reflink"
+        else:
+            method = _copy_range(src, dest)
+    shutil.copystat(src_path, dest_path)
+    return method
+
+
+def _reflink(src, dest):
+    try:
+        import fcntl
+        fcntl.ioctl(dest.fileno(), ficlone, src.fileno())
+    except (ImportError, OSError):
+        return False
+    return True
+
+
+def _copy_range(src, dest):
+    # Zero-copy transfers first, then a plain buffered copy
+    size = os.fstat(src.fileno()).st_size
+    for method in ("copy_file_range", "sendfile"):
+        if not hasattr(os, method):
+            continue
+        try:
+            offset = 0
+            while offset < size:
+                if method == "copy_file_range":
+                    sent = os.copy_file_range(src.fileno(), dest.fileno(), size - offset, offset, offset)
+                else:
+                    sent = os.sendfile(dest.fileno(), src.fileno(), offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+            return method
+        except OSError:
+            dest.truncate(0)
+    src.seek(0)
+    dest.seek(0)
+    shutil.copyfileobj(src, dest)
+    return "copy"
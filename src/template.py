@@ -0,0 +1,128 @@
+import os
+import re
+
+slot_pattern = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+extends_pattern = re.compile(r"^\s*\{%\s*extends\s+\"([^\"]+)\"\s*%\}")
+include_pattern = re.compile(r"\{%\s*include\s+\"([^\"]+)\"\s*%\}")
+block_pattern = re.compile(r"\{%\s*block\s+(\w+)\s*%\}(.*?)\{%\s*endblock(?:\s+\w+)?\s*%\}", re.DOTALL)
+
+directory_template_name = "_template.html"
+
+
+class Template:
+    def __init__(self, segments, slots, dependencies):
+        # segments holds the literal text; slots maps segment index -> slot name
+        self.segments = segments
+        self.slots = slots
+        self.dependencies = dependencies
+
+    def render(self, context):
+        return "".join(self.stream(context))
+
+    def stream(self, context):
+        # Slot values may be strings or iterables of chunks, e.g. node.iter_html()
+        for idx, segment in enumerate(self.segments):
+            name = self.slots.get(idx)
+            value = None if name is None else context.get(name)
+            if value is None:
+                yield segment
+            elif isinstance(value, str):
+                yield value
+            else:
+                yield from value
+
+    def rewrite(self, func):
+        # Copy with every literal segment passed through func
+        segments = [s if idx in self.slots else func(s) for idx, s in enumerate(self.segments)]
+        return Template(segments, self.slots, self.dependencies)
+
+    def __repr__(self):
+        return f"Template({len(self.segments)} segments, slots: {list(self.slots.values())})"
+
+
+def compile_template(template_path):
+    dependencies = []
+    source = _resolve_layout(template_path, dependencies, [])
+    source = block_pattern.sub(lambda m: m.group(2), source)
+    segments = []
+    slots = {}
+    pos = 0
+    for match in slot_pattern.finditer(source):
+        segments.append(source[pos:match.start()])
+        # Unfilled slots render as their original text
+        slots[len(segments)] = match.group(1)
+        segments.append(match.group(0))
+        pos = match.end()
+    segments.append(source[pos:])
+    return Template(segments, slots, dependencies)
+
+
+def _read_source(path, dependencies, stack):
+    path = os.path.normpath(path)
+    if path in stack:
+        raise ValueError(f"Template cycle: {' -> '.join(stack + [path])}")
+    with open(path, 'r') as file:
+        source = file.read()
+    if path not in dependencies:
+        dependencies.append(path)
+    base_dir = os.path.dirname(path)
+    stack = stack + [path]
+    return include_pattern.sub(
+        lambda m: _read_source(os.path.join(base_dir, m.group(1)), dependencies, stack),
+        source,
+    )
+
+
+def _resolve_layout(path, dependencies, stack):
+    source = _read_source(path, dependencies, stack)
+    match = extends_pattern.match(source)
+    if not match:
+        return source
+    # Child blocks override the parent's blocks, everything else is dropped
+    blocks = {m.group(1): m.group(2) for m in block_pattern.finditer(source)}
+    parent_path = os.path.join(os.path.dirname(path), match.group(1))
+    parent = _resolve_layout(parent_path, dependencies, stack + [os.path.normpath(path)])
+    return block_pattern.sub(
+        lambda m: f"{{% block {m.group(1)} %}}{blocks.get(m.group(1), m.group(2))}{{% endblock %}}",
+        parent,
+    )
+
+
+class TemplateCache:
+    def __init__(self):
+        self.templates = {}
+
+    def get(self, template_path):
+        cached = self.templates.get(template_path)
+        if cached is not None:
+            mtimes, template = cached
+            if mtimes == _mtimes(template.dependencies):
+                return template
+        template = compile_template(template_path)
+        self.templates[template_path] = (_mtimes(template.dependencies), template)
+        return template
+
+    def clear(self):
+        self.templates.clear()
+
+
+def _mtimes(paths):
+    try:
+        return [os.stat(p).st_mtime_ns for p in paths]
+    except FileNotFoundError:
+        return None
+
+
+template_cache = TemplateCache()
+
+
+def get_template(template_path):
+    return template_cache.get(template_path)
+
+
+def directory_template(dir_path, template_path):
+    # A _template.html inside a content directory applies to its whole subtree
+    candidate = os.path.join(dir_path, directory_template_name)
+    if os.path.isfile(candidate):
+        return candidate
+    return template_path
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+
+from assets import (
+    AssetManifest,
+    disable_assets,
+    enable_assets,
+    fingerprint_static,
+    fingerprinted_path,
+    hash_assets,
+)
+from manifest import hash_file
+from staticsync import sync_static
+from template import Template
+from textnode import TextNode, TextType, text_node_to_html_node
+
+
+class TestFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        os.makedirs(os.path.join(self.static, "css"))
+        for name, text in (("css/site.css", "body {}"), ("robots.txt", "User-agent: *")):
+            with open(os.path.join(self.static, name), 'w') as file:
+                file.write(text)
+        self.entries, _ = sync_static(self.static, self.public)
+
+    def test_fingerprinted_path(self):
+        self.assertEqual(fingerprinted_path("css/index.css", "3f9a1c8b00ff"), "css/index.3f9a1c8b.css")
+
+    def test_hashes_are_cached_by_mtime(self):
+        src = os.path.join(self.static, "css", "site.css")
+        hashes, hashed = hash_assets([src])
+        self.assertEqual((hashes[src]["hash"], hashed), (hash_file(src), 1))
+        stale = dict(hashes[src], hash="cached")
+        hashes, hashed = hash_assets([src], {src: stale})
+        self.assertEqual((hashes[src]["hash"], hashed), ("cached", 0))
+        os.utime(src, ns=(0, 0))
+        hashes, hashed = hash_assets([src], {src: stale})
+        self.assertEqual((hashes[src]["hash"], hashed), (hash_file(src), 1))
+
+    def test_fingerprint_static(self):
+        assets, hashes, outputs, stats = fingerprint_static(self.entries, self.public)
+        target = fingerprinted_path("css/site.css", next(iter(hashes.values()))["hash"])
+        self.assertEqual(assets.urls, {"/css/site.css": "/" + target})
+        self.assertEqual(outputs, [os.path.join(self.public, target)])
+        with open(outputs[0], 'r') as file:
+            self.assertEqual(file.read(), "body {}")
+        self.assertEqual(stats, {"hashed": 1, "copied": 1, "unchanged": 0})
+        _, _, _, stats = fingerprint_static(self.entries, self.public, hashes)
+        self.assertEqual(stats, {"hashed": 0, "copied": 0, "unchanged": 1})
+
+
+class TestAssetManifest(unittest.TestCase):
+    def setUp(self):
+        self.assets = AssetManifest({"/index.css": "/index.abc.css", "/img/a.png": "/img/a.def.png"})
+
+    def test_url(self):
+        self.assertEqual(self.assets.url("/index.css"), "/index.abc.css")
+        self.assertEqual(self.assets.url("/img/a.png?v=1#x"), "/img/a.def.png?v=1#x")
+        self.assertEqual(self.assets.url("img/a.png"), "img/a.png")
+        self.assertEqual(self.assets.url("//cdn.example.com/index.css"), "//cdn.example.com/index.css")
+
+    def test_template(self):
+        template = Template(['<link href="/index.css"><a href="/other.css">', "{{ Content }}", ""], {1: "Content"}, [])
+        rewritten = self.assets.template(template)
+        self.assertIs(self.assets.template(template), rewritten)
+        self.assertEqual(
+            rewritten.render({"Content": 'src="/index.css"'}),
+            '<link href="/index.abc.css"><a href="/other.css">src="/index.css"',
+        )
+
+    def test_image_nodes(self):
+        node = TextNode("alt", TextType.IMAGE, "/img/a.png")
+        enable_assets(self.assets)
+        self.addCleanup(disable_assets)
+        self.assertEqual(text_node_to_html_node(node).props["src"], "/img/a.def.png")
+        disable_assets()
+        self.assertEqual(text_node_to_html_node(node).props["src"], "/img/a.png")
+
+    def test_changed_urls(self):
+        self.assertEqual(self.assets.changed_urls({"/index.css": "/index.old.css", "/gone.js": "/gone.1.js"}), {
+            "/index.css", "/gone.js", "/img/a.png",
+        })
+
+
+if __name__ == "__main__":
+    unittest.main()
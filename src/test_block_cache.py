@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import markdown_blocks
+from block_cache import BlockCache
+from markdown_blocks import blocks_to_html, iter_markdown_blocks
+
+
+def fill_cache(path, worker):
+    cache = BlockCache(path)
+    for i in range(20):
+        cache.put(cache.key("1", f"{worker}-{i}"), f"<p>{worker}-{i}</p>")
+        cache.flush()
+    cache.close()
+
+
+class TestBlockCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache", "blocks.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_across_instances(self):
+        cache = BlockCache(self.path)
+        key = cache.key("1", "Hello **world**")
+        self.assertIsNone(cache.get(key))
+        cache.put(key, "<p>Hello <b>world</b></p>")
+        cache.close()
+        cache = BlockCache(self.path)
+        self.assertEqual(cache.get(key), "<p>Hello <b>world</b></p>")
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+        cache.close()
+
+    def test_key_depends_on_version(self):
+        cache = BlockCache(self.path)
+        self.assertNotEqual(cache.key("1", "text"), cache.key("2", "text"))
+
+    def test_evict_least_recently_used(self):
+        cache = BlockCache(self.path, max_bytes=10)
+        for i in range(3):
+            cache.put(str(i), "12345")
+            cache.flush()
+        cache.get("0")
+        self.assertEqual(cache.evict(), 1)
+        self.assertIsNone(cache.get("1"))
+        self.assertEqual(cache.get("0"), "12345")
+        self.assertEqual(cache.get("2"), "12345")
+        cache.close()
+
+    def test_concurrent_workers(self):
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            list(executor.map(fill_cache, [self.path] * 4, range(4)))
+        cache = BlockCache(self.path)
+        for worker in range(4):
+            self.assertEqual(cache.get(cache.key("1", f"{worker}-19")), f"<p>{worker}-19</p>")
+        cache.close()
+
+    def test_blocks_to_html_uses_cache(self):
+        md = "# Title\n\nSome **bold** text\n\n- a\n- b"
+        expected = "".join(blocks_to_html(iter_markdown_blocks(md)))
+        cache = BlockCache(self.path)
+        self.assertEqual("".join(blocks_to_html(iter_markdown_blocks(md), cache)), expected)
+        self.assertEqual((cache.hits, cache.misses), (0, 3))
+        self.assertEqual("".join(blocks_to_html(iter_markdown_blocks(md), cache)), expected)
+        self.assertEqual((cache.hits, cache.misses), (3, 3))
+        cache.close()
+
+    def test_links_are_cached(self):
+        md = "[a](/a) ![b](/b.png)\n\n```\n[c](/c)\n```"
+        cache = BlockCache(self.path)
+        for _ in range(2):
+            links = []
+            "".join(blocks_to_html(iter_markdown_blocks(md), cache, links))
+            self.assertEqual(links, ["/a", "/b.png"])
+        self.assertEqual(cache.hits, 3)
+        cache.close()
+
+    def test_cached_fragment_is_spliced_in(self):
+        cache = BlockCache(self.path)
+        cache.put(cache.key(markdown_blocks.renderer_version, "Hello"), "<p>cached</p>")
+        html = "".join(blocks_to_html(iter_markdown_blocks("Hello"), cache))
+        self.assertEqual(html, "<div><p>cached</p></div>")
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
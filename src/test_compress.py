@@ -0,0 +1,68 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from compress import compress_files, compress_outputs, is_sidecar, with_sidecars
+from fixtures import write
+
+
+class TestCompressOutputs(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        write(os.path.join(self.root, "index.html"), "<p>" + "hello " * 200 + "</p>")
+        write(os.path.join(self.root, "small.css"), "a{}")
+        write(os.path.join(self.root, "images/logo.png"), "png" * 500)
+        write(os.path.join(self.root, "data.tar.gz"), "archive")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def files(self):
+        return sorted(
+            os.path.relpath(os.path.join(d, f), self.root) for d, _, files in os.walk(self.root) for f in files
+        )
+
+    def test_compresses_text_outputs_above_threshold(self):
+        stats = compress_outputs(self.root, min_size=100, encodings=["gzip"])
+        self.assertEqual(stats, {"compressed": 1, "unchanged": 0, "removed": 0})
+        self.assertIn("index.html.gz", self.files())
+        self.assertNotIn("small.css.gz", self.files())
+        with open(os.path.join(self.root, "index.html.gz"), 'rb') as file:
+            self.assertEqual(gzip.decompress(file.read()).decode(), "<p>" + "hello " * 200 + "</p>")
+
+    def test_skips_current_sidecars(self):
+        compress_outputs(self.root, min_size=100, encodings=["gzip"])
+        stats = compress_outputs(self.root, min_size=100, encodings=["gzip"])
+        self.assertEqual(stats, {"compressed": 0, "unchanged": 1, "removed": 0})
+        page = write(os.path.join(self.root, "index.html"), "<p>" + "changed " * 200 + "</p>")
+        os.utime(page, ns=(1, 1))
+        stats = compress_outputs(self.root, min_size=100, encodings=["gzip"])
+        self.assertEqual(stats["compressed"], 1)
+
+    def test_removes_orphaned_sidecars(self):
+        compress_outputs(self.root, min_size=100, encodings=["gzip"])
+        os.remove(os.path.join(self.root, "index.html"))
+        stats = compress_outputs(self.root, min_size=100, encodings=["gzip"])
+        self.assertEqual(stats["removed"], 1)
+        self.assertEqual(self.files(), ["data.tar.gz", os.path.join("images", "logo.png"), "small.css"])
+
+    def test_compress_files(self):
+        page = os.path.join(self.root, "index.html")
+        stats = compress_files([page, os.path.join(self.root, "small.css")], min_size=100, encodings=["gzip"])
+        self.assertEqual(stats, {"compressed": 1, "unchanged": 0, "removed": 0})
+        self.assertNotIn(os.path.join("images", "logo.png.gz"), self.files())
+        os.remove(page)
+        stats = compress_files([page], min_size=100, encodings=["gzip"])
+        self.assertEqual(stats, {"compressed": 0, "unchanged": 0, "removed": 1})
+        self.assertNotIn("index.html.gz", self.files())
+
+    def test_sidecar_names(self):
+        self.assertTrue(is_sidecar("a/index.html.gz"))
+        self.assertFalse(is_sidecar("data.tar.gz"))
+        self.assertEqual(with_sidecars(["a.html"], ["gzip"]), ["a.html", "a.html.gz"])
+
+
+if __name__ == "__main__":
+    unittest.main()
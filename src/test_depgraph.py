@@ -0,0 +1,126 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from depgraph import affected_pages, changed_outputs, dependents, resolve_reference, resolve_references
+from fixtures import write
+from gencontent import generate_pages_incremental
+from manifest import new_manifest
+from markdown_blocks import markdown_links
+from staticsync import sync_static
+
+
+class TestReferences(unittest.TestCase):
+    def test_resolve_reference(self):
+        page = os.path.join("public", "blog", "post.html")
+        self.assertEqual(resolve_reference("/images/a.png", page, "public"), os.path.join("public", "images", "a.png"))
+        self.assertEqual(resolve_reference("b.png?v=1#x", page, "public"), os.path.join("public", "blog", "b.png"))
+        self.assertEqual(resolve_reference("/", page, "public"), os.path.join("public", "index.html"))
+        self.assertEqual(resolve_reference("../about", page, "public"), os.path.join("public", "about", "index.html"))
+        self.assertIsNone(resolve_reference("https://example.com/a.png", page, "public"))
+        self.assertIsNone(resolve_reference("#top", page, "public"))
+
+    def test_resolve_references(self):
+        md = "![img](/a.png) and [home](/) and [ext](https://x.org) and [again](/)"
+        refs = resolve_references(markdown_links(md), os.path.join("public", "index.html"), "public")
+        self.assertEqual(refs, [os.path.join("public", "a.png"), os.path.join("public", "index.html")])
+
+    def test_links_in_code_are_skipped(self):
+        md = "[a](/a) and `[b](/b)`\n\n```\n[c](/c)\n```\n\n> **[d](/d)**"
+        refs = resolve_references(markdown_links(md), os.path.join("public", "index.html"), "public")
+        self.assertEqual(refs, [os.path.join("public", "a", "index.html"), os.path.join("public", "d", "index.html")])
+
+    def test_template_asset_edges(self):
+        css = os.path.join("public", "index.css")
+        manifest = {
+            "static": {os.path.join("static", "index.css"): {"dest": css}},
+            "templates": {"t.html": {"files": {"t.html": {}}, "assets": [css]}, "u.html": {"files": {"u.html": {}}}},
+            "pages": {"a.md": {"template": "t.html", "refs": []}, "b.md": {"template": "u.html", "refs": []}},
+        }
+        self.assertEqual(dependents(manifest, os.path.join("static", "index.css")), ["a.md"])
+
+    def test_changed_outputs(self):
+        previous = {"a": {"dest": "./p/a", "size": 1, "mtime": 1}, "b": {"dest": "p/b", "size": 1, "mtime": 1}}
+        current = {"a": {"dest": "p/a", "size": 1, "mtime": 2}, "c": {"dest": "p/c", "size": 1, "mtime": 1}}
+        self.assertEqual(changed_outputs(previous, current), {"p/a", "p/b", "p/c"})
+
+
+class TestIncrementalDependencies(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.public = os.path.join(self.root, "public")
+        self.template = os.path.join(self.root, "template.html")
+        write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        write(os.path.join(self.static, "images", "logo.png"), "png")
+        write(os.path.join(self.content, "index.md"), "# Home\n\n![logo](/images/logo.png)")
+        write(os.path.join(self.content, "blog", "index.md"), "# Blog\n\n[about](/about)")
+        write(os.path.join(self.content, "plain.md"), "# Plain\n\nText")
+        self.manifest = new_manifest()
+        self.build()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self):
+        # Returns the pages that were regenerated
+        previous_static = self.manifest["static"]
+        self.manifest["static"], _ = sync_static(self.static, self.public, previous_static)
+        out = io.StringIO()
+        with redirect_stdout(out):
+            generate_pages_incremental(
+                self.content,
+                self.template,
+                self.public,
+                self.manifest,
+                changed_static=changed_outputs(previous_static, self.manifest["static"]),
+            )
+        return sorted(line.split()[3] for line in out.getvalue().splitlines())
+
+    def test_nothing_changed(self):
+        self.assertEqual(self.build(), [])
+
+    def test_edit_only_rebuilds_page(self):
+        write(os.path.join(self.content, "plain.md"), "# Plain\n\nEdited")
+        self.assertEqual(self.build(), [os.path.join(self.content, "plain.md")])
+
+    def test_refs_come_from_rendered_links(self):
+        write(os.path.join(self.content, "plain.md"), "# Plain\n\n[blog](/blog/) `[no](/no)`")
+        self.build()
+        blog = os.path.join(self.public, "blog", "index.html")
+        self.assertEqual(self.manifest["pages"][os.path.join(self.content, "plain.md")]["refs"], [blog])
+
+    def test_renamed_asset_rebuilds_referencing_pages(self):
+        images = os.path.join(self.static, "images")
+        os.rename(os.path.join(images, "logo.png"), os.path.join(images, "logo2.png"))
+        self.assertEqual(self.build(), [os.path.join(self.content, "index.md")])
+
+    def test_added_page_rebuilds_linking_pages(self):
+        write(os.path.join(self.content, "about", "index.md"), "# About\n\nMe")
+        rebuilt = self.build()
+        self.assertEqual(
+            rebuilt,
+            [os.path.join(self.content, "about", "index.md"), os.path.join(self.content, "blog", "index.md")],
+        )
+
+    def test_template_rebuilds_everything(self):
+        write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(len(self.build()), 3)
+
+    def test_dependents_query(self):
+        self.assertEqual(dependents(self.manifest, self.template), sorted(self.manifest["pages"]))
+        logo = os.path.join(self.static, "images", "logo.png")
+        self.assertEqual(dependents(self.manifest, logo), [os.path.join(self.content, "index.md")])
+        plain = os.path.join(self.content, "plain.md")
+        self.assertEqual(dependents(self.manifest, plain), [plain])
+        self.assertEqual(
+            affected_pages(self.manifest, [plain, logo]), sorted([os.path.join(self.content, "index.md"), plain])
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
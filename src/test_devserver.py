@@ -0,0 +1,101 @@
+import gzip
+import os
+import tempfile
+import threading
+import unittest
+import urllib.request
+
+from compress import compress_outputs
+from devserver import ReloadBroker, changed_paths, livereload_script, make_server, snapshot
+from fixtures import write
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_snapshot_files_and_dirs(self):
+        page = write(os.path.join(self.root, "content/a/index.md"), "# A")
+        template = write(os.path.join(self.root, "template.html"), "t")
+        state = snapshot([os.path.join(self.root, "content"), template, os.path.join(self.root, "missing")])
+        self.assertEqual(sorted(state), sorted([page, template]))
+
+    def test_snapshot_reuses_listings(self):
+        content = os.path.join(self.root, "content")
+        page = write(os.path.join(self.root, "content/a/index.md"), "# A")
+        listings = {}
+        before = snapshot([content], listings)
+        self.assertIn(content, listings)
+        # Old enough for the listings to be trusted
+        for dir_path in listings:
+            os.utime(dir_path, ns=(0, 0))
+        before = snapshot([content], listings)
+        write(os.path.join(self.root, "content/a/index.md"), "# Edited")
+        added = write(os.path.join(self.root, "content/b.md"), "# B")
+        self.assertEqual(changed_paths(before, snapshot([content], listings)), sorted([page, added]))
+
+    def test_changed_paths(self):
+        before = {"a": (1, 1), "b": (1, 1), "c": (1, 1)}
+        after = {"a": (1, 1), "b": (2, 1), "d": (1, 1)}
+        self.assertEqual(changed_paths(before, after), ["b", "c", "d"])
+
+    def test_broker_wait(self):
+        broker = ReloadBroker()
+        self.assertEqual(broker.wait(0, 0.01), 0)
+        threading.Timer(0.01, broker.notify).start()
+        self.assertEqual(broker.wait(0, 5), 1)
+
+
+class TestDevServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.tmp.name, "index.html"), 'w') as file:
+            file.write("<html><body><p>hi</p></body></html>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def fetch(self, broker, path="/", headers=None, raw=False):
+        server = make_server(self.tmp.name, 0, broker, host="127.0.0.1")
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}{path}"
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers or {})) as response:
+                if raw:
+                    return response.headers, response.read()
+                return response.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_injects_reload_script(self):
+        body = self.fetch(ReloadBroker())
+        self.assertEqual(body, f"<html><body><p>hi</p>{livereload_script}</body></html>")
+
+    def test_plain_serving_without_broker(self):
+        self.assertEqual(self.fetch(None), "<html><body><p>hi</p></body></html>")
+
+    def test_serves_gzip_sidecar(self):
+        compress_outputs(self.tmp.name, min_size=0, encodings=["gzip"])
+        headers, body = self.fetch(None, "/index.html", {"Accept-Encoding": "br, gzip;q=0.5"}, raw=True)
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(headers["Content-Type"], "text/html")
+        self.assertEqual(gzip.decompress(body), b"<html><body><p>hi</p></body></html>")
+        headers, body = self.fetch(None, "/", {"Accept-Encoding": "gzip;q=0"}, raw=True)
+        self.assertIsNone(headers["Content-Encoding"])
+
+    def test_ignores_outdated_sidecar(self):
+        compress_outputs(self.tmp.name, min_size=0, encodings=["gzip"])
+        with open(os.path.join(self.tmp.name, "index.html"), 'w') as file:
+            file.write("<html><body>new</body></html>")
+        headers, body = self.fetch(None, "/", {"Accept-Encoding": "gzip"}, raw=True)
+        self.assertIsNone(headers["Content-Encoding"])
+        self.assertEqual(body, b"<html><body>new</body></html>")
+
+
+if __name__ == "__main__":
+    unittest.main()
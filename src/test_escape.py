@@ -0,0 +1,30 @@
+import unittest
+
+from escape import Markup, escape_attribute, escape_text
+
+
+class TestEscape(unittest.TestCase):
+    def test_plain_text_is_returned_unchanged(self):
+        text = "nothing to see here"
+        self.assertIs(escape_text(text), text)
+        self.assertIs(escape_attribute(text), text)
+
+    def test_text(self):
+        self.assertEqual(escape_text('a < b > c & "d"'), 'a &lt; b &gt; c &amp; "d"')
+
+    def test_attribute(self):
+        self.assertEqual(escape_attribute('a < b > c & "d"'), "a &lt; b &gt; c &amp; &quot;d&quot;")
+        self.assertEqual(escape_attribute(3), "3")
+
+    def test_character_references_are_kept(self):
+        self.assertEqual(escape_text("&copy; &#169; &#xA9; & &copy"), "&copy; &#169; &#xA9; &amp; &amp;copy")
+        self.assertEqual(escape_attribute("/a?x=1&amp;y=2&z=3"), "/a?x=1&amp;y=2&amp;z=3")
+
+    def test_markup_is_trusted(self):
+        html = Markup('<b class="x">&</b>')
+        self.assertIs(escape_text(html), html)
+        self.assertIs(escape_attribute(html), html)
+
+
+if __name__ == "__main__":
+    unittest.main()
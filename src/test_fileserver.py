@@ -0,0 +1,133 @@
+import http.client
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from compress import compress_outputs
+from fileserver import (
+    FileCache,
+    accepted_encodings,
+    immutable_cache_control,
+    make_server,
+    parse_range,
+)
+from fixtures import write
+
+page = b"<html><body><p>" + b"hello " * 50 + b"</p></body></html>"
+
+
+class TestFileServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        write(os.path.join(self.tmp.name, "index.html"), page)
+        self.cache = FileCache()
+        server = make_server(self.tmp.name, 0, "127.0.0.1", cache=self.cache)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+        self.addCleanup(self.conn.close)
+
+    def get(self, path="/", headers=None, method="GET"):
+        # Every request reuses one keep-alive connection
+        self.conn.request(method, path, headers=headers or {})
+        response = self.conn.getresponse()
+        return response, response.read()
+
+    def test_etag_and_not_modified(self):
+        response, body = self.get()
+        self.assertEqual((response.status, body), (200, page))
+        etag = response.headers["ETag"]
+        self.assertEqual(response.headers["Cache-Control"], "no-cache")
+        response, body = self.get("/index.html", {"If-None-Match": f'W/"x", {etag}'})
+        self.assertEqual((response.status, body), (304, b""))
+        self.assertEqual(response.headers["ETag"], etag)
+        response, _ = self.get("/", {"If-Modified-Since": response.headers["Last-Modified"]})
+        self.assertEqual(response.status, 304)
+        self.assertEqual((self.cache.misses, self.cache.hits), (1, 2))
+
+    def test_changed_file_is_reloaded(self):
+        etag = self.get()[0].headers["ETag"]
+        write(os.path.join(self.tmp.name, "index.html"), b"<p>new</p>")
+        response, body = self.get("/", {"If-None-Match": etag})
+        self.assertEqual((response.status, body), (200, b"<p>new</p>"))
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_ranges(self):
+        response, body = self.get("/", {"Range": "bytes=6-20"})
+        self.assertEqual((response.status, body), (206, page[6:21]))
+        self.assertEqual(response.headers["Content-Range"], f"bytes 6-20/{len(page)}")
+        response, body = self.get("/", {"Range": "bytes=-5"})
+        self.assertEqual(body, page[-5:])
+        response, body = self.get("/", {"Range": f"bytes={len(page)}-"})
+        self.assertEqual(response.status, 416)
+        response, body = self.get("/", {"Range": "bytes=0-1", "If-Range": '"stale"'})
+        self.assertEqual((response.status, body), (200, page))
+
+    def test_large_files_are_streamed(self):
+        self.cache.max_file_bytes = 10
+        response, body = self.get("/", {"Range": "bytes=10-"})
+        self.assertEqual((response.status, body), (206, page[10:]))
+        self.assertEqual(self.cache.bodies, {})
+        response, _ = self.get("/", {"If-None-Match": response.headers["ETag"]})
+        self.assertEqual(response.status, 304)
+
+    def test_sidecars(self):
+        compress_outputs(self.tmp.name, min_size=0, encodings=["gzip"])
+        plain = self.get()[0]
+        response, body = self.get("/", {"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.headers["Vary"], "Accept-Encoding")
+        self.assertNotEqual(response.headers["ETag"], plain.headers["ETag"])
+        self.assertLess(len(body), len(page))
+        response, body = self.get("/", {"Accept-Encoding": "gzip", "Range": "bytes=0-4"})
+        self.assertEqual((response.status, body), (206, page[:5]))
+        self.assertIsNone(response.headers["Content-Encoding"])
+
+    def test_head_and_missing(self):
+        response, body = self.get("/", method="HEAD")
+        self.assertEqual((response.status, body), (200, b""))
+        self.assertEqual(response.headers["Content-Length"], str(len(page)))
+        self.assertEqual(self.get("/missing.css")[0].status, 404)
+
+    def test_fingerprinted_assets_are_immutable(self):
+        write(os.path.join(self.tmp.name, "site.abc.css"), b"body {}")
+        write(os.path.join(self.tmp.name, "asset-manifest.json"), json.dumps({"/site.css": "/site.abc.css"}).encode())
+        self.assertEqual(self.get("/site.abc.css")[0].headers["Cache-Control"], immutable_cache_control)
+
+
+class TestFileCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = FileCache(max_bytes=10)
+            paths = []
+            for name in "abc":
+                path = os.path.join(tmp, name)
+                with open(path, 'wb') as file:
+                    file.write(b"1234")
+                paths.append(path)
+            for path in (paths[0], paths[1], paths[0], paths[2]):
+                cache.lookup(path, os.stat(path))
+            self.assertEqual(list(cache.bodies), [paths[0], paths[2]])
+            self.assertEqual(cache.size, 8)
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=0-9", 100), (0, 10))
+        self.assertEqual(parse_range("bytes=90-200", 100), (90, 100))
+        self.assertEqual(parse_range("bytes=-10", 100), (90, 100))
+        self.assertEqual(parse_range("bytes=50-", 100), (50, 100))
+        self.assertIs(parse_range("bytes=100-", 100), False)
+        self.assertIs(parse_range("bytes=-0", 100), False)
+        for header in ("bytes=0-1,5-6", "lines=1-2", "bytes=5-1", "bytes=-", "bytes=a-b"):
+            self.assertIsNone(parse_range(header, 100))
+
+    def test_accepted_encodings(self):
+        self.assertEqual(accepted_encodings("gzip, deflate;q=0, zstd;q=0.8"), {"gzip", "zstd"})
+        self.assertEqual(accepted_encodings(""), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+from escape import Markup
+from flatast import FlatTree
+from htmlnode import LeafNode, ParentNode
+from markdown_blocks import markdown_to_html_node
+
+
+class TestFlatTree(unittest.TestCase):
+    def test_to_html_matches_nodes(self):
+        node = markdown_to_html_node(
+            "# Title\n\nSome **bold** and [a link](/x)\n\n* one\n* two\n\n```\ncode\n```"
+        )
+        tree = FlatTree.from_node(node)
+        self.assertEqual(tree.to_html(), node.to_html())
+
+    def test_children_are_contiguous(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode(None, "a"), LeafNode("b", "b")]),
+            LeafNode("i", "c"),
+        ])
+        tree = FlatTree.from_node(node)
+        self.assertEqual(len(tree), 5)
+        self.assertEqual(list(tree.first_child[:2]), [1, 3])
+        self.assertEqual(list(tree.child_count[:2]), [2, 2])
+        self.assertEqual(tree.text, "cab")
+
+    def test_view(self):
+        node = ParentNode("p", [LeafNode("a", "link", {"href": "/x"}), LeafNode(None, "text")])
+        view = FlatTree.from_node(node).node()
+        self.assertEqual(view.tag, "p")
+        self.assertIsNone(view.value)
+        link = view.children[0]
+        self.assertEqual((link.tag, link.value, link.props), ("a", "link", {"href": "/x"}))
+        self.assertIsNone(link.children)
+        self.assertEqual(link.to_html(), '<a href="/x">link</a>')
+
+    def test_markup_leaves_are_not_escaped_again(self):
+        node = ParentNode("p", [LeafNode(None, Markup("a &amp; <b>b</b>")), LeafNode("i", "<c> & d")])
+        tree = FlatTree.from_node(node)
+        self.assertEqual(tree.to_html(), node.to_html())
+        self.assertEqual(tree.to_html(), "<p>a &amp; <b>b</b><i>&lt;c&gt; &amp; d</i></p>")
+        self.assertIsInstance(tree.node().children[0].value, Markup)
+
+    def test_invalid_nodes_raise(self):
+        with self.assertRaises(ValueError):
+            FlatTree.from_node(ParentNode("p", []))
+        with self.assertRaises(ValueError):
+            FlatTree.from_node(ParentNode("p", [LeafNode("b", None)]))
+
+    def test_slotted_nodes(self):
+        with self.assertRaises(AttributeError):
+            LeafNode("b", "x").extra = 1
+
+
+if __name__ == "__main__":
+    unittest.main()
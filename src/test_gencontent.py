@@ -1,6 +1,23 @@
+import io
+import multiprocessing
+import os
+import sqlite3
+import tempfile
 import unittest
+from contextlib import redirect_stdout
 
-from gencontent import extract_title
+from assets import AssetManifest, disable_assets, enable_assets
+from block_cache import disable_block_cache, enable_block_cache
+from fixtures import read_tree, write
+from gencontent import (
+    extract_file_title,
+    extract_title,
+    find_title,
+    generate_pages_parallel,
+    generate_pages_pipelined,
+    generate_pages_recursive,
+)
+from markdown_blocks import markdown_to_html_node
 
 
 class TestExtractTitle(unittest.TestCase):
@@ -64,5 +81,111 @@ no title
             pass
 
 
+class TestFindTitle(unittest.TestCase):
+    def test_find_title(self):
+        self.assertEqual(find_title("intro\n# Title \nmore"), "Title ")
+        self.assertEqual(find_title("# Last"), "Last")
+        self.assertIsNone(find_title("## Sub\n#NoSpace"))
+
+    def test_extract_file_title(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            with open(path, 'w') as file:
+                file.write("Intro\n\n# The title\n\nBody")
+            self.assertEqual(extract_file_title(path), "The title")
+
+
+class TestGeneratePagesParallel(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.template, 'w') as file:
+            file.write("<title>{{ Title }}</title>{{ Content }}")
+        for i in range(8):
+            write(os.path.join(self.content, f"dir{i % 3}", f"page{i}.md"), f"# Page {i}\n\nText {i}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parallel_matches_sequential(self):
+        sequential = os.path.join(self.tmp.name, "sequential")
+        parallel = os.path.join(self.tmp.name, "parallel")
+        generate_pages_recursive(self.content, self.template, sequential)
+        generate_pages_recursive(self.content, self.template, parallel, jobs=4)
+        self.assertEqual(len(read_tree(parallel)), 8)
+        self.assertEqual(read_tree(sequential), read_tree(parallel))
+
+    def test_parallel_reports_failed_pages(self):
+        write(os.path.join(self.content, "broken.md"), "no title")
+        dest = os.path.join(self.tmp.name, "public")
+        with self.assertRaises(Exception) as ctx:
+            generate_pages_recursive(self.content, self.template, dest, jobs=2)
+        self.assertIn("broken.md", str(ctx.exception))
+        self.assertTrue(os.path.isfile(os.path.join(dest, "dir0", "page0.html")))
+
+    def test_pipeline_matches_sequential(self):
+        write(os.path.join(self.content, "crlf.md"), "# Windows\r\n\r\nLine **one**\r\nLine two\r\n")
+        sequential = os.path.join(self.tmp.name, "sequential")
+        generate_pages_recursive(self.content, self.template, sequential)
+        for jobs in (1, 3):
+            pipelined = os.path.join(self.tmp.name, f"pipelined{jobs}")
+            generate_pages_recursive(self.content, self.template, pipelined, jobs=jobs, pipeline=True)
+            self.assertEqual(len(read_tree(pipelined)), 9)
+            self.assertEqual(read_tree(sequential), read_tree(pipelined))
+
+    def test_crlf_sources_render_like_text_mode_reads(self):
+        path = os.path.join(self.content, "crlf.md")
+        write(path, "# Windows\r\n\r\nline one\r\nline two\r\n\r\n* a\r\n* b\r\n")
+        with open(path, 'r') as file:
+            markdown = file.read()
+        expected = f"<title>Windows</title>{markdown_to_html_node(markdown).to_html()}"
+        self.assertIn("<p>line one line two</p><ul><li>a</li>", expected)
+        for pipeline in (False, True):
+            dest = os.path.join(self.tmp.name, f"public{pipeline}")
+            generate_pages_recursive(self.content, self.template, dest, pipeline=pipeline)
+            with open(os.path.join(dest, "crlf.html"), 'r', newline="") as file:
+                self.assertEqual(file.read(), expected)
+
+    def test_pipeline_reports_failed_pages(self):
+        write(os.path.join(self.content, "broken.md"), "no title")
+        dest = os.path.join(self.tmp.name, "public")
+        with self.assertRaises(Exception) as ctx:
+            generate_pages_recursive(self.content, self.template, dest, pipeline=True)
+        self.assertIn("broken.md", str(ctx.exception))
+        self.assertFalse(os.path.exists(os.path.join(dest, "broken.html")))
+        self.assertTrue(os.path.isfile(os.path.join(dest, "dir0", "page0.html")))
+
+    def test_spawned_workers_rewrite_assets(self):
+        # Workers started with spawn inherit nothing from the parent
+        with open(self.template, 'w') as file:
+            file.write('<link href="/index.css"><title>{{ Title }}</title>{{ Content }}')
+        source = write(os.path.join(self.content, "img.md"), "# Image\n\n![a](/a.png)")
+        enable_assets(AssetManifest({"/index.css": "/index.1.css", "/a.png": "/a.2.png"}))
+        self.addCleanup(disable_assets)
+        spawn = multiprocessing.get_context("spawn")
+        for name, generate in (("parallel", generate_pages_parallel), ("pipelined", generate_pages_pipelined)):
+            dest = os.path.join(self.tmp.name, name, "img.html")
+            with redirect_stdout(io.StringIO()):
+                generate([(source, self.template, dest), (source, self.template, dest + ".2")], 2, mp_context=spawn)
+            with open(dest, 'r') as file:
+                html = file.read()
+            self.assertIn('href="/index.1.css"', html)
+            self.assertIn('src="/a.2.png"', html)
+
+    def test_spawned_workers_use_block_cache(self):
+        source = os.path.join(self.content, "dir0", "page0.md")
+        spawn = multiprocessing.get_context("spawn")
+        self.addCleanup(disable_block_cache)
+        for name, generate in (("parallel", generate_pages_parallel), ("pipelined", generate_pages_pipelined)):
+            path = os.path.join(self.tmp.name, f"{name}.sqlite")
+            enable_block_cache(path)
+            dest = os.path.join(self.tmp.name, name, "page0.html")
+            with redirect_stdout(io.StringIO()):
+                generate([(source, self.template, dest), (source, self.template, dest + ".2")], 2, mp_context=spawn)
+            with sqlite3.connect(path) as conn:
+                self.assertGreater(conn.execute("SELECT COUNT(*) FROM blocks").fetchone()[0], 0)
+
+
 if __name__ == "__main__":
     unittest.main()
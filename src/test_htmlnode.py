@@ -1,5 +1,6 @@
 import unittest
 
+from escape import Markup
 from htmlnode import HTMLNode, LeafNode, ParentNode
 
 
@@ -142,6 +143,42 @@ class TestHTMLNode(unittest.TestCase):
         with self.assertRaises(ValueError):
             node.to_html()
 
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode("b", "Bold text"), LeafNode(None, "Normal text")]),
+                ParentNode("a", [LeafNode(None, "link")], {"href": "/x"}),
+            ],
+        )
+        chunks = list(node.iter_html())
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), node.to_html())
+        self.assertEqual(node.to_html(), '<div><p><b>Bold text</b>Normal text</p><a href="/x">link</a></div>')
+
+    def test_render_to(self):
+        node = ParentNode("p", [LeafNode("i", "italic text")])
+        out = []
+        node.render_to(out.append)
+        self.assertEqual("".join(out), "<p><i>italic text</i></p>")
+
+    def test_iter_html_deep_tree(self):
+        node = LeafNode(None, "x")
+        for _ in range(200):
+            node = ParentNode("span", [node])
+        self.assertEqual(node.to_html(), "<span>" * 200 + "x" + "</span>" * 200)
+
+    def test_escaping(self):
+        node = ParentNode("p", [
+            LeafNode(None, "1 < 2 & \"3\""),
+            LeafNode("img", "", {"src": "/a?x=1&y=2", "alt": 'say "hi"'}),
+            LeafNode(None, Markup("<br>")),
+        ])
+        self.assertEqual(
+            node.to_html(),
+            '<p>1 &lt; 2 &amp; "3"<img src="/a?x=1&amp;y=2" alt="say &quot;hi&quot;"></img><br></p>',
+        )
+
 if __name__ == "__main__":
     unittest.main()
     
@@ -282,3 +282,71 @@ class TestMarkdownConverter(unittest.TestCase):
         with self.assertRaises(Exception):
             text = "This is **text** with an incorrect *italic word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)"
             text_to_textnodes(text)
+
+    def test_text_to_nodes_bold_inside_link(self):
+        nodes = text_to_textnodes("See [the **docs**](https://boot.dev) now")
+        self.assertListEqual(
+            nodes,
+            [
+                TextNode("See ", TextType.TEXT),
+                TextNode(
+                    "the docs",
+                    TextType.LINK,
+                    "https://boot.dev",
+                    children=[
+                        TextNode("the ", TextType.TEXT),
+                        TextNode("docs", TextType.BOLD),
+                    ],
+                ),
+                TextNode(" now", TextType.TEXT),
+            ]
+        )
+
+    def test_text_to_nodes_italic_inside_bold(self):
+        nodes = text_to_textnodes("**very *much* so**")
+        self.assertListEqual(
+            nodes,
+            [
+                TextNode(
+                    "very much so",
+                    TextType.BOLD,
+                    children=[
+                        TextNode("very ", TextType.TEXT),
+                        TextNode("much", TextType.ITALIC),
+                        TextNode(" so", TextType.TEXT),
+                    ],
+                ),
+            ]
+        )
+
+    def test_text_to_nodes_code_is_literal(self):
+        nodes = text_to_textnodes("Use `a*b` and `[x](y)`")
+        self.assertListEqual(
+            nodes,
+            [
+                TextNode("Use ", TextType.TEXT),
+                TextNode("a*b", TextType.CODE),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("[x](y)", TextType.CODE),
+            ]
+        )
+
+    def test_text_to_nodes_unmatched_bracket_is_text(self):
+        nodes = text_to_textnodes("a [b] c ![d] *e*")
+        self.assertListEqual(
+            nodes,
+            [
+                TextNode("a [b] c ![d] ", TextType.TEXT),
+                TextNode("e", TextType.ITALIC),
+            ]
+        )
+
+    def test_text_to_nodes_crossing_delimiters(self):
+        with self.assertRaises(Exception):
+            text_to_textnodes("**a *b** c*")
+
+    def test_text_to_nodes_many_links(self):
+        text = "[a](u) " * 5000
+        nodes = text_to_textnodes(text)
+        self.assertEqual(len(nodes), 10000)
+        self.assertEqual(nodes[-2], TextNode("a", TextType.LINK, "u"))
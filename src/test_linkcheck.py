@@ -0,0 +1,56 @@
+import os
+import unittest
+
+from linkcheck import check_links, find_orphans, output_url
+
+
+def out(*parts):
+    return os.path.join("public", *parts)
+
+
+class TestLinkCheck(unittest.TestCase):
+    def setUp(self):
+        self.page_refs = {
+            "index.md": [out("about", "index.html"), out("images", "logo.png")],
+            "about/index.md": [out("index.html"), out("missing", "index.html")],
+            "lonely.md": [out("lonely.html")],
+        }
+        self.page_outputs = {
+            "index.md": out("index.html"),
+            "about/index.md": out("about", "index.html"),
+            "lonely.md": out("lonely.html"),
+        }
+        self.targets = set(self.page_outputs.values()) | {out("images", "logo.png")}
+
+    def test_broken_links(self):
+        broken = check_links(self.page_refs, self.targets)
+        self.assertEqual(broken, {"about/index.md": [out("missing", "index.html")]})
+
+    def test_recheck_only_affected_pages(self):
+        previous = {"about/index.md": [out("missing", "index.html")]}
+        self.targets.add(out("missing", "index.html"))
+        self.targets.discard(out("images", "logo.png"))
+        # index.md is not rechecked, so its new broken image goes unnoticed
+        broken = check_links(self.page_refs, self.targets, previous, {"about/index.md"})
+        self.assertEqual(broken, {})
+        broken = check_links(self.page_refs, self.targets, previous, {"index.md"})
+        self.assertEqual(
+            broken,
+            {"index.md": [out("images", "logo.png")], "about/index.md": [out("missing", "index.html")]},
+        )
+
+    def test_orphans(self):
+        orphans = find_orphans(self.page_outputs, self.page_refs, [out("index.html")])
+        self.assertEqual(orphans, ["lonely.md"])
+        self.assertEqual(find_orphans(self.page_outputs, self.page_refs), ["lonely.md"])
+        del self.page_refs["about/index.md"]
+        self.assertEqual(find_orphans(self.page_outputs, self.page_refs), ["index.md", "lonely.md"])
+
+    def test_output_url(self):
+        self.assertEqual(output_url(out("index.html"), "public"), "/")
+        self.assertEqual(output_url(out("blog", "index.html"), "public"), "/blog/")
+        self.assertEqual(output_url(out("images", "a.png"), "public"), "/images/a.png")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from fixtures import write
+from main import build_incremental, parse_args, rebuild_changed
+from template import template_cache
+
+
+def site_path(*parts):
+    # Relative to the site root, the way the watcher reports paths
+    return os.path.join(".", *parts)
+
+
+class TestRebuildChanged(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(tmp.name)
+        template_cache.clear()
+        write(site_path("template.html"), '{% include "partials/nav.html" %}<title>{{ Title }}</title>{{ Content }}')
+        write(site_path("partials", "nav.html"), "<nav>Home</nav>")
+        write(site_path("content", "index.md"), "# Home\n\n[about](/about)")
+        write(site_path("content", "about", "index.md"), "# About\n\n![logo](/logo.png)")
+        write(site_path("static", "logo.png"), "png")
+        self.args = parse_args(["serve"])
+        with redirect_stdout(io.StringIO()):
+            self.manifest, self.routes = build_incremental()
+
+    def rebuild(self, *paths):
+        with redirect_stdout(io.StringIO()):
+            return rebuild_changed(self.manifest, self.routes, paths, self.args)
+
+    def read(self, *parts):
+        with open(site_path("public", *parts), 'r') as file:
+            return file.read()
+
+    def test_page_edit(self):
+        page = write(site_path("content", "about", "index.md"), "# About us\n\n![logo](/logo.png)")
+        stats = self.rebuild(page)
+        self.assertEqual((stats["written"], stats["unchanged"]), (1, 0))
+        self.assertIn("<title>About us</title>", self.read("about", "index.html"))
+        self.assertEqual(self.manifest["pages"][page]["size"], os.path.getsize(page))
+
+    def test_partial_edit(self):
+        partial = write(site_path("partials", "nav.html"), "<nav>Home | About</nav>")
+        stats = self.rebuild(partial)
+        self.assertEqual(stats["written"], 2)
+        self.assertIn("<nav>Home | About</nav>", self.read("index.html"))
+        self.assertIn("<nav>Home | About</nav>", self.read("about", "index.html"))
+
+    def test_template_edit(self):
+        template = write(site_path("template.html"), '{% include "partials/nav.html" %}<h2>{{ Title }}</h2>{{ Content }}')
+        stats = self.rebuild(template)
+        self.assertEqual(stats["written"], 2)
+        self.assertIn("<h2>Home</h2>", self.read("index.html"))
+
+    def test_static_edit(self):
+        logo = write(site_path("static", "logo.png"), "new png")
+        stats = self.rebuild(logo)
+        self.assertEqual(self.read("logo.png"), "new png")
+        # The page showing the image is checked again, the other is not
+        self.assertEqual((stats["written"], stats["unchanged"]), (0, 1))
+
+    def test_added_or_removed_page_needs_full_build(self):
+        page = write(site_path("content", "new.md"), "# New")
+        self.assertIsNone(self.rebuild(page))
+        os.remove(page)
+        os.remove(site_path("content", "index.md"))
+        self.assertIsNone(self.rebuild(site_path("content", "index.md")))
+
+    def test_ignored_files_are_skipped(self):
+        paths = [
+            write(site_path("content", ".index.md.swp"), "swap"),
+            write(site_path("content", "index.md~"), "backup"),
+            write(site_path("content", "notes.txt"), "not a page"),
+            write(site_path("static", ".DS_Store"), "finder"),
+        ]
+        before = self.read("index.html")
+        self.assertEqual(self.rebuild(*paths), {"written": 0, "unchanged": 0, "removed": 0})
+        self.assertEqual(self.read("index.html"), before)
+        self.assertFalse(os.path.exists(site_path("public", ".DS_Store")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+
+from fixtures import read_tree, write
+from gencontent import generate_pages_incremental, generate_pages_recursive
+from manifest import (
+    file_entry,
+    is_stale,
+    load_manifest,
+    new_manifest,
+    remove_stale_outputs,
+    save_manifest,
+)
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        write(os.path.join(self.content, "index.md"), "# Home\n\nHello")
+        write(os.path.join(self.content, "blog", "index.md"), "# Blog\n\nPost")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, manifest, dest):
+        generate_pages_incremental(self.content, self.template, dest, manifest)
+        remove_stale_outputs(dest, [e["dest"] for e in manifest["pages"].values()])
+        return manifest
+
+    def test_load_missing_manifest(self):
+        manifest = load_manifest(os.path.join(self.root, "missing.json"))
+        self.assertEqual(manifest, new_manifest())
+
+    def test_save_and_load_roundtrip(self):
+        path = os.path.join(self.root, ".build", "manifest.json")
+        manifest = new_manifest()
+        manifest["pages"]["a.md"] = {"hash": "abc", "dest": "a.html"}
+        save_manifest(manifest, path)
+        self.assertEqual(load_manifest(path), manifest)
+
+    def test_file_entry_reuses_hash(self):
+        path = os.path.join(self.content, "index.md")
+        entry = file_entry(path)
+        cached = file_entry(path, dict(entry, hash="cached"))
+        self.assertEqual(cached["hash"], "cached")
+
+    def test_is_stale(self):
+        dest = os.path.join(self.content, "index.md")
+        entry = {"hash": "a"}
+        self.assertTrue(is_stale(entry, None, dest))
+        self.assertTrue(is_stale(entry, {"hash": "b", "dest": dest}, dest))
+        self.assertFalse(is_stale(entry, {"hash": "a", "dest": dest}, dest))
+
+    def test_only_changed_pages_regenerated(self):
+        dest = os.path.join(self.root, "public")
+        manifest = self.build(new_manifest(), dest)
+        blog = os.path.join(dest, "blog", "index.html")
+        os.utime(blog, ns=(0, 0))
+        write(os.path.join(self.content, "index.md"), "# Home\n\nChanged")
+        self.build(manifest, dest)
+        self.assertEqual(os.stat(blog).st_mtime_ns, 0)
+        self.assertIn("Changed", read_tree(dest)["index.html"])
+
+    def test_incremental_matches_clean_build(self):
+        dest = os.path.join(self.root, "public")
+        manifest = self.build(new_manifest(), dest)
+        os.remove(os.path.join(self.content, "blog", "index.md"))
+        write(os.path.join(self.content, "about.md"), "# About\n\nMe")
+        write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.build(manifest, dest)
+        clean = os.path.join(self.root, "clean")
+        generate_pages_recursive(self.content, self.template, clean)
+        self.assertEqual(read_tree(dest), read_tree(clean))
+        self.assertFalse(os.path.exists(os.path.join(dest, "blog")))
+
+
+if __name__ == "__main__":
+    unittest.main()
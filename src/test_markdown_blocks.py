@@ -1,5 +1,19 @@
+import os
+import tempfile
 import unittest
-from markdown_blocks import block_to_block_type, markdown_to_blocks, markdown_to_html_node
+import markdown_blocks
+from markdown_blocks import (
+    block_to_block_type,
+    blocks_to_html,
+    iter_file_blocks,
+    iter_markdown_blocks,
+    markdown_to_blocks,
+    markdown_to_html_node,
+    register_block_type,
+    block_builders,
+    custom_block_types,
+)
+from htmlnode import LeafNode
 
 
 class TestMarkdownToBlocks(unittest.TestCase):
@@ -46,6 +60,50 @@ This is the same paragraph on a new line
             ],
         )
         
+    def test_markdown_to_blocks_fenced_code_with_blank_lines(self):
+        md = "Intro\n\n```\nfirst\n\n\nsecond\n```\n\nOutro"
+        self.assertEqual(
+            markdown_to_blocks(md),
+            ["Intro", "```\nfirst\n\n\nsecond\n```", "Outro"],
+        )
+
+    def test_markdown_to_blocks_inline_fence_does_not_open(self):
+        md = "```inline```\n\nNext"
+        self.assertEqual(markdown_to_blocks(md), ["```inline```", "Next"])
+
+    def test_iter_markdown_blocks_offsets(self):
+        md = "\n  # Title\n\n\npara one\nline two  \n\n* a\n"
+        blocks = list(iter_markdown_blocks(md))
+        self.assertEqual([b.text for b in blocks], ["# Title", "para one\nline two", "* a"])
+        self.assertEqual([b.block_type for b in blocks], ["heading", "paragraph", "unordered_list"])
+        for block in blocks:
+            self.assertEqual(md[block.start:block.end], block.text)
+
+    def test_iter_file_blocks(self):
+        md = "# Title\n\nCaf\u00e9 **bold**\n\n```\ncode\n\nmore\n```\n"
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            with open(path, 'w', encoding="utf-8") as file:
+                file.write(md)
+            blocks = list(iter_file_blocks(path))
+            self.assertEqual([b.text for b in blocks], markdown_to_blocks(md))
+            self.assertEqual(md[blocks[1].start:blocks[1].end], "Caf\u00e9 **bold**")
+            self.assertEqual(blocks[2].block_type, "code")
+
+    def test_crlf_line_endings(self):
+        md = "# Title\r\n\r\n  line one\r\nline two  \r\n\r\n* a\r\n* b\r\n"
+        blocks = list(iter_markdown_blocks(md))
+        self.assertEqual([b.text for b in blocks], ["# Title", "line one\nline two", "* a\n* b"])
+        self.assertEqual(md[blocks[1].start:blocks[1].end], "line one\r\nline two")
+        self.assertEqual(md[blocks[2].start:blocks[2].end], "* a\r\n* b")
+
+    def test_blocks_to_html_matches_tree(self):
+        md = "# Title\n\nSome *text*\n\n> quote"
+        self.assertEqual(
+            "".join(blocks_to_html(iter_markdown_blocks(md))),
+            markdown_to_html_node(md).to_html(),
+        )
+
 class TestBlockToBlockType(unittest.TestCase):
     def test_block_to_block_type_paragraph(self):
         text = "Text"
@@ -307,5 +365,34 @@ this is paragraph text
             "<div><blockquote>This is a blockquote block</blockquote><p>this is paragraph text</p></div>",
         )
         
+class TestBlockDispatch(unittest.TestCase):
+    def setUp(self):
+        self.renderer_version = markdown_blocks.renderer_version
+
+    def tearDown(self):
+        custom_block_types.clear()
+        block_builders.pop("rule", None)
+        markdown_blocks.renderer_version = self.renderer_version
+
+    def test_register_block_type(self):
+        register_block_type(
+            "rule",
+            "-",
+            lambda lines: len(lines) == 1 and lines[0] == "---",
+            lambda lines, links: LeafNode("hr", ""),
+        )
+        node = markdown_to_html_node("---\n\n- item")
+        self.assertEqual(node.to_html(), "<div><hr></hr><ul><li>item</li></ul></div>")
+        self.assertEqual(markdown_blocks.renderer_version, self.renderer_version + "+rule")
+
+    def test_ordered_list_past_nine(self):
+        md = "\n".join(f"{i}. item {i}" for i in range(1, 12))
+        self.assertEqual(block_to_block_type(md), "ordered_list")
+        html = markdown_to_html_node(md).to_html()
+        self.assertIn("<li>item 10</li><li>item 11</li>", html)
+
+    def test_ordered_list_wrong_number(self):
+        self.assertEqual(block_to_block_type("1. a\n3. b"), "paragraph")
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import tracemalloc
+import unittest
+
+from gencontent import generate_pages_recursive
+from output import count_writes, write_atomic, write_if_changed
+
+
+class TestWriteIfChanged(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "out", "page.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self):
+        with open(self.path, 'r') as file:
+            return file.read()
+
+    def test_writes_new_file(self):
+        self.assertTrue(write_if_changed(self.path, ["<p>", "hi", "</p>"]))
+        self.assertEqual(self.read(), "<p>hi</p>")
+
+    def test_skips_identical_output(self):
+        write_if_changed(self.path, ["<p>hi</p>"])
+        os.utime(self.path, ns=(1, 1))
+        self.assertFalse(write_if_changed(self.path, ["<p>", "hi", "</p>"]))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 1)
+
+    def test_rewrites_changed_output(self):
+        write_if_changed(self.path, ["<p>hi</p>"])
+        self.assertTrue(write_if_changed(self.path, ["<p>", "ho", "</p>"]))
+        self.assertEqual(self.read(), "<p>ho</p>")
+        self.assertTrue(write_if_changed(self.path, ["<p>"]))
+        self.assertEqual(self.read(), "<p>")
+        self.assertTrue(write_if_changed(self.path, ["<p>", "é"]))
+        self.assertEqual(self.read(), "<p>é")
+
+    def test_memory_stays_flat(self):
+        chunk = "x" * (1 << 16)
+        write_if_changed(self.path, [chunk] * 128)
+        for chunks in ([chunk] * 128, [chunk] * 127 + ["y"], [chunk] * 64):
+            tracemalloc.start()
+            try:
+                write_if_changed(self.path, iter(chunks))
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            self.assertLess(peak, 1 << 20)
+            self.assertEqual(os.path.getsize(self.path), sum(len(c) for c in chunks))
+        self.assertEqual(self.read(), chunk * 64)
+
+    def test_failed_render_keeps_previous_output(self):
+        write_if_changed(self.path, ["old"])
+
+        def chunks():
+            yield "new"
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            write_if_changed(self.path, chunks())
+        self.assertEqual(self.read(), "old")
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["page.html"])
+
+    def test_write_atomic_permissions(self):
+        write_atomic(self.path, [b"data"])
+        umask = os.umask(0)
+        os.umask(umask)
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o666 & ~umask)
+
+    def test_count_writes(self):
+        self.assertEqual(count_writes([True, False, True]), {"written": 2, "unchanged": 1})
+
+
+class TestGeneratePagesStats(unittest.TestCase):
+    def test_second_build_leaves_outputs_alone(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            template = os.path.join(tmp, "template.html")
+            dest = os.path.join(tmp, "public")
+            os.makedirs(content)
+            with open(template, 'w') as file:
+                file.write("<title>{{ Title }}</title>{{ Content }}")
+            for name in ("a", "b"):
+                with open(os.path.join(content, f"{name}.md"), 'w') as file:
+                    file.write(f"# {name}\n\ntext")
+            self.assertEqual(generate_pages_recursive(content, template, dest), {"written": 2, "unchanged": 0})
+            with open(os.path.join(content, "b.md"), 'a') as file:
+                file.write(" more")
+            for jobs, pipeline in ((1, False), (2, False), (1, True)):
+                stats = generate_pages_recursive(content, template, dest, jobs, pipeline=pipeline)
+                self.assertEqual(stats["written"] + stats["unchanged"], 2)
+            self.assertEqual(
+                generate_pages_recursive(content, template, dest, pipeline=True),
+                {"written": 0, "unchanged": 2},
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
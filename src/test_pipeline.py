@@ -0,0 +1,45 @@
+import io
+import os
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+
+from fixtures import write
+from pipeline import generate_pages_async
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.pages = []
+        for i in range(100):
+            source = write(os.path.join(self.tmp.name, "content", f"{i}.md"), f"page {i}")
+            self.pages.append((source, "t.html", os.path.join(self.tmp.name, "public", f"{i}.html")))
+
+    def test_readers_are_held_back(self):
+        pulled = []
+        lag = []
+        threads = set()
+
+        def pages():
+            for page in self.pages:
+                pulled.append(page)
+                yield page
+
+        def render(source, template_path):
+            threads.add(threading.current_thread())
+            lag.append(len(pulled) - len(lag))
+            return source
+
+        with redirect_stdout(io.StringIO()):
+            stats = generate_pages_async(pages(), render, io_workers=2, queue_size=2)
+        self.assertEqual(stats, {"written": 100, "unchanged": 0})
+        # Pages in the readers, the two queues and the renderer at most
+        self.assertLessEqual(max(lag), 2 + 2 + 2 + 1)
+        self.assertNotIn(threading.main_thread(), threads)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+from gencontent import generate_pages_recursive
+from profiling import BuildProfile, phase_order
+
+
+class TestBuildProfile(unittest.TestCase):
+    def test_phase_accumulates(self):
+        profile = BuildProfile()
+        for _ in range(3):
+            with profile.phase("read"):
+                pass
+        seconds, calls, _ = profile.phases["read"]
+        self.assertEqual(calls, 3)
+        self.assertGreaterEqual(seconds, 0)
+
+    def test_slowest_pages(self):
+        profile = BuildProfile(slowest=2)
+        for idx, seconds in enumerate([0.3, 0.1, 0.5, 0.2]):
+            profile.add_page(f"page{idx}.md", seconds, 10, 20)
+        report = profile.report()
+        self.assertEqual([p["path"] for p in report["slowest_pages"]], ["page2.md", "page0.md"])
+        self.assertEqual((report["pages"], report["bytes_in"], report["bytes_out"]), (4, 40, 80))
+
+    def test_merge_worker_profile(self):
+        worker = BuildProfile(slowest=None)
+        worker.add("read", 0.5, 3)
+        worker.add_page("a.md", 0.5, 1, 2)
+        worker.add_page("b.md", 0.1, 1, 2)
+        profile = BuildProfile(slowest=1)
+        profile.merge(worker.to_dict())
+        report = profile.report()
+        self.assertEqual(report["pages"], 2)
+        self.assertEqual(report["phases"]["read"]["calls"], 1)
+        self.assertEqual(report["slowest_pages"][0]["path"], "a.md")
+
+
+class TestProfiledBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(self.content)
+        with open(self.template, 'w') as file:
+            file.write("{{ Title }}{{ Content }}")
+        for idx in range(3):
+            with open(os.path.join(self.content, f"page{idx}.md"), 'w') as file:
+                file.write(f"# Page {idx}\n\n**bold** text\n\n* a\n* b")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, jobs):
+        dest = os.path.join(self.tmp.name, f"public{jobs}")
+        profile = BuildProfile()
+        generate_pages_recursive(self.content, self.template, dest, jobs, profile)
+        return dest, profile.report()
+
+    def test_profiled_output_matches(self):
+        dest, report = self.build(1)
+        plain = os.path.join(self.tmp.name, "plain")
+        generate_pages_recursive(self.content, self.template, plain)
+        for idx in range(3):
+            with open(os.path.join(dest, f"page{idx}.html")) as a, open(os.path.join(plain, f"page{idx}.html")) as b:
+                self.assertEqual(a.read(), b.read())
+        self.assertEqual(list(report["phases"]), [p for p in phase_order if p not in ("static_copy", "search", "compress")])
+        self.assertEqual(report["phases"]["block_classify"]["calls"], 9)
+
+    def test_parallel_profile(self):
+        _, report = self.build(2)
+        self.assertEqual(report["pages"], 3)
+        self.assertEqual(report["phases"]["read"]["calls"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+
+from fixtures import write
+from gencontent import build_route_index
+from routes import Route, RouteIndex, route_for
+
+
+class TestRouteFor(unittest.TestCase):
+    def test_plain_urls(self):
+        self.assertEqual(route_for("index.md"), ("index.html", "/"))
+        self.assertEqual(route_for("blog/index.md"), ("blog/index.html", "/blog/"))
+        self.assertEqual(route_for("blog/post.md"), ("blog/post.html", "/blog/post.html"))
+
+    def test_pretty_urls(self):
+        self.assertEqual(route_for("blog/post.md", pretty_urls=True), ("blog/post/index.html", "/blog/post/"))
+        self.assertEqual(route_for("blog/index.md", pretty_urls=True), ("blog/index.html", "/blog/"))
+
+    def test_only_last_extension_is_replaced(self):
+        self.assertEqual(route_for("docs.mdx/intro.md"), ("docs.mdx/intro.html", "/docs.mdx/intro.html"))
+        self.assertEqual(route_for("readme.md.bak"), ("readme.md.html", "/readme.md.html"))
+
+
+class TestRouteIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        for name in ("index.md", "about.md", "docs.mdx/intro.md", "blog/index.md", "notes.txt"):
+            write(os.path.join(self.content, name), "# T")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_build_and_lookup(self):
+        routes = build_route_index(self.content, "public", "template.html", pretty_urls=True)
+        self.assertEqual(len(routes), 4)
+        about = routes.source(os.path.join(self.content, "about.md"))
+        self.assertEqual(about.output, os.path.join("public", "about", "index.html"))
+        self.assertIs(routes.url("/about"), about)
+        self.assertIs(routes.url("/about/#team"), about)
+        self.assertIs(routes.url("/about/index.html"), about)
+        self.assertIs(routes.output("public/about/index.html"), about)
+        self.assertEqual(routes.url("/docs.mdx/intro/").source, os.path.join(self.content, "docs.mdx", "intro.md"))
+        self.assertIsNone(routes.url("/missing/"))
+
+    def test_collisions(self):
+        write(os.path.join(self.content, "about", "index.md"), "# T")
+        build_route_index(self.content, "public", "template.html")
+        with self.assertRaises(ValueError) as ctx:
+            build_route_index(self.content, "public", "template.html", pretty_urls=True)
+        self.assertIn("/about/", str(ctx.exception))
+
+    def test_static_collision(self):
+        routes = RouteIndex("public")
+        routes.add(Route("content/index.md", "template.html", "public/index.html", "/"))
+        routes.check_static({"static/css/a.css": {"dest": "public/css/a.css"}})
+        with self.assertRaises(ValueError):
+            routes.check_static({"static/index.html": {"dest": "./public/index.html"}})
+
+
+if __name__ == "__main__":
+    unittest.main()
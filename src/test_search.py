@@ -0,0 +1,96 @@
+import json
+import os
+import tempfile
+import unittest
+
+from fixtures import write
+from routes import Route
+from search import (
+    index_page,
+    new_search_state,
+    page_terms,
+    shard_name,
+    update_search_state,
+    write_search_index,
+)
+
+
+class TestPageTerms(unittest.TestCase):
+    def test_inline_markup_is_not_indexed(self):
+        terms = page_terms("# The **Hobbit**\n\nSee [the *map*](/map.png) and `code` ![alt text](x.png)")
+        self.assertEqual(
+            terms,
+            {"the": [0, 3], "hobbit": [1], "see": [2], "map": [4], "and": [5], "code": [6], "alt": [7], "text": [8]},
+        )
+        self.assertNotIn("png", terms)
+
+    def test_block_markers(self):
+        terms = page_terms("> quoted\n> words\n\n- one\n- two\n\n1. three\n2. four\n\n```\nfn x\n```")
+        self.assertEqual(list(terms), ["quoted", "words", "one", "two", "three", "four", "fn", "x"])
+
+    def test_invalid_markup_keeps_words(self):
+        self.assertEqual(page_terms("broken `code"), {"broken": [0], "code": [1]})
+
+    def test_title(self):
+        self.assertEqual(index_page("intro\n\n# Title  \n\ntext")["title"], "Title")
+        self.assertEqual(index_page("no title")["title"], "")
+
+    def test_shard_name(self):
+        self.assertEqual(shard_name("ab"), "ab")
+        self.assertEqual(shard_name("é"), "xc3a9")
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.search = os.path.join(self.tmp.name, "search")
+        self.state = new_search_state()
+        write(os.path.join(self.tmp.name, "a.md"), "# Alpha\n\nshared words here")
+        write(os.path.join(self.tmp.name, "b.md"), "# Beta\n\nshared zebra")
+
+    def routes(self, *names):
+        return [Route(os.path.join(self.tmp.name, name), "template.html", "", f"/{name[:-3]}/") for name in names]
+
+    def build(self, *names):
+        stats = update_search_state(self.state, self.routes(*names))
+        outputs, written = write_search_index(self.state, self.search, stats["affected"])
+        return stats, outputs, written
+
+    def load(self, name):
+        with open(os.path.join(self.search, name), 'r') as file:
+            return json.load(file)
+
+    def test_index_files(self):
+        stats, outputs, _ = self.build("a.md", "b.md")
+        self.assertEqual(stats["indexed"], 2)
+        meta = self.load("meta.json")
+        self.assertEqual(meta["docs"], [["/a/", "Alpha"], ["/b/", "Beta"]])
+        self.assertEqual(meta["shards"]["sh"], "terms-sh.json")
+        self.assertEqual(len(outputs), len(meta["shards"]) + 1)
+        self.assertEqual(self.load("terms-sh.json"), {"shared": [[0, 1], [1, 1]]})
+        self.assertEqual(self.load("terms-ze.json"), {"zebra": [[1, 2]]})
+
+    def test_incremental_update(self):
+        self.build("a.md", "b.md")
+        stats, _, written = self.build("a.md", "b.md")
+        self.assertEqual((stats["indexed"], stats["unchanged"], written), (0, 2, 0))
+        write(os.path.join(self.tmp.name, "b.md"), "# Beta\n\nshared zebras")
+        stats, _, written = self.build("a.md", "b.md")
+        self.assertEqual(stats["indexed"], 1)
+        self.assertEqual(stats["affected"], {"be", "sh", "ze"})
+        self.assertEqual(written, 1)
+        self.assertEqual(self.load("terms-ze.json"), {"zebras": [[1, 2]]})
+
+    def test_removed_page_frees_its_id(self):
+        self.build("a.md", "b.md")
+        _, outputs, _ = self.build("b.md")
+        self.assertEqual(self.load("meta.json")["docs"], [None, ["/b/", "Beta"]])
+        self.assertNotIn(os.path.join(self.search, "terms-he.json"), outputs)
+        write(os.path.join(self.tmp.name, "c.md"), "# Gamma")
+        self.build("b.md", "c.md")
+        self.assertEqual(self.load("meta.json")["docs"], [["/c/", "Gamma"], ["/b/", "Beta"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from fixtures import read_tree, write
+from gencontent import generate_pages, generate_pages_recursive, list_pages
+from shard import assign_shards, merge_shards, parse_shard, select_shard, write_shard_manifest
+
+
+class TestShard(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        for i in range(12):
+            write(os.path.join(self.content, f"dir{i % 4}", f"page{i}.md"), f"# Page {i}\n\n" + "text " * (i * 50))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def pages(self, dest):
+        return list(list_pages(self.content, dest, self.template))
+
+    def build_shard(self, index, count):
+        shard_path = os.path.join(self.root, f"shard{index}")
+        pages = select_shard(self.pages(shard_path), self.content, index, count)
+        with redirect_stdout(io.StringIO()):
+            generate_pages(pages)
+        write_shard_manifest(shard_path, index, count, pages)
+        return shard_path
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/5"), (2, 5))
+        for text in ("0/2", "3/2", "1", "a/b"):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_partition_is_disjoint_complete_and_balanced(self):
+        pages = self.pages("public")
+        shards = assign_shards(pages, self.content, 3)
+        self.assertEqual(sorted(p for shard in shards for p in shard), sorted(pages))
+        loads = [sum(os.path.getsize(p[0]) for p in shard) for shard in shards]
+        self.assertLess(max(loads) - min(loads), max(os.path.getsize(p[0]) for p in pages))
+
+    def test_partition_is_deterministic(self):
+        pages = self.pages("public")
+        shards = assign_shards(pages, self.content, 3)
+        self.assertEqual(assign_shards(list(reversed(pages)), self.content, 3), shards)
+
+    def test_merge_matches_full_build(self):
+        shard_paths = [self.build_shard(i, 3) for i in (1, 2, 3)]
+        public = os.path.join(self.root, "public")
+        stats = merge_shards(shard_paths, public)
+        self.assertEqual(stats, {"copied": 12, "unchanged": 0, "removed": 0})
+        clean = os.path.join(self.root, "clean")
+        with redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, clean)
+        self.assertEqual(read_tree(public), read_tree(clean))
+        self.assertEqual(merge_shards(shard_paths, public)["unchanged"], 12)
+
+    def test_merge_needs_every_shard(self):
+        shard_paths = [self.build_shard(i, 3) for i in (1, 2)]
+        with self.assertRaises(ValueError):
+            merge_shards(shard_paths, os.path.join(self.root, "public"))
+
+    def test_merge_fails_on_conflicts(self):
+        shard_paths = [self.build_shard(i, 2) for i in (1, 2)]
+        write(os.path.join(shard_paths[0], "extra.txt"), "one")
+        write(os.path.join(shard_paths[1], "extra.txt"), "two")
+        for index, shard_path in enumerate(shard_paths, 1):
+            pages = select_shard(self.pages(shard_path), self.content, index, 2)
+            write_shard_manifest(shard_path, index, 2, pages)
+        public = os.path.join(self.root, "public")
+        with self.assertRaises(ValueError) as ctx:
+            merge_shards(shard_paths, public)
+        self.assertIn("extra.txt", str(ctx.exception))
+        self.assertFalse(os.path.exists(public))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+from fixtures import write
+from staticsync import copy_file, is_unchanged, sync_static
+
+
+class TestStaticSync(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        write(os.path.join(self.static, "index.css"), "body {}")
+        write(os.path.join(self.static, "images", "a.png"), "png" * 1000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, path):
+        with open(path, 'r') as file:
+            return file.read()
+
+    def test_initial_sync_copies_everything(self):
+        entries, stats = sync_static(self.static, self.public)
+        self.assertEqual(stats, {"copied": 2, "unchanged": 0, "removed": 0})
+        self.assertEqual(self.read(os.path.join(self.public, "images", "a.png")), "png" * 1000)
+        self.assertEqual(len(entries), 2)
+
+    def test_unchanged_files_skipped(self):
+        entries, _ = sync_static(self.static, self.public)
+        _, stats = sync_static(self.static, self.public, entries)
+        self.assertEqual(stats, {"copied": 0, "unchanged": 2, "removed": 0})
+
+    def test_changed_and_removed_files(self):
+        entries, _ = sync_static(self.static, self.public)
+        write(os.path.join(self.static, "index.css"), "body { color: red }")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        _, stats = sync_static(self.static, self.public, entries)
+        self.assertEqual(stats, {"copied": 1, "unchanged": 0, "removed": 1})
+        self.assertEqual(self.read(os.path.join(self.public, "index.css")), "body { color: red }")
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images", "a.png")))
+
+    def test_checksum_skips_touched_files(self):
+        sync_static(self.static, self.public)
+        src = os.path.join(self.static, "index.css")
+        os.utime(src, ns=(1, 1))
+        self.assertFalse(is_unchanged(src, os.stat(src), os.path.join(self.public, "index.css")))
+        _, stats = sync_static(self.static, self.public, checksum=True)
+        self.assertEqual(stats["copied"], 0)
+        self.assertEqual(os.stat(os.path.join(self.public, "index.css")).st_mtime_ns, 1)
+
+    def test_hardlink(self):
+        sync_static(self.static, self.public, hardlink=True)
+        self.assertTrue(os.path.samefile(
+            os.path.join(self.static, "index.css"),
+            os.path.join(self.public, "index.css"),
+        ))
+
+    def test_copy_file_preserves_mtime(self):
+        src = os.path.join(self.static, "images", "a.png")
+        dest = os.path.join(self.tmp.name, "copy.png")
+        write(dest, "old")
+        copy_file(src, dest)
+        self.assertEqual(self.read(dest), "png" * 1000)
+        self.assertEqual(os.stat(dest).st_mtime_ns, os.stat(src).st_mtime_ns)
+
+
+if __name__ == "__main__":
+    unittest.main()
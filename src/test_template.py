@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+from fixtures import write
+from gencontent import list_pages
+from template import TemplateCache, compile_template, directory_template
+
+
+class TestTemplate(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_render_slots(self):
+        path = write(os.path.join(self.root, "t.html"), "<title> {{ Title }} </title><p>{{Content}}</p>")
+        template = compile_template(path)
+        self.assertEqual(
+            template.render({"Title": "Hi", "Content": "<b>x</b>"}),
+            "<title> Hi </title><p><b>x</b></p>",
+        )
+
+    def test_stream_accepts_chunk_iterables(self):
+        path = write(os.path.join(self.root, "t.html"), "<main>{{ Content }}</main>")
+        chunks = list(compile_template(path).stream({"Content": iter(["<p>", "x", "</p>"])}))
+        self.assertEqual(chunks, ["<main>", "<p>", "x", "</p>", "</main>"])
+
+    def test_unfilled_slot_kept(self):
+        path = write(os.path.join(self.root, "t.html"), "{{ Title }} {{ Footer }}")
+        self.assertEqual(compile_template(path).render({"Title": "Hi"}), "Hi {{ Footer }}")
+
+    def test_slot_values_not_reparsed(self):
+        path = write(os.path.join(self.root, "t.html"), "{{ Title }}|{{ Content }}")
+        template = compile_template(path)
+        self.assertEqual(template.render({"Title": "{{ Content }}", "Content": "c"}), "{{ Content }}|c")
+
+    def test_include(self):
+        write(os.path.join(self.root, "partials/nav.html"), "<nav>{{ Title }}</nav>")
+        path = write(os.path.join(self.root, "t.html"), '{% include "partials/nav.html" %}<main>{{ Content }}</main>')
+        template = compile_template(path)
+        self.assertEqual(template.render({"Title": "T", "Content": "C"}), "<nav>T</nav><main>C</main>")
+        self.assertEqual(len(template.dependencies), 2)
+
+    def test_include_cycle(self):
+        path = write(os.path.join(self.root, "a.html"), '{% include "b.html" %}')
+        write(os.path.join(self.root, "b.html"), '{% include "a.html" %}')
+        with self.assertRaises(ValueError):
+            compile_template(path)
+
+    def test_layout_inheritance(self):
+        write(os.path.join(self.root, "base.html"), "<head>{% block head %}default{% endblock %}</head><body>{% block body %}{% endblock %}</body>")
+        path = write(os.path.join(self.root, "page.html"), '{% extends "base.html" %}{% block body %}<p>{{ Content }}</p>{% endblock %}')
+        self.assertEqual(
+            compile_template(path).render({"Content": "C"}),
+            "<head>default</head><body><p>C</p></body>",
+        )
+
+    def test_cache_invalidated_by_mtime(self):
+        path = write(os.path.join(self.root, "t.html"), "one {{ Title }}")
+        cache = TemplateCache()
+        first = cache.get(path)
+        self.assertIs(cache.get(path), first)
+        write(os.path.join(self.root, "t.html"), "two {{ Title }}")
+        os.utime(path, ns=(1, 1))
+        self.assertEqual(cache.get(path).render({"Title": "x"}), "two x")
+
+    def test_directory_template(self):
+        default = write(os.path.join(self.root, "template.html"), "default")
+        blog_template = write(os.path.join(self.root, "content/blog/_template.html"), "blog")
+        write(os.path.join(self.root, "content/index.md"), "# Home")
+        write(os.path.join(self.root, "content/blog/post/index.md"), "# Post")
+        self.assertEqual(directory_template(os.path.join(self.root, "content"), default), default)
+        pages = sorted(list_pages(os.path.join(self.root, "content"), "public", default))
+        self.assertEqual([p[1] for p in pages], [blog_template, default])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -54,6 +54,15 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
         node = text_node_to_html_node(TextNode("Value", TextType.IMAGE, url="google.com"))
         self.assertEqual(node.to_html(), '<img src="google.com" alt="Value"></img>')
 
+    def test_text_node_to_html_node_nested_link(self):
+        node = text_node_to_html_node(
+            TextNode("a b", TextType.LINK, "google.com", children=[
+                TextNode("a ", TextType.TEXT),
+                TextNode("b", TextType.BOLD),
+            ])
+        )
+        self.assertEqual(node.to_html(), '<a href="google.com">a <b>b</b></a>')
+
 if __name__ == "__main__":
     unittest.main()
     
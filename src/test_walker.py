@@ -0,0 +1,113 @@
+import os
+import sys
+import tempfile
+import unittest
+
+from fixtures import write
+from gencontent import list_pages
+from staticsync import sync_static
+from walker import is_temp_file, is_walked, walk_tree
+
+
+class TestWalkTree(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "src")
+        for name in ("a.md", "b.txt", ".hidden.md", "a.md~", ".a.md.swp", "#a.md#", "sub/c.md", "drafts/d.md", ".git/e.md"):
+            write(os.path.join(self.root, name))
+        # Registered first so it runs after remove_deep_tree
+        self.addCleanup(self.tmp.cleanup)
+
+    def walk(self, **kwargs):
+        return sorted(os.path.relpath(src, self.root) for src, _, _, _ in walk_tree(self.root, "dest", **kwargs))
+
+    def test_skips_hidden_and_temp_files(self):
+        self.assertEqual(self.walk(), ["a.md", "b.txt", os.path.join("drafts", "d.md"), os.path.join("sub", "c.md")])
+        self.assertIn(".hidden.md", self.walk(skip_hidden=False))
+        self.assertNotIn("a.md~", self.walk(skip_hidden=False))
+
+    def test_include_and_exclude(self):
+        self.assertEqual(
+            self.walk(include=["*.md"], exclude=["drafts"]),
+            ["a.md", os.path.join("sub", "c.md")],
+        )
+        self.assertEqual(self.walk(include=["sub/*"]), [os.path.join("sub", "c.md")])
+
+    def test_destinations_and_context(self):
+        jobs = walk_tree(
+            self.root,
+            "dest",
+            include=["*.md"],
+            enter=lambda src_dir, dest_dir, depth: depth + 1,
+            context=0,
+        )
+        found = {os.path.relpath(src, self.root): (dest, depth) for src, dest, _, depth in jobs}
+        self.assertEqual(found["a.md"], (os.path.join("dest", "a.md"), 0))
+        self.assertEqual(found[os.path.join("sub", "c.md")], (os.path.join("dest", "sub", "c.md"), 1))
+
+    def test_deep_tree_does_not_recurse(self):
+        path = self.root
+        # shutil.rmtree recurses too, so the tree is removed bottom-up
+        self.addCleanup(self.remove_deep_tree, os.path.join(self.root, "d"))
+        try:
+            for _ in range(sys.getrecursionlimit() + 50):
+                path = os.path.join(path, "d")
+                os.mkdir(path)
+            write(os.path.join(path, "deep.md"))
+        except OSError:
+            self.skipTest("path too long for this filesystem")
+        self.assertIn("deep.md", [os.path.basename(p) for p in self.walk()])
+
+    def remove_deep_tree(self, top):
+        path = top
+        while os.path.isdir(os.path.join(path, "d")):
+            path = os.path.join(path, "d")
+        if os.path.exists(os.path.join(path, "deep.md")):
+            os.remove(os.path.join(path, "deep.md"))
+        while len(path) >= len(top) and os.path.isdir(path):
+            os.rmdir(path)
+            path = os.path.dirname(path)
+
+    def test_is_temp_file(self):
+        self.assertTrue(is_temp_file("page.md~"))
+        self.assertTrue(is_temp_file(".#page.md"))
+        self.assertFalse(is_temp_file("page.md"))
+
+    def test_is_walked_agrees_with_walk_tree(self):
+        names = ["a.md", "b.txt", ".hidden.md", "a.md~", ".a.md.swp", "#a.md#", "sub/c.md", "drafts/d.md", ".git/e.md"]
+        for kwargs in ({}, {"include": ["*.md"], "exclude": ["drafts"]}, {"include": ["sub/*"]}, {"skip_hidden": False}):
+            walked = [name for name in names if is_walked(name, **kwargs)]
+            self.assertEqual(sorted(os.path.normpath(name) for name in walked), self.walk(**kwargs))
+
+
+class TestWalkUsers(unittest.TestCase):
+    def test_list_pages_only_markdown(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            for name in ("index.md", "notes.txt", "blog/_template.html", "blog/post.md", "blog/.post.md.swp"):
+                write(os.path.join(content, name))
+            pages = sorted(list_pages(content, "public", "template.html"))
+            self.assertEqual(
+                pages,
+                [
+                    (os.path.join(content, "blog", "post.md"), os.path.join(content, "blog", "_template.html"), os.path.join("public", "blog", "post.html")),
+                    (os.path.join(content, "index.md"), "template.html", os.path.join("public", "index.html")),
+                ],
+            )
+
+    def test_sync_static_keeps_hidden_skips_temp(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            static = os.path.join(tmp, "static")
+            public = os.path.join(tmp, "public")
+            for name in (".well-known/security.txt", "css/site.css", "css/site.css~", "empty/.keep"):
+                write(os.path.join(static, name), "x")
+            entries, _ = sync_static(static, public, exclude=["empty"])
+            self.assertEqual(
+                sorted(os.path.relpath(src, static) for src in entries),
+                [os.path.join(".well-known", "security.txt"), os.path.join("css", "site.css")],
+            )
+            self.assertTrue(os.path.isfile(os.path.join(public, ".well-known", "security.txt")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 from enum import Enum
-from htmlnode import LeafNode
+from assets import asset_url
+from htmlnode import LeafNode, ParentNode
 
 class TextType(Enum):
     TEXT = "text"
@@ -10,18 +11,31 @@ class TextType(Enum):
     IMAGE = "image"
 
 class TextNode:
-    def __init__(self, text, text_type:TextType, url=None):
+    __slots__ = ("text", "text_type", "url", "children")
+
+    def __init__(self, text, text_type:TextType, url=None, children=None):
         self.text = text
         self.text_type = text_type
         self.url = url
+        # Nested inline nodes, e.g. bold text inside a link
+        self.children = children
 
     def __eq__(self, other):
-        return self.text == other.text and self.text_type == other.text_type and self.url == other.url
+        return (
+            self.text == other.text
+            and self.text_type == other.text_type
+            and self.url == other.url
+            and self.children == other.children
+        )
 
     def __repr__(self):
+        if self.children:
+            return f"TextNode({self.text}, {self.text_type}, {self.url}, children: {self.children})"
         return f"TextNode({self.text}, {self.text_type}, {self.url})"
     
 def text_node_to_html_node(text_node:TextNode):
+    if text_node.children:
+        return nested_text_node_to_html_node(text_node)
     match text_node.text_type:
         case TextType.TEXT:
             return LeafNode(None, text_node.text)
@@ -34,7 +48,18 @@ def text_node_to_html_node(text_node:TextNode):
         case TextType.LINK:
             return LeafNode("a", text_node.text, props={"href": text_node.url})
         case TextType.IMAGE:
-            return LeafNode("img", "", props={"src": text_node.url, "alt": text_node.text})
+            return LeafNode("img", "", props={"src": asset_url(text_node.url), "alt": text_node.text})
         case _:
             raise Exception(f"Invalid TextNode type {text_node.text_type}")
 
+def nested_text_node_to_html_node(text_node:TextNode):
+    children = [text_node_to_html_node(c) for c in text_node.children]
+    match text_node.text_type:
+        case TextType.BOLD:
+            return ParentNode("b", children)
+        case TextType.ITALIC:
+            return ParentNode("i", children)
+        case TextType.LINK:
+            return ParentNode("a", children, props={"href": text_node.url})
+        case _:
+            raise Exception(f"TextNode type {text_node.text_type} cannot have children")
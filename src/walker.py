@@ -0,0 +1,51 @@
+import os
+from fnmatch import fnmatchcase
+
+# Editor swap/backup files and partial downloads
+temp_patterns = ("*~", "*.swp", "*.swx", "*.tmp", "*.part", "#*#", ".#*")
+
+
+def is_temp_file(name):
+    return any(fnmatchcase(name, pattern) for pattern in temp_patterns)
+
+
+def is_walked(rel_path, include=None, exclude=None, skip_hidden=True):
+    # Whether walk_tree would yield the file at rel_path, a "/"-separated path
+    # relative to src_root; for paths reported by a watcher
+    parts = rel_path.split("/")
+    for i, name in enumerate(parts):
+        if (skip_hidden and name.startswith(".")) or is_temp_file(name):
+            return False
+        if exclude and any(fnmatchcase("/".join(parts[:i + 1]), pattern) for pattern in exclude):
+            return False
+    return not include or any(fnmatchcase(rel_path, pattern) for pattern in include)
+
+
+def walk_tree(src_root, dest_root, include=None, exclude=None, skip_hidden=True, enter=None, context=None):
+    # Yield (src_path, dest_path, dir_entry, context) for every file below
+    # src_root without recursion. Only the directories still to be visited are
+    # held in memory, each file is yielded as os.scandir reports it and its
+    # DirEntry keeps the cached type (and stat once asked for).
+    # include/exclude are globs matched against the "/"-separated path
+    # relative to src_root; an excluded directory is not entered at all.
+    # enter(src_dir, dest_dir, parent_context) -> context runs once per
+    # subdirectory, e.g. to create it or to pick a directory template.
+    stack = [(src_root, dest_root, "", context)]
+    while stack:
+        src_dir, dest_dir, rel_dir, context = stack.pop()
+        with os.scandir(src_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if (skip_hidden and name.startswith(".")) or is_temp_file(name):
+                    continue
+                rel_path = rel_dir + name
+                if exclude and any(fnmatchcase(rel_path, pattern) for pattern in exclude):
+                    continue
+                dest_path = os.path.join(dest_dir, name)
+                if entry.is_dir():
+                    sub_context = enter(entry.path, dest_path, context) if enter else context
+                    stack.append((entry.path, dest_path, rel_path + "/", sub_context))
+                    continue
+                if include and not any(fnmatchcase(rel_path, pattern) for pattern in include):
+                    continue
+                yield entry.path, dest_path, entry, context